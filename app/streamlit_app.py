@@ -3,11 +3,13 @@ import os
 import tempfile
 from pathlib import Path
 
-import numpy as np
 import pandas as pd
 import streamlit as st
 
-from cli.cpps import compute_cpps_batch, save_timecourse_plot
+from cli.batch import parse_channels
+from cli.budget import iter_cpps_budgeted, parse_memory
+from cli.cpps import save_per_frame_plot
+from cli.features import FEATURES
 
 st.set_page_config(page_title="CPP Studio", layout="wide")
 st.title("CPP Studio — Streamlit")
@@ -29,6 +31,19 @@ praat_bias = st.sidebar.number_input(
 per_frame = st.sidebar.checkbox("Per-frame outputs (CSV + save PNGs to folder)", value=True)
 plots_dir = st.sidebar.text_input("Output directory for per-frame PNGs/CSVs", value="frame_plots")
 save_frame_csvs = st.sidebar.checkbox("Also save per-file framewise CSVs to plots_dir", value=True)
+channels_text = st.sidebar.text_input(
+    "Channels (all, or e.g. 0,1; empty = average to mono)", value="",
+    help="Analyze each selected channel separately; results get _ch<i> columns."
+)
+features = st.sidebar.multiselect(
+    "Extra per-frame measures", list(FEATURES), default=[],
+    format_func=lambda k: f"{k}: {FEATURES[k].description}",
+    help="Computed from the same spectra; per-frame columns and mean_/median_ summary columns."
+)
+max_memory = st.sidebar.text_input(
+    "Memory budget (e.g. 512M, 2G; empty = unlimited)", value=os.environ.get("CPPS_MAX_MEMORY", ""),
+    help="Files that would not fit are analyzed in blocks instead of being decoded whole."
+)
 run_btn = st.sidebar.button("Run analysis", type="primary")
 
 # ---------------- Helpers ----------------
@@ -60,6 +75,18 @@ def _write_uploads_to_dir(files, out_dir: Path) -> list[str]:
     return paths
 
 
+def _save_per_frame(path, pf):
+    """Save one file's time-course PNG (and framewise CSV) into plots_dir."""
+    stem = Path(path).stem
+    out_png = Path(plots_dir) / f"{stem}_cpps.png"
+    save_per_frame_plot(pf, str(out_png), title=f"CPPS: {stem}")
+
+    if save_frame_csvs:
+        out_csv = Path(plots_dir) / f"{stem}_cpps_framewise.csv"
+        # every engine column (features, _ch<i>), like cpps-run's framewise CSVs
+        pf.to_csv(out_csv, index=False)
+
+
 # ---------------- Main action ----------------
 if run_btn:
     if not uploaded:
@@ -74,10 +101,23 @@ if run_btn:
     except Exception:
         pass
     wav_paths = _write_uploads_to_dir(uploaded, up_dir)
+    try:
+        budget = parse_memory(max_memory.strip() or None)
+        channels = parse_channels(channels_text)
+    except ValueError as e:
+        st.error(str(e))
+        st.stop()
 
+    # Stream results: per-frame outputs are saved as each file finishes, not kept
+    rows = []
+    n_saved = 0
+    if per_frame:
+        os.makedirs(plots_dir, exist_ok=True)
+    progress = st.progress(0.0)
     with st.spinner("Computing…"):
-        df, per_frame_map = compute_cpps_batch(
+        results = iter_cpps_budgeted(
             wav_paths,
+            budget,
             frame_ms=40,
             hop_pct=50,
             preemph_alpha=0.97,
@@ -90,7 +130,16 @@ if run_btn:
             praat_bias_db=(praat_bias if praat_bias != 0.0 else None),
             hop_ms=20.0,
             preemph_from_hz=50.0,
+            channels=channels,
+            features=features,
         )
+        for i, (path, (summary, pf)) in enumerate(zip(wav_paths, results)):
+            rows.append(summary)
+            if pf is not None:
+                _save_per_frame(path, pf)
+                n_saved += 1
+            progress.progress((i + 1) / len(wav_paths))
+    df = pd.DataFrame(rows)
 
     st.success(f"Processed {len(df)} files.")
     st.dataframe(df, use_container_width=True)
@@ -104,22 +153,8 @@ if run_btn:
         mime="text/csv",
     )
 
-    # If per-frame is enabled, save PNGs (and optionally per-file framewise CSVs) for ALL files
-    if per_frame and per_frame_map:
-        os.makedirs(plots_dir, exist_ok=True)
-        for path, pf in per_frame_map.items():
-            stem = Path(path).stem
-            times = pf["time_s"].to_numpy() if "time_s" in pf.columns else np.arange(len(pf), dtype=float)
-            out_png = Path(plots_dir) / f"{stem}_cpps.png"
-            save_timecourse_plot(times, pf["cpps_db"].to_numpy(), str(out_png), title=f"CPPS: {stem}")
-
-            if save_frame_csvs:
-                out_csv = Path(plots_dir) / f"{stem}_cpps_framewise.csv"
-                # Ensure ordering of columns for consistency
-                cols = [c for c in ("frame_index", "time_s", "cpps_db", "f0_hz") if c in pf.columns]
-                pf.to_csv(out_csv, index=False, columns=cols or None)
-
-        msg = f"Saved PNGs for {len(per_frame_map)} files to **{plots_dir}**."
+    if n_saved:
+        msg = f"Saved PNGs for {n_saved} files to **{plots_dir}**."
         if save_frame_csvs:
             msg += " Also saved per-file framewise CSVs."
         st.info(msg)
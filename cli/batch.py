@@ -0,0 +1,376 @@
+# cli/batch.py
+# Batched analysis units: several signals through one vectorized kernel call.
+#
+# Each unit is pre-emphasized and gated on its own level as usual, then the
+# accepted frames of every unit with the same analysis geometry (sample rate
+# -> frame length, FFT size and search band) are analyzed in a single kernel
+# call over one concatenated signal buffer. Results are split back per unit
+# for median smoothing, bias and the summary row, so values are the same as
+# compute_cpps_for_signal gives unit by unit.
+#
+# cpps-run does not batch separate files this way: with the vectorized
+# kernels that measured within +-10% of file-by-file analysis on one core
+# (300 files of 1-3 s, both engines), so it is used for channels only.
+#
+# Channels of one recording (--channels) are batched the same way: each
+# selected channel is gated on its own level, all channels go through one
+# kernel call, and the per-channel results become _ch<i> columns.
+#
+# --features measures (cli.features) are evaluated inside the same kernel
+# call from the spectra of the accepted frames and come back as one more
+# per-frame array.
+#
+# With adaptive on (cli.adaptive), a coarse periodicity pass restricts each
+# unit's accepted frames to voiced regions before batching; the frames it
+# drops are reported as skipped.
+#
+# FrameSummary turns per-frame results into the summary row. It takes them
+# in blocks in time order (cli.streaming feeds one block at a time; here a
+# unit is one block), carries the median-smoothing window across block
+# edges and updates one SummaryAccumulator per column, so per-frame arrays
+# are only kept when they are wanted: for per-frame output, and for exact
+# percentiles in memory.
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+from .adaptive import adaptive_mask
+from .cpps import (CPPS_RESOLUTION_DB, F0_RESOLUTION_HZ, _analysis_signal, _cepstrogram_writer,
+                   _default_frames, _default_gate, _median_smooth, _per_frame_df, _q_band,
+                   _summary_from_accumulators)
+from .features import FeatureSpec, feature_columns, feature_summary, parse_features
+from .parallel import map_frame_chunks
+from .praat_match import _praat_band, _praat_frames, _praat_gate, _smoothing_band
+from .quefrency import band_method, parse_band_mode
+from .stats import SummaryAccumulator, SummaryRow
+
+FEATURE_RESOLUTION = 1e-3  # histogram sketch of --features medians (rounded to 3 decimals)
+
+# summary columns shared by all channels of a file (the rest get a _ch<i> suffix)
+SHARED_COLUMNS = ("file", "frames", "duration_s")
+
+
+class _Prepared(NamedTuple):
+    """One file after gating: pre-emphasized signal, frame grid and gate mask."""
+    path: str
+    x: np.ndarray
+    fs: int
+    n: int
+    h: int
+    starts: np.ndarray
+    keep: np.ndarray
+    sink: object = None
+    skipped: np.ndarray = None
+
+
+def _prepare(path, x, fs, p):
+    x, fs = _analysis_signal(x, fs, p["analysis_rate"])
+    if p["praat_match"]:
+        x, n, h, starts, keep = _praat_gate(x, fs, p["frame_ms"], p["hop_ms"],
+                                            p["preemph_from_hz"], p["gate_db"])
+    else:
+        x, n, h, starts, keep = _default_gate(x, fs, p["frame_ms"], p["hop_pct"],
+                                              p["preemph_alpha"], p["energy_gate_db"])
+    skipped = None
+    if p["adaptive"]:
+        voiced = adaptive_mask(x, starts, keep, n, fs, p["f0_min"], p["f0_max"],
+                               _preemph_coef(fs, p))
+        skipped, keep = keep & ~voiced, keep & voiced
+    sink = None
+    if p["cepstrogram_dir"]:
+        sink = _cepstrogram_writer(p["cepstrogram_dir"], path, fs, n, h, len(x),
+                                   p["praat_match"], p["archive_params"])
+    return _Prepared(path, x, fs, n, h, starts, keep, sink, skipped)
+
+
+def _preemph_coef(fs, p):
+    # pre-emphasis coefficient the analysis signal carries, so measures can undo it
+    if p["praat_match"]:
+        return float(np.exp(-2.0 * np.pi * p["preemph_from_hz"] / fs))
+    return float(p["preemph_alpha"])
+
+
+def _feature_spec(fs, p):
+    if not p["features"]:
+        return None
+    return FeatureSpec(p["features"], _preemph_coef(fs, p), float(p["f0_min"]), float(p["f0_max"]))
+
+
+def _kernel_for(fs, n, p):
+    """Frame kernel, its keywords, stored band start and cepstrum length for one geometry."""
+    spec = _feature_spec(fs, p)
+    if p["praat_match"]:
+        fft_len, i0, i1, qwin = _praat_band(fs, n, p["f0_min"], p["f0_max"])
+        method = band_method(p["band_cepstrum"], fft_len, *_smoothing_band(fft_len, i0, i1, qwin))
+        return (_praat_frames, dict(fs=fs, fft_len=fft_len, i0=i0, i1=i1, qwin=qwin, features=spec,
+                                    band_method=method), max(0, i0 - 1), fft_len)
+    cep_len = 2 * (n // 2)  # irfft length of an n-point rfft
+    i0, i1 = _q_band(cep_len, fs, p["f0_min"], p["f0_max"])
+    return (_default_frames, dict(fs=fs, i0=i0, i1=i1, features=spec,
+                                  band_method=band_method(p["band_cepstrum"], cep_len, i0, i1)),
+            i0, cep_len)
+
+
+def _analyze_group(group, p):
+    """Run one kernel call over the accepted frames of files sharing fs and frame length."""
+    fs, n = group[0].fs, group[0].n
+    keep_band = any(g.sink is not None for g in group)
+    kernel, kw, band_start, cep_len = _kernel_for(fs, n, p)
+
+    # one contiguous buffer; each file's frame starts shifted by its offset
+    offsets = np.concatenate(([0], np.cumsum([len(g.x) for g in group])))
+    starts = np.concatenate([g.starts[g.keep] + off for g, off in zip(group, offsets)])
+    counts = [int(g.keep.sum()) for g in group]
+    if not starts.size:
+        return [(np.zeros(0), np.zeros(0), None, np.zeros((0, len(p["features"]))))] * len(group)
+    x = np.concatenate([g.x for g in group])
+    cpp, f0, band, feats = map_frame_chunks(kernel, x, starts, n, workers=p["workers"],
+                                            keep_band=keep_band, **kw)
+
+    out = []
+    bounds = np.cumsum([0] + counts)
+    for g, a, b in zip(group, bounds[:-1], bounds[1:]):
+        rows = band[a:b] if band is not None else None
+        if g.sink is not None and b > a:
+            g.sink(np.flatnonzero(g.keep), rows, band_start=band_start, fft_len=cep_len)
+        out.append((cpp[a:b], f0[a:b], rows, feats[a:b] if feats is not None else None))
+    return out
+
+
+class FrameSummary:
+    """
+    Summary row (and per-frame table) of one unit from per-frame blocks fed in time order.
+
+    add() takes the raw CPPS / F0 of consecutive frames (NaN for gated
+    ones), the --features measures as a (frames, k) array and the adaptive
+    skipped mask; bias or median smoothing is applied on the way in.
+    keep_frames keeps the series for exact percentiles and, if
+    return_per_frame is set, the per-frame table; without it only the
+    accumulators grow with the unit.
+    """
+
+    def __init__(self, path, n, h, fs, p, keep_frames=True):
+        self.path, self.n, self.h, self.fs, self.p = path, n, h, fs, p
+        self.keep_frames = keep_frames
+        k = 0
+        if not p["praat_match"] and p["med_smooth_frames"] and p["med_smooth_frames"] > 1:
+            k = int(p["med_smooth_frames"]) | 1  # _median_smooth makes it odd the same way
+        self.smooth, self.pad = k, k // 2
+        self.cpp = SummaryAccumulator(CPPS_RESOLUTION_DB)
+        self.f0 = SummaryAccumulator(F0_RESOLUTION_HZ)
+        self.feats = [SummaryAccumulator(FEATURE_RESOLUTION)
+                      for _ in feature_columns(p["features"])]
+        self.skipped = 0
+        self._left = np.zeros(0)     # last smoothed-over raw CPPS (left context)
+        self._pending = np.zeros(0)  # raw CPPS still waiting for right context
+        self._kept = {"cpps": [], "f0": [], "feats": [], "skipped": []}
+
+    def add(self, cpps, f0s, feats=None, skipped=None) -> None:
+        cpps = np.asarray(cpps, dtype=float)
+        if self.p["praat_match"] and self.p["praat_bias_db"] is not None:
+            cpps = cpps + float(self.p["praat_bias_db"])  # gated NaNs stay NaN
+        self._cpps(self._smoothed(cpps))
+        self.f0.update(f0s)
+        for j, acc in enumerate(self.feats):
+            acc.update(feats[:, j])
+        if skipped is not None:
+            self.skipped += int(np.count_nonzero(skipped))
+        if self.keep_frames:
+            self._kept["f0"].append(np.asarray(f0s, dtype=float))
+            if self.feats:
+                self._kept["feats"].append(feats)
+            if skipped is not None:
+                self._kept["skipped"].append(np.asarray(skipped, dtype=bool))
+
+    def _smoothed(self, raw, final=False):
+        """Smoothed CPPS of the frames whose whole window has arrived (all of them if final)."""
+        if not self.smooth:
+            return raw
+        seq = np.concatenate((self._left, self._pending, raw))
+        start = len(self._left)
+        stop = len(seq) if final else max(start, len(seq) - self.pad)
+        out = _median_smooth(seq, self.smooth)[start:stop]
+        # frames before `start` only exist at the start of the unit, where
+        # _median_smooth's NaN padding is the whole-series behaviour too
+        self._left, self._pending = seq[max(0, stop - self.pad):stop], seq[stop:]
+        return out
+
+    def _cpps(self, values) -> None:
+        self.cpp.update(values)
+        if self.keep_frames:
+            self._kept["cpps"].append(values)
+
+    def finish(self, duration_s):
+        """-> (summary, per_frame_df_or_None)."""
+        self._cpps(self._smoothed(np.zeros(0), final=True))
+        p, kept = self.p, self._kept
+        cpps = np.concatenate([np.zeros(0)] + kept["cpps"]) if self.keep_frames else None
+        summary = _summary_from_accumulators(Path(self.path).name, self.cpp, self.f0,
+                                             self.h / self.fs, duration_s, cpps)
+        pf = None
+        if self.keep_frames and p["return_per_frame"]:
+            f0s = np.concatenate([np.zeros(0)] + kept["f0"])
+            pf = _per_frame_df(cpps, f0s, self.n, self.h, self.fs)
+        if p["features"]:
+            if self.keep_frames:
+                feats = np.concatenate(kept["feats"]) if kept["feats"] else \
+                    np.zeros((0, len(self.feats)))
+                summary.update(feature_summary(p["features"], feats))
+                if pf is not None:
+                    for j, col in enumerate(feature_columns(p["features"])):
+                        pf[col] = feats[:, j]
+            else:
+                for col, acc in zip(feature_columns(p["features"]), self.feats):
+                    median = acc.quantile(0.5)
+                    summary[f"mean_{col}"] = round(acc.mean, 3) if acc.count else None
+                    summary[f"median_{col}"] = round(median, 3) if acc.count else None
+        if p["adaptive"]:
+            summary["skipped_frames"] = self.skipped
+            if pf is not None:
+                pf["skipped"] = np.concatenate([np.zeros(0, dtype=bool)] + kept["skipped"])
+        summary.accumulators.update(zip(feature_columns(p["features"]), self.feats))
+        return summary, pf
+
+
+def _finish(path, cpps, f0s, n, h, fs, duration_s, p, feats=None, skipped=None):
+    """
+    Bias / median smoothing on whole-file per-frame arrays -> (summary, per_frame_df_or_None).
+
+    feats: (frames, k) array of the --features measures (NaN for gated
+    frames), added as per-frame columns and mean_/median_ summary columns.
+    skipped: frames the adaptive coarse pass left out ("skipped" column,
+    "skipped_frames" count).
+    """
+    acc = FrameSummary(path, n, h, fs, p)
+    acc.add(cpps, f0s, feats, skipped if p["adaptive"] else None)
+    return acc.finish(duration_s)
+
+
+def _options(frame_ms=40, hop_pct=50, preemph_alpha=0.97, f0_min=60, f0_max=500,
+             energy_gate_db=25, med_smooth_frames=3, return_per_frame=False, *,
+             praat_match=False, praat_bias_db=None, hop_ms=20.0, preemph_from_hz=50.0,
+             cepstrogram_dir=None, workers=1, analysis_rate=None, channels=None, features=None,
+             band_cepstrum="off", adaptive=False):
+    # same defaults and coercions as compute_cpps_for_signal
+    if adaptive and not praat_match:
+        # one FFT pair per frame: the coarse pass costs about what it saves
+        raise ValueError("adaptive needs praat_match (the default engine is not sped up by it)")
+    p = dict(frame_ms=frame_ms, hop_pct=hop_pct, preemph_alpha=preemph_alpha,
+             f0_min=f0_min, f0_max=f0_max, energy_gate_db=energy_gate_db,
+             med_smooth_frames=med_smooth_frames, return_per_frame=return_per_frame,
+             praat_match=praat_match, praat_bias_db=praat_bias_db, hop_ms=hop_ms,
+             preemph_from_hz=preemph_from_hz, cepstrogram_dir=cepstrogram_dir,
+             workers=workers, analysis_rate=analysis_rate, channels=channels,
+             features=parse_features(features), band_cepstrum=parse_band_mode(band_cepstrum),
+             adaptive=bool(adaptive))
+    p["archive_params"] = {k: p[k] for k in (
+        "frame_ms", "hop_pct", "hop_ms", "preemph_alpha", "preemph_from_hz", "f0_min",
+        "f0_max", "energy_gate_db", "med_smooth_frames", "praat_bias_db")}
+    if praat_match:
+        p.update(frame_ms=float(frame_ms) if frame_ms else 40.0,
+                 hop_ms=float(hop_ms) if hop_ms else 20.0,
+                 preemph_from_hz=float(preemph_from_hz),
+                 gate_db=float(energy_gate_db) if energy_gate_db is not None else 20.0,
+                 f0_min=float(f0_min), f0_max=float(f0_max))
+    return p
+
+
+# ---------- channels ----------
+def parse_channels(text):
+    """'all' or 'i,j' (0-based) -> "all" / [i, j]; None or '' -> None (average all channels)."""
+    if text is None or not str(text).strip():
+        return None
+    if str(text).strip().lower() == "all":
+        return "all"
+    try:
+        return [int(c) for c in str(text).split(",")]
+    except ValueError:
+        raise ValueError(f"bad channel list {text!r} (use all or e.g. 0,1)") from None
+
+
+def channel_indices(channels, n_channels: int, path="") -> list[int]:
+    idx = list(range(n_channels)) if channels == "all" else [int(c) for c in channels]
+    bad = [c for c in idx if not 0 <= c < n_channels]
+    if bad or not idx:
+        raise ValueError(f"{path}: channel(s) {bad or idx} not in 0..{n_channels - 1}")
+    return idx
+
+
+def _channel_name(path, c) -> str:
+    # per-channel name, e.g. for cepstrogram archives: <stem>_ch<c><suffix>
+    p = Path(path)
+    return str(p.with_name(f"{p.stem}_ch{c}{p.suffix}"))
+
+
+def merge_channels(path, chans, results):
+    """Per-channel (summary, per_frame) -> one summary row / per-frame table with _ch<i> columns."""
+    first, pf0 = results[0]
+    summary = SummaryRow({"file": Path(path).name, "channels": ",".join(map(str, chans))})
+    summary.update({k: first[k] for k in SHARED_COLUMNS[1:]})
+    for c, (s, _) in zip(chans, results):
+        summary.update({f"{k}_ch{c}": v for k, v in s.items() if k not in SHARED_COLUMNS})
+        summary.accumulators.update({f"{k}_ch{c}": acc
+                                     for k, acc in getattr(s, "accumulators", {}).items()})
+    pf = None
+    if pf0 is not None:
+        pf = pf0[["frame_index", "time_s"]].copy()
+        for c, (_, f) in zip(chans, results):
+            for col in f.columns.drop(["frame_index", "time_s"]):
+                pf[f"{col}_ch{c}"] = f[col].to_numpy()
+    return summary, pf
+
+
+# ---------- entry points ----------
+def analyze_batch(items, **params):
+    """
+    Analyze decoded files together: items are (path, x, fs).
+
+    Returns [(summary, per_frame_df_or_None)] in input order. params are those
+    of compute_cpps_for_signal; with channels set, every selected channel of
+    every file is one analysis unit and results are merged per file.
+    """
+    p = _options(**params)
+    units = []  # (item index, channel or None, name, 1-D or multichannel signal, fs)
+    for k, (path, x, fs) in enumerate(items):
+        if p["channels"] is None:
+            units.append((k, None, path, x, fs))
+            continue
+        x = np.asarray(x)
+        x = x if x.ndim > 1 else x[:, None]
+        for c in channel_indices(p["channels"], x.shape[1], path):
+            units.append((k, c, _channel_name(path, c), x[:, c], fs))
+
+    prepared = [_prepare(name, x, fs, p) for _, _, name, x, fs in units]
+    groups: dict[tuple[int, int], list[int]] = {}
+    for i, g in enumerate(prepared):
+        groups.setdefault((g.fs, g.n), []).append(i)
+
+    unit_results = [None] * len(prepared)
+    for idx in groups.values():
+        for i, (cpp, f0, _, feat) in zip(idx, _analyze_group([prepared[i] for i in idx], p)):
+            g = prepared[i]
+            cpps = np.full(len(g.starts), np.nan)
+            f0s = np.full(len(g.starts), np.nan)
+            feats = np.full((len(g.starts), len(p["features"])), np.nan)
+            cpps[g.keep], f0s[g.keep] = cpp, f0
+            if feat is not None:
+                feats[g.keep] = feat
+            if g.sink is not None:
+                g.sink.close(len(g.starts))
+            unit_results[i] = _finish(g.path, cpps, f0s, g.n, g.h, g.fs, len(g.x) / g.fs, p, feats,
+                                      g.skipped)
+
+    if p["channels"] is None:
+        return unit_results
+    results = []
+    for k, (path, _, _) in enumerate(items):
+        mine = [(c, r) for (j, c, *_), r in zip(units, unit_results) if j == k]
+        results.append(merge_channels(path, [c for c, _ in mine], [r for _, r in mine]))
+    return results
+
+
+def analyze_channels(x, fs, path, **params):
+    """One decoded file through analyze_batch (per-channel analysis, --features)."""
+    summary, pf = analyze_batch([(path, x, fs)], **params)[0]
+    return (summary, pf) if params.get("return_per_frame", False) else summary
@@ -0,0 +1,243 @@
+# cli/budget.py
+# Memory-budgeted execution (--max-memory).
+#
+# Each file's working set is estimated from its header (audio_info: frames
+# x channels, decoded as float64) plus the frame stack the kernels build, and
+# the file is assigned one of three modes (with --channels, signal and frame
+# costs scale with the number of channels analyzed):
+#   memory   : decode whole file, analyze in one go (the normal path)
+#   parallel : as memory, but frames split over intra-file workers
+#   stream   : decode and analyze in blocks (cli/streaming.py), block size
+#              chosen so the block working set fits
+# Run-level limits (reader prefetch window, write queue, intra-file workers)
+# are then shrunk so the sum stays under the budget.
+#
+# Intervals (--intervals / --textgrid-tier) are planned the same way from
+# their decoded range (cli.intervals.interval_span); a streamed interval is
+# read in blocks over just that range.
+#
+# The budget covers audio and analysis buffers, not the interpreter itself
+# (roughly 100-150 MB for Python + numpy/scipy/pandas/matplotlib).
+import math
+import re
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+from .cpps import _frame_params, audio_info, compute_cpps_for_signal, read_audio
+from .features import parse_features
+from .intervals import (analyze_interval, interval_name, interval_result, interval_span,
+                        read_interval)
+from .parallel import MIN_CHUNK_FRAMES, resolve_workers
+from .praat_match import _frame_params as _praat_frame_params
+from .streaming import compute_cpps_streaming
+from .wfdb_io import RecordInfo
+
+SAMPLE_BYTES = 8                  # decoded and analyzed as float64
+WORKER_OVERHEAD_BYTES = 64 << 20  # one pool process (interpreter + numpy/scipy)
+PER_FRAME_RESULT_BYTES = 64       # per-frame arrays + DataFrame row
+MIN_BLOCK_FRAMES = 8
+
+_UNITS = {"": 1, "b": 1, "k": 1 << 10, "kb": 1 << 10, "kib": 1 << 10, "m": 1 << 20, "mb": 1 << 20,
+          "mib": 1 << 20, "g": 1 << 30, "gb": 1 << 30, "gib": 1 << 30}
+
+
+def parse_memory(text) -> int | None:
+    """'512M', '2G', '1.5GiB', '800000000' -> bytes; None/''/'0' -> None (no budget)."""
+    if text is None:
+        return None
+    m = re.fullmatch(r"\s*([\d.]+)\s*([a-zA-Z]*)\s*", str(text))
+    if not m or m.group(2).lower() not in _UNITS:
+        raise ValueError(f"bad memory size {text!r} (use e.g. 512M, 2G)")
+    n = int(float(m.group(1)) * _UNITS[m.group(2).lower()])
+    return n or None
+
+
+class FileEstimate(NamedTuple):
+    """Working-set model of one file (bytes)."""
+    decoded: int        # sf.read output (frames x channels x float64)
+    signal: int         # mono / resampled / pre-emphasized copies alive together
+    per_frame: int      # kernel temporaries per analysis frame (frame stack, spectra, cepstra)
+    n_frames: int
+    frame_len: int
+    hop: int
+    channels: int
+    streams: int = 1    # analyzed signals (1 = mono mix, else the selected channels)
+
+    @property
+    def frames_total(self) -> int:
+        return self.n_frames * self.streams
+
+    @property
+    def in_memory(self) -> int:
+        return (self.decoded + self.signal
+                + self.frames_total * (self.per_frame + PER_FRAME_RESULT_BYTES))
+
+    def stream(self, block_frames: int) -> int:
+        """Working set when analyzing in blocks of block_frames frames."""
+        block_samples = (block_frames - 1) * self.hop + self.frame_len
+        # decoded block, mono/pre-emphasized copies, carry buffer + its
+        # concatenation, gate cumsum (per analyzed signal)
+        return ((self.channels + 5 * self.streams) * block_samples * SAMPLE_BYTES
+                + block_frames * self.streams * self.per_frame
+                + self.frames_total * PER_FRAME_RESULT_BYTES)
+
+
+def estimate_file(info, frame_ms=40, hop_pct=50, praat_match=False, hop_ms=20.0,
+                  analysis_rate=None, channels=None, features=None, **_):
+    """FileEstimate from an audio_info() / soundfile.info() result and the analysis options."""
+    fs = int(analysis_rate or info.samplerate)
+    samples = int(math.ceil(info.frames * fs / info.samplerate))
+    if praat_match:
+        n, h = _praat_frame_params(fs, float(frame_ms) if frame_ms else 40.0,
+                                   float(hop_ms) if hop_ms else 20.0)
+        fft_len = int(2 ** np.ceil(np.log2(n)))
+        # frame stack, complex spectrum, log power, cepstrum, smoothed + its cumsum
+        per_frame = SAMPLE_BYTES * (n + 2 * (fft_len // 2 + 1) + (fft_len // 2 + 1) + 3 * fft_len)
+    else:
+        n, h = _frame_params(fs, frame_ms, hop_pct)
+        # frame stack, complex spectrum, magnitude/log, cepstrum
+        per_frame = SAMPLE_BYTES * (n + 2 * (n // 2 + 1) + (n // 2 + 1) + n)
+    features = parse_features(features)
+    if features:
+        # power spectrum and band/log copies; HNR adds a 2n zero-padded spectrum and autocorrelation
+        n_pad = int(2 ** np.ceil(np.log2(2 * n)))
+        per_frame += SAMPLE_BYTES * (3 * (n // 2 + 1) + (4 * n_pad if "hnr" in features else 0))
+    n_frames = (samples - n) // h + 1 if samples >= n else 0
+    decoded = info.frames * info.channels * SAMPLE_BYTES
+    streams = 1 if channels is None else (info.channels if channels == "all" else len(channels))
+    # mono mix (or channel copy) + pre-emphasized copy + the squared/cumsum
+    # arrays of the energy gate, per analyzed signal
+    resampled = info.frames * SAMPLE_BYTES if analysis_rate else 0
+    signal = streams * (4 * samples * SAMPLE_BYTES + resampled)
+    return FileEstimate(decoded, signal, per_frame, n_frames, n, h, info.channels, streams)
+
+
+class FilePlan(NamedTuple):
+    """How one file (or interval) is processed under the budget."""
+    file: str
+    mode: str           # "memory" | "parallel" | "stream"
+    workers: int
+    block_frames: int   # frames per streamed block (0 = whole file)
+    est_bytes: int      # estimated peak working set
+    decoded_bytes: int  # what a reader thread holds while the file waits (0 when streamed)
+    table_bytes: int    # per-frame results (what a queued per-frame table costs)
+    interval: object = None  # cli.intervals.Interval, or None for the whole file
+    pad_s: float = 0.0       # interval padding (read_interval)
+
+    @property
+    def stem(self) -> str:
+        return self.interval.stem if self.interval is not None else Path(self.file).stem
+
+
+def plan_file(path, budget: int | None, workers=1, **params) -> FilePlan:
+    """Choose memory / parallel / stream for one file so its working set fits `budget`."""
+    return _plan(str(path), estimate_file(audio_info(path), **params), budget, workers)
+
+
+def plan_interval(iv, budget: int | None, pad_s: float, workers=1, **params) -> FilePlan:
+    """plan_file for one interval, from the size of its padded range."""
+    info = audio_info(iv.file)
+    a, b, _ = interval_span(iv, pad_s, info)
+    est = estimate_file(RecordInfo(b - a, info.channels, info.samplerate), **params)
+    return _plan(str(iv.file), est, budget, workers)._replace(interval=iv, pad_s=pad_s)
+
+
+def _plan(path: str, est: FileEstimate, budget: int | None, workers) -> FilePlan:
+    workers = resolve_workers(workers)
+    table = est.frames_total * PER_FRAME_RESULT_BYTES
+    if budget is None:
+        mode = "parallel" if workers > 1 else "memory"
+        return FilePlan(path, mode, workers, 0, est.in_memory, est.decoded, table)
+
+    if est.in_memory <= budget:
+        # intra-file workers: each holds a slice of the signal and frame stack
+        # (together about one more copy) plus its own interpreter
+        extra = est.signal // 2 + est.frames_total * est.per_frame
+        w = min(workers, est.frames_total // MIN_CHUNK_FRAMES,
+                (budget - est.in_memory - extra) // WORKER_OVERHEAD_BYTES) if workers > 1 else 1
+        if w > 1:
+            return FilePlan(path, "parallel", int(w), 0,
+                            est.in_memory + extra + w * WORKER_OVERHEAD_BYTES, est.decoded, table)
+        return FilePlan(path, "memory", 1, 0, est.in_memory, est.decoded, table)
+
+    # stream: largest block that fits (at least MIN_BLOCK_FRAMES)
+    lo, hi = MIN_BLOCK_FRAMES, max(MIN_BLOCK_FRAMES, est.n_frames)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if est.stream(mid) <= budget:
+            lo = mid
+        else:
+            hi = mid - 1
+    return FilePlan(path, "stream", 1, lo, est.stream(lo), 0, table)
+
+
+def plan_files(paths, budget: int | None, workers=1, **params) -> list[FilePlan]:
+    return [plan_file(p, budget, workers=workers, **params) for p in paths]
+
+
+def plan_intervals(intervals, budget: int | None, pad_s: float, workers=1,
+                   **params) -> list[FilePlan]:
+    return [plan_interval(iv, budget, pad_s, workers=workers, **params) for iv in intervals]
+
+
+def pipeline_limits(plans, budget: int | None, readers=2, prefetch=4, write_queue=8,
+                    per_frame=False) -> tuple[int, int, int]:
+    """
+    (readers, prefetch, write_queue) so that the file being analyzed plus the
+    decoded files waiting in the prefetch window (and per-frame tables in the
+    write queue) stay under the budget.
+    """
+    if budget is None or not plans:
+        return readers, prefetch, write_queue
+    peak = max(p.est_bytes for p in plans)
+    waiting = max(p.decoded_bytes for p in plans)
+    room = budget - peak
+    if per_frame:
+        # per-frame tables queued for the writer
+        table = max(p.table_bytes for p in plans)
+        write_queue = int(min(write_queue, max(0, room // 2) // max(1, table)))
+        room -= write_queue * table
+    if waiting:
+        prefetch = int(min(prefetch, max(0, room) // waiting))
+    if prefetch < 1:
+        readers, prefetch = 0, 1  # decode inline, one file at a time
+    return min(readers, prefetch), prefetch, write_queue
+
+
+# ---------- pipeline stages ----------
+def read_planned(plan: FilePlan):
+    """Reader stage: decode memory/parallel files; streamed files are read later, in blocks."""
+    if plan.mode == "stream":
+        return None
+    if plan.interval is not None:
+        return read_interval(plan.interval, plan.pad_s)
+    return read_audio(plan.file)
+
+
+def analyze_planned(plan: FilePlan, payload, **params):
+    """Compute stage for read_planned payloads."""
+    params = {**params, "workers": plan.workers}
+    iv = plan.interval
+    if plan.mode == "stream" and iv is not None:
+        a, b, fs = interval_span(iv, plan.pad_s)
+        res = compute_cpps_streaming(plan.file, block_frames=plan.block_frames, start=a, stop=b,
+                                     name=interval_name(iv), **params)
+        return interval_result(iv, res, a / fs)
+    if plan.mode == "stream":
+        return compute_cpps_streaming(plan.file, block_frames=plan.block_frames, **params)
+    if iv is not None:
+        return analyze_interval(iv, payload, **params)
+    x, fs = payload
+    return compute_cpps_for_signal(x, fs, plan.file, **params)
+
+
+def iter_cpps_budgeted(paths, max_memory: int | None, **params):
+    """iter_cpps with per-file memory planning; yields (summary, per_frame_df_or_None)."""
+    want_pf = bool(params.get("return_per_frame", False))
+    workers = params.pop("workers", 1)
+    for path in paths:
+        plan = plan_file(path, max_memory, workers=workers, **params)
+        res = analyze_planned(plan, read_planned(plan), **params)
+        yield res if want_pf else (res, None)
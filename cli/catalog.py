@@ -0,0 +1,285 @@
+# cli/catalog.py
+# Results catalog (cpps-run --catalog DB): one SQLite file that collects runs,
+# per-file summaries and per-frame values, so cohort questions are SQL
+# queries instead of re-reading every CSV.
+#
+#   runs   one row per cpps-run: parameters (JSON), start/finish time, status
+#          (running / complete / failed), number of inputs
+#   files  one row per summary row (file or interval): run_id, path, content
+#          sha256, size, mtime, diagnosis, then every summary column and every
+#          manifest column, added as columns on first use
+#   frames one row per frame: (file_id, frame_index) primary key, time_s,
+#          cpps_db, f0_hz, plus any other per-frame columns (features,
+#          skipped, _ch<i>); gated frames are stored with NULL values
+#
+# Indexes: files(file), files(diagnosis), files(mtime), files(run_id), the
+# frames primary key, clustered by file (WITHOUT ROWID), and frames(file_id,
+# time_s) for time-range queries within a file. Timestamps are UTC
+# 'YYYY-MM-DD HH:MM:SS' text, so date('now', '-1 month') comparisons work.
+#
+# Each result is written in one transaction (files row + all its frames via
+# executemany), so an interrupted run leaves only complete files behind and
+# its run row is not marked complete. WAL with synchronous=NORMAL keeps
+# per-file commits cheap; frames go in as column lists without going through
+# pandas rows. Manifest metadata comes from --manifest CSV or a MANIFEST.csv
+# next to each input, matched on file name, and never overrides summary values.
+import hashlib
+import json
+import socket
+import sqlite3
+from datetime import datetime, timezone
+from itertools import repeat
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .shard import item_file
+from .wfdb_io import is_wfdb_record, with_record_metadata
+
+CATALOG_VERSION = 1
+MANIFEST_NAME = "MANIFEST.csv"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    status TEXT NOT NULL,
+    host TEXT,
+    inputs INTEGER,
+    params TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    file_id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    path TEXT NOT NULL,
+    file TEXT,
+    sha256 TEXT,
+    size_bytes INTEGER,
+    mtime TEXT,
+    diagnosis TEXT
+);
+CREATE TABLE IF NOT EXISTS frames (
+    file_id INTEGER NOT NULL REFERENCES files(file_id),
+    frame_index INTEGER NOT NULL,
+    time_s REAL,
+    cpps_db REAL,
+    f0_hz REAL,
+    PRIMARY KEY (file_id, frame_index)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS files_run ON files(run_id);
+CREATE INDEX IF NOT EXISTS files_file ON files(file);
+CREATE INDEX IF NOT EXISTS files_diagnosis ON files(diagnosis);
+CREATE INDEX IF NOT EXISTS files_mtime ON files(mtime);
+CREATE INDEX IF NOT EXISTS frames_time ON frames(file_id, time_s);
+"""
+_FILE_KEYS = ("file_id", "run_id")  # set by the catalog, never taken from a summary
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _q(name) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _sql_value(v):
+    if isinstance(v, np.generic):
+        v = v.item()
+    if v is None or isinstance(v, (int, float, str, bytes)):
+        return v
+    return str(v)
+
+
+def _sql_type(v) -> str:
+    v = _sql_value(v)
+    if v is None:
+        return ""  # no affinity: later values are stored as given
+    if isinstance(v, (bool, int)):
+        return "INTEGER"
+    return "REAL" if isinstance(v, float) else "TEXT"
+
+
+def _dtype_sql_type(dtype) -> str:
+    return {"f": "REAL", "i": "INTEGER", "u": "INTEGER", "b": "INTEGER"}.get(dtype.kind, "TEXT")
+
+
+def source_files(path) -> list[Path]:
+    """Files whose bytes make up an input: the audio file, or a WFDB header and its .dat."""
+    p = Path(path)
+    if is_wfdb_record(p):
+        hea = p if p.suffix.lower() == ".hea" else p.with_name(p.name + ".hea")
+        return [f for f in (hea, hea.with_suffix(".dat")) if f.is_file()]
+    return [p] if p.is_file() else []
+
+
+def content_info(path) -> dict:
+    """sha256 over the input's source files, total size and latest mtime (UTC)."""
+    h, size, mtime = hashlib.sha256(), 0, None
+    for f in source_files(path):
+        with open(f, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                h.update(chunk)
+        st = f.stat()
+        size += st.st_size
+        mtime = max(mtime or 0.0, st.st_mtime)
+    if mtime is None:
+        return {"sha256": None, "size_bytes": None, "mtime": None}
+    return {"sha256": h.hexdigest(), "size_bytes": size,
+            "mtime": datetime.fromtimestamp(mtime, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")}
+
+
+def read_manifest(path) -> dict:
+    """{file name: {column: value}} from a manifest CSV with a 'file' column."""
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    if "file" not in df.columns:
+        raise ValueError(f"{path}: manifest needs a 'file' column")
+    rows = df.drop(columns="file").to_dict("records")
+    return {Path(f).name: {k: v for k, v in r.items() if v != ""} for f, r in zip(df["file"], rows)}
+
+
+class Catalog:
+    """Results catalog in one SQLite file (see the module header for the schema)."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        # autocommit connection; transactions are explicit. The pipeline's
+        # writer thread does all writes after construction.
+        self.con = sqlite3.connect(str(self.path), isolation_level=None, check_same_thread=False)
+        self.con.execute("PRAGMA journal_mode=WAL")
+        self.con.execute("PRAGMA synchronous=NORMAL")
+        version = self.con.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, CATALOG_VERSION):
+            raise ValueError(f"{self.path}: unsupported catalog version {version}")
+        self.con.executescript(_SCHEMA)
+        self.con.execute(f"PRAGMA user_version={CATALOG_VERSION}")
+        self._columns = {t: self._table_columns(t) for t in ("files", "frames")}
+
+    def _table_columns(self, table) -> set:
+        return {r[1] for r in self.con.execute(f"PRAGMA table_info({table})")}
+
+    def _add_columns(self, table, types: dict) -> None:
+        for name, typ in types.items():
+            if name not in self._columns[table]:
+                self.con.execute(f"ALTER TABLE {table} ADD COLUMN {_q(name)} {typ}")
+                self._columns[table].add(name)
+
+    def begin_run(self, params: dict, inputs=None) -> int:
+        """New run row (status 'running'); returns its run_id."""
+        cur = self.con.execute(
+            "INSERT INTO runs (started_at, status, host, inputs, params) "
+            "VALUES (?, 'running', ?, ?, ?)",
+            (_now(), socket.gethostname(), inputs, json.dumps(params, sort_keys=True, default=str)))
+        return cur.lastrowid
+
+    def finish_run(self, run_id: int, status="complete") -> None:
+        self.con.execute("UPDATE runs SET finished_at = ?, status = ? WHERE run_id = ?",
+                         (_now(), status, run_id))
+
+    def add(self, run_id: int, path, summary: dict, pf: pd.DataFrame | None = None,
+            meta: dict | None = None, content: dict | None = None) -> int:
+        """Insert one result (files row, then its frames) in one transaction; returns file_id."""
+        row = {"path": str(Path(path).resolve()), **(content or content_info(path)), **(meta or {})}
+        row.update((k, _sql_value(v)) for k, v in summary.items() if k not in _FILE_KEYS)
+        self.con.execute("BEGIN IMMEDIATE")
+        try:
+            self._add_columns("files", {k: _sql_type(v) for k, v in row.items()})
+            cols = list(row)
+            cur = self.con.execute(
+                f"INSERT INTO files (run_id, {', '.join(map(_q, cols))}) "
+                f"VALUES (?{', ?' * len(cols)})", [run_id] + [row[c] for c in cols])
+            file_id = cur.lastrowid
+            if pf is not None and len(pf):
+                self._add_columns("frames", {c: _dtype_sql_type(pf[c].dtype) for c in pf.columns})
+                self.con.executemany(
+                    f"INSERT INTO frames (file_id, {', '.join(map(_q, pf.columns))}) "
+                    f"VALUES (?{', ?' * len(pf.columns)})",
+                    zip(repeat(file_id), *(pf[c].tolist() for c in pf.columns)))
+            self.con.execute("COMMIT")
+        except BaseException:
+            self.con.execute("ROLLBACK")
+            # ALTER TABLEs were rolled back too
+            self._columns = {t: self._table_columns(t) for t in ("files", "frames")}
+            raise
+        return file_id
+
+    def close(self) -> None:
+        self.con.close()
+
+
+class CatalogWriter:
+    """
+    Writer (see cli.pipeline.OutputWriter) that records every result in a
+    Catalog run and passes it on to `inner`. Per-frame tables go to the
+    catalog always and to `inner` only with per_frame_files. Use as a
+    context manager: the run is marked complete on a clean exit and failed
+    otherwise.
+    """
+
+    def __init__(self, db, inner=None, params=None, inputs=None, manifest=None,
+                 per_frame_files=True):
+        self.catalog = db if isinstance(db, Catalog) else Catalog(db)
+        self.inner = inner
+        self.per_frame_files = per_frame_files
+        self.manifest = read_manifest(manifest) if manifest else None
+        self._manifests = {}  # folder -> MANIFEST.csv contents
+        self._content = {}    # source path -> content_info (intervals share a file)
+        self.run_id = self.catalog.begin_run(params or {}, inputs)
+
+    def _meta(self, path: Path) -> dict:
+        if self.manifest is not None:
+            return self.manifest.get(path.name, {})
+        folder = path.parent
+        if folder not in self._manifests:
+            m = folder / MANIFEST_NAME
+            self._manifests[folder] = read_manifest(m) if m.is_file() else {}
+        return self._manifests[folder].get(path.name, {})
+
+    def __call__(self, item, summary: dict, pf: pd.DataFrame | None = None) -> None:
+        if self.inner is not None:
+            self.inner(item, summary, pf if self.per_frame_files else None)
+        path = Path(item_file(item))
+        if path not in self._content:
+            self._content[path] = content_info(path)
+        self.catalog.add(self.run_id, path, with_record_metadata(path, summary), pf,
+                         meta=self._meta(path), content=self._content[path])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.catalog.finish_run(self.run_id, "complete" if exc_type is None else "failed")
+        self.catalog.close()
+        return False
+
+
+def query(db, sql: str, params=()) -> pd.DataFrame:
+    """Result of an SQL query on the catalog as a DataFrame."""
+    con = sqlite3.connect(Path(db).resolve().as_uri() + "?mode=ro", uri=True)
+    try:
+        return pd.read_sql_query(sql, con, params=params)
+    finally:
+        con.close()
+
+
+def read_summary(db, where: str | None = None, run="latest", params=()) -> pd.DataFrame:
+    """
+    Summary rows from the files table, like a cpps_summary.csv.
+
+    run: a run_id, "latest" (newest complete run) or "all". where: extra SQL
+    condition on files columns, e.g. "diagnosis = 'healthy' AND mtime >=
+    date('now', '-1 month')" (values can be bound through params).
+    """
+    conds, args = [], []
+    if run == "latest":
+        conds.append("run_id = (SELECT max(run_id) FROM runs WHERE status = 'complete')")
+    elif run != "all":
+        conds.append("run_id = ?")
+        args.append(int(run))
+    if where:
+        conds.append(f"({where})")
+    sql = ("SELECT * FROM files" + (" WHERE " + " AND ".join(conds) if conds else "")
+           + " ORDER BY file_id")
+    return query(db, sql, tuple(args) + tuple(params))
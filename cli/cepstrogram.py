@@ -0,0 +1,239 @@
+# cli/cepstrogram.py
+# Opt-in archive of band-limited cepstrograms for re-analysis without
+# decoding or FFTs.
+#
+# Layout (one folder per analyzed file, chunks are plain .npy so they can be
+# memory-mapped):
+#   <root>/<stem>/meta.json        fs, engine, frame/hop, fft_len, band_start, params
+#   <root>/<stem>/ceps_00000.npy   float32 (frames_in_chunk, n_bins), cepstrum rows
+#                                  band_start .. band_start + n_bins - 1
+#   <root>/<stem>/index_00000.npy  int64 frame index of each row (gated frames are absent)
+#   <root>/<stem>/source           resolved path of the input the folder belongs to
+#
+# Folders are keyed by file stem. An input whose stem folder already holds
+# another input's archive (a/voice001.wav vs b/voice001.wav, or a .wav next
+# to a WFDB record of the same name) gets <stem>-<8 hex digits of its path
+# hash> instead, with a warning, so archives never overwrite each other;
+# re-running the same input replaces its own archive.
+import hashlib
+import json
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .praat_match import _parabolic_peaks, _praat_band, _robust_lines
+
+FORMAT_VERSION = 1
+SOURCE_FILE = "source"
+DB_PER_NEPER = 8.685889638
+
+# Per-engine re-analysis defaults (what the live engine does)
+ENGINE_DEFAULTS = {
+    "praat": {"trend": "robust", "peak": "parabolic"},
+    "default": {"trend": "ls", "peak": "max"},
+}
+
+
+class CepstrogramStore:
+    """Directory of per-file cepstrograms (see module header for the layout)."""
+
+    def __init__(self, root, chunk_frames: int = 4096):
+        self.root = Path(root)
+        self.chunk_frames = int(chunk_frames)
+
+    def files(self) -> list[str]:
+        """Stems of all archived files, sorted."""
+        if not self.root.is_dir():
+            return []
+        return sorted(p.parent.name for p in self.root.glob("*/meta.json"))
+
+    def open(self, stem: str) -> "Cepstrogram":
+        return Cepstrogram(self.root / stem)
+
+    def key_for(self, stem: str, source) -> str:
+        """Folder name for the input `source`: its stem, unless another input already owns it."""
+        source = str(Path(source).resolve())
+        owner = self.root / stem / SOURCE_FILE
+        if not owner.is_file() or owner.read_text() == source:
+            return stem
+        key = f"{stem}-{hashlib.sha1(source.encode('utf-8')).hexdigest()[:8]}"
+        warnings.warn(f"cepstrogram {stem!r} already holds {owner.read_text()}; "
+                      f"archiving {source} as {key!r}")
+        return key
+
+    def writer(self, stem: str, source=None, **meta) -> "CepstrogramWriter":
+        """Writer for one input; with `source` the folder is chosen by key_for."""
+        if source is None:
+            return CepstrogramWriter(self.root / stem, meta, self.chunk_frames)
+        source = str(Path(source).resolve())
+        return CepstrogramWriter(self.root / self.key_for(stem, source), meta, self.chunk_frames,
+                                 source=source)
+
+
+class CepstrogramWriter:
+    """
+    Sink handed to the engines as `cep_sink`: called with the frame indices
+    and cepstrum band rows of accepted frames; `close()` writes meta.json.
+    """
+
+    def __init__(self, folder: Path, meta: dict, chunk_frames: int = 4096, source=None):
+        self.folder = Path(folder)
+        self.meta = dict(meta)
+        self.chunk_frames = max(1, int(chunk_frames))
+        self._chunks = 0
+        self.folder.mkdir(parents=True, exist_ok=True)
+        for old in list(self.folder.glob("*.npy")) + list(self.folder.glob("meta.json")):
+            old.unlink()
+        if source is not None:
+            # claimed now, not at close(), so a second input with this stem in
+            # the same batch sees it
+            (self.folder / SOURCE_FILE).write_text(str(source))
+            self.meta["source"] = str(source)
+
+    def __call__(self, frame_index, band, band_start: int, fft_len: int) -> None:
+        band = np.asarray(band, dtype=np.float32)
+        frame_index = np.asarray(frame_index, dtype=np.int64)
+        if self.meta.setdefault("band_start", int(band_start)) != int(band_start):
+            raise ValueError("band_start changed within one file")
+        self.meta.setdefault("n_bins", int(band.shape[1]))
+        self.meta.setdefault("fft_len", int(fft_len))
+        for a in range(0, len(frame_index), self.chunk_frames):
+            b = a + self.chunk_frames
+            np.save(self.folder / f"ceps_{self._chunks:05d}.npy", band[a:b])
+            np.save(self.folder / f"index_{self._chunks:05d}.npy", frame_index[a:b])
+            self._chunks += 1
+
+    def close(self, n_frames: int) -> None:
+        self.meta.update(format_version=FORMAT_VERSION, n_frames=int(n_frames), chunks=self._chunks)
+        (self.folder / "meta.json").write_text(json.dumps(self.meta, indent=2))
+
+
+def _band_indices(engine, fs, frame_len, cep_len, f0_min, f0_max):
+    """Search window [i0, i1) on the cepstrum index axis, as the live engine picks it."""
+    if engine == "praat":
+        return _praat_band(fs, frame_len, f0_min, f0_max)[1:3]
+    from .cpps import _q_band
+    return _q_band(cep_len, fs, f0_min, f0_max)
+
+
+def cpp_from_band(rows, band_start, fs, i0, i1, trend="robust", peak="parabolic"):
+    """
+    CPP (dB) and F0 per row of a stored cepstrum band.
+
+    rows      : (frames, n_bins) cepstrum values for indices band_start..
+    i0, i1    : search window on the full cepstrum index axis
+    trend     : "robust" (Huber IRLS line, Praat exp-decay) or "ls" (least squares)
+    peak      : "parabolic" (interpolated peak) or "max" (discrete maximum)
+    """
+    rows = np.asarray(rows, dtype=np.float64)
+    lo, hi = i0 - band_start, i1 - band_start
+    if lo < 0 or hi > rows.shape[1]:
+        raise ValueError(f"quefrency window [{i0}, {i1}) is outside the stored band "
+                         f"[{band_start}, {band_start + rows.shape[1]})")
+    q = np.arange(i0, i1) / float(fs)
+    if not len(rows):
+        return np.zeros(0), np.zeros(0)
+    if peak == "parabolic":
+        k, delta, peak_val = _parabolic_peaks(rows, i0, i1, band_start=band_start)
+    else:
+        k = lo + np.argmax(rows[:, lo:hi], axis=1)
+        delta, peak_val = 0.0, rows[np.arange(len(rows)), k]
+    q_peak = (band_start + k + delta) / float(fs)
+
+    y = rows[:, lo:hi]
+    if trend == "robust":
+        a, b = _robust_lines(q, y, iters=15)
+    elif trend == "ls":
+        from .cpps import _ls_lines
+        b, a = _ls_lines(q, y)
+    else:
+        raise ValueError(f"unknown trend {trend!r}")
+    cpp = (peak_val - (a + b * q_peak)) * DB_PER_NEPER
+    with np.errstate(divide="ignore"):
+        f0 = np.where(q_peak > 0, 1.0 / q_peak, np.nan)
+    return cpp, f0
+
+
+class Cepstrogram:
+    """Read side of one archived file; chunks are memory-mapped, not loaded."""
+
+    def __init__(self, folder):
+        self.folder = Path(folder)
+        self.meta = json.loads((self.folder / "meta.json").read_text())
+
+    @property
+    def name(self) -> str:
+        return self.meta.get("file", self.folder.name)
+
+    def times(self) -> np.ndarray:
+        m = self.meta
+        return (np.arange(m["n_frames"]) * m["hop"] + 0.5 * m["frame_len"]) / m["fs"]
+
+    def chunks(self):
+        """Yield (frame_index, band) per chunk; band is a read-only float32 memmap."""
+        for c in range(self.meta.get("chunks", 0)):
+            yield (np.load(self.folder / f"index_{c:05d}.npy"),
+                   np.load(self.folder / f"ceps_{c:05d}.npy", mmap_mode="r"))
+
+    def reanalyze(self, f0_min=None, f0_max=None, trend=None, peak=None,
+                  med_smooth_frames=None, bias_db=None) -> pd.DataFrame:
+        """
+        Re-run peak picking and trend fitting on the stored band.
+
+        Unset options fall back to what the original run used. The F0 range may
+        only narrow the stored quefrency band, not widen it.
+        """
+        m = self.meta
+        p = m.get("params", {})
+        engine = m["engine"]
+        f0_min = float(f0_min if f0_min is not None else p["f0_min"])
+        f0_max = float(f0_max if f0_max is not None else p["f0_max"])
+        trend = trend or ENGINE_DEFAULTS[engine]["trend"]
+        peak = peak or ENGINE_DEFAULTS[engine]["peak"]
+        if med_smooth_frames is None:
+            med_smooth_frames = p.get("med_smooth_frames", 0) if engine == "default" else 0
+        if bias_db is None:
+            bias_db = p.get("praat_bias_db")
+
+        cpps = np.full(m["n_frames"], np.nan)
+        f0s = np.full(m["n_frames"], np.nan)
+        if m.get("n_bins"):
+            i0, i1 = _band_indices(engine, m["fs"], m["frame_len"], m["fft_len"], f0_min, f0_max)
+            for idx, band in self.chunks():
+                cpps[idx], f0s[idx] = cpp_from_band(band, m["band_start"], m["fs"], i0, i1,
+                                                    trend=trend, peak=peak)
+        if med_smooth_frames and med_smooth_frames > 1:
+            from .cpps import _median_smooth
+            cpps = _median_smooth(cpps, med_smooth_frames)
+        if bias_db is not None:
+            cpps = cpps + float(bias_db)
+        return pd.DataFrame({
+            "frame_index": np.arange(m["n_frames"], dtype=int),
+            "time_s": self.times(),
+            "cpps_db": cpps,
+            "f0_hz": f0s,
+        })
+
+
+def reanalyze_store(root, return_per_frame=False, **options):
+    """
+    Re-analyze every file in a cepstrogram store.
+
+    options are passed to Cepstrogram.reanalyze. Returns (summary DataFrame,
+    {stem: per-frame DataFrame}) like compute_cpps_batch.
+    """
+    from .cpps import _summary_from_frames
+
+    store = CepstrogramStore(root)
+    rows, per_frame = [], {}
+    for stem in store.files():
+        cg = store.open(stem)
+        pf = cg.reanalyze(**options)
+        m = cg.meta
+        rows.append(_summary_from_frames(cg.name, pf["cpps_db"].to_numpy(), pf["f0_hz"].to_numpy(),
+                                         m["hop"] / m["fs"], m["duration_s"]))
+        if return_per_frame:
+            per_frame[stem] = pf
+    return pd.DataFrame(rows), per_frame
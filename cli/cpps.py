@@ -3,24 +3,48 @@ import os
 import numpy as np
 import pandas as pd
 import soundfile as sf
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 from scipy.signal import get_window
 from scipy.fft import rfft, irfft, rfftfreq
-from .praat_match import cpps_praat_match    
+from .framing import frame_starts, frame_rms_db, gather_frames
+from .praat_match import cpps_praat_match, _frame_params as _praat_frame_params
+from .parallel import map_frame_chunks
+from .quefrency import band_method as _band_method, partial_cepstrum
+from .resample import resample_signal
+from .stats import SummaryAccumulator, SummaryRow
+from .wfdb_io import is_wfdb_record, read_wfdb, wfdb_blocks, wfdb_info, with_record_metadata
+
+# Histogram-sketch resolution for summary percentiles
+CPPS_RESOLUTION_DB = 1e-3
+F0_RESOLUTION_HZ = 1e-2
 
 
 # --------- helpers ---------
-def save_timecourse_plot(times_s: np.ndarray, cpps_db: np.ndarray, out_png: str, title: str = "CPPS time course"):
-    """Save a simple CPPS time-course PNG."""
-    fig, ax = plt.subplots(figsize=(8, 2.5))
-    ax.plot(times_s, cpps_db, linewidth=1.2)
+def save_timecourse_plot(times_s: np.ndarray, cpps_db: np.ndarray, out_png: str,
+                         title: str = "CPPS time course", labels=None):
+    """
+    Save a simple CPPS time-course PNG (pyplot-free, so safe from a writer thread).
+    cpps_db may be (frames, k), one line per column, with a legend from `labels`.
+    """
+    fig = Figure(figsize=(8, 2.5))
+    ax = fig.subplots()
+    lines = ax.plot(times_s, cpps_db, linewidth=1.2)
+    if labels is not None:
+        ax.legend(lines, labels, fontsize="small", loc="best")
     ax.set_xlabel("Time (s)")
     ax.set_ylabel("CPPS (dB)")
     ax.set_title(title)
     ax.grid(True, alpha=0.3)
     fig.tight_layout()
     fig.savefig(out_png, dpi=150)
-    plt.close(fig)
+
+
+def save_per_frame_plot(pf: pd.DataFrame, out_png: str, title: str = "CPPS time course"):
+    """Time-course PNG of a per-frame table: cpps_db, or one line per cpps_db_ch<i> column."""
+    cols = [c for c in pf.columns if c == "cpps_db" or c.startswith("cpps_db_")]
+    times = pf["time_s"].to_numpy() if "time_s" in pf.columns else pf.index.to_numpy().astype(float)
+    labels = [c[len("cpps_db_"):] for c in cols] if cols != ["cpps_db"] else None
+    save_timecourse_plot(times, pf[cols].to_numpy(), out_png, title=title, labels=labels)
 
 
 def write_frame_csv(path: str, wav_path: str, times_s: np.ndarray, cpps_db: np.ndarray, f0_hz: np.ndarray | None = None):
@@ -47,14 +71,16 @@ def _preemphasis(x, alpha=0.97):
     return y
 
 
-def _frame_signal(x, fs, frame_ms=40, hop_pct=50):
+def _frame_params(fs, frame_ms=40, hop_pct=50):
     N = int(frame_ms * 1e-3 * fs)
     H = max(1, int(N * (hop_pct / 100)))
+    return N, H
+
+
+def _frame_signal(x, fs, frame_ms=40, hop_pct=50):
+    N, H = _frame_params(fs, frame_ms, hop_pct)
     w = get_window("hamming", N, fftbins=True)
-    frames = []
-    for start in range(0, len(x) - N + 1, H):
-        frames.append(x[start : start + N] * w)
-    return np.array(frames), N, H
+    return gather_frames(x, frame_starts(len(x), N, H), N, w), N, H
 
 
 def _energy_db(x):
@@ -62,21 +88,30 @@ def _energy_db(x):
     return 20 * np.log10(rms + 1e-12)
 
 
-def _cpp_single_frame(frame, fs, f0_min=60, f0_max=500):
-    # Cepstrum of log magnitude spectrum
-    spec = np.abs(rfft(frame)) + 1e-12
-    log_mag = np.log(spec)
-    cep = irfft(log_mag)
+def _log_magnitude(spec):
+    return np.log(np.abs(spec) + 1e-12)
+
+
+def _real_cepstrum(frames):
+    # Cepstrum of log magnitude spectrum; frames may be a (frames, N) stack
+    return irfft(_log_magnitude(rfft(frames, axis=-1)), axis=-1)
+
+
+def _q_band(cep_len, fs, f0_min=60, f0_max=500):
+    """Cepstrum index range [i0, i1) covering the F0 search window (empty -> i0 == i1)."""
     qmin, qmax = _q_range(f0_min, f0_max)
-    # Map quefrency range to samples of cepstrum domain
     # Cepstrum length equals frame length (time samples)
-    t = np.arange(len(cep)) / fs
-    mask = (t >= qmin) & (t <= qmax)
-    if not np.any(mask):
-        return np.nan, np.nan
+    t = np.arange(cep_len) / fs
+    idx = np.flatnonzero((t >= qmin) & (t <= qmax))
+    return (int(idx[0]), int(idx[-1]) + 1) if idx.size else (0, 0)
 
-    c_seg = cep[mask]
-    t_seg = t[mask]
+
+def _cpp_from_cepstrum(cep, fs, i0, i1):
+    """CPP (dB) and F0 from one cepstrum, searching indices [i0, i1)."""
+    if i1 <= i0:
+        return np.nan, np.nan
+    c_seg = cep[i0:i1]
+    t_seg = np.arange(i0, i1) / fs
 
     # Linear regression baseline through the segment
     A = np.vstack([t_seg, np.ones_like(t_seg)]).T
@@ -95,7 +130,199 @@ def _cpp_single_frame(frame, fs, f0_min=60, f0_max=500):
     return cpp, f0
 
 
-def compute_cpps_for_file(
+def _cpp_single_frame(frame, fs, f0_min=60, f0_max=500):
+    cep = _real_cepstrum(frame)
+    return _cpp_from_cepstrum(cep, fs, *_q_band(len(cep), fs, f0_min, f0_max))
+
+
+def _ls_lines(t, Y):
+    """Least-squares line m*t + b through every row of Y -> (m, b) arrays."""
+    t = np.asarray(t, dtype=np.float64)
+    A = np.vstack([t, np.ones_like(t)]).T
+    P = np.linalg.pinv(A)
+    Y = np.atleast_2d(Y)
+    # row-wise sums, so results do not depend on the batch size
+    return (Y * P[0]).sum(axis=1), (Y * P[1]).sum(axis=1)
+
+
+def _default_frames(x, starts, N, fs, i0, i1, keep_band=False, features=None, band_method=None):
+    """
+    CPP (dB), F0, (optionally) the cepstrum band [i0, i1) and the measures of
+    a FeatureSpec (cli.features) for frames x[s:s+N], s in starts.
+
+    band_method "matrix" evaluates only cepstrum bins [i0, i1)
+    (cli.quefrency); None takes them from the full inverse FFT.
+    """
+    w = get_window("hamming", N, fftbins=True)
+    frames = gather_frames(x, starts, N, w)
+    spec = rfft(frames, axis=-1)
+    feats = features.compute(frames, spec, fs, N, w) if features else None
+    logmag = _log_magnitude(spec)
+    del frames, spec  # only the cepstrum is needed from here
+    if band_method is None:
+        c_seg = irfft(logmag, axis=-1)[:, i0:i1]
+    else:
+        c_seg = partial_cepstrum(logmag, 2 * (N // 2), i0, i1)
+    band = c_seg.astype(np.float32) if keep_band else None
+    if i1 <= i0:
+        return np.full(len(starts), np.nan), np.full(len(starts), np.nan), band, feats
+
+    # same as _cpp_from_cepstrum on each row, for all frames at once
+    t_seg = np.arange(i0, i1) / fs
+    m, b = _ls_lines(t_seg, c_seg)
+    peak_idx = np.argmax(c_seg, axis=1)
+    q_peak = t_seg[peak_idx]
+    cpp = (c_seg[np.arange(len(c_seg)), peak_idx] - (m * q_peak + b)) * 8.685889638
+    with np.errstate(divide="ignore"):
+        f0 = np.where(q_peak > 0, 1.0 / q_peak, np.nan)
+    return cpp, f0, band, feats
+
+
+def _median_smooth(cpps, k):
+    """Running NaN-aware median over k frames (k made odd); all-NaN windows stay NaN."""
+    k = int(k)
+    if k % 2 == 0:
+        k += 1
+    pad = k // 2
+    c = np.asarray(cpps, dtype=float)
+    if c.size == 0:
+        return c.copy()
+    # NaN padding shortens the window at the edges, as nanmedian ignores it
+    padded = np.concatenate((np.full(pad, np.nan), c, np.full(pad, np.nan)))
+    windows = np.sort(np.lib.stride_tricks.sliding_window_view(padded, k), axis=1)  # NaNs last
+    # nanmedian by hand (np.nanmedian goes through masked arrays for small
+    # windows): middle of the finite values, mean of the two middles if even
+    cnt = np.isfinite(windows).sum(axis=1)
+    rows = np.arange(len(windows))
+    lo = windows[rows, np.maximum(cnt - 1, 0) // 2]
+    hi = windows[rows, cnt // 2]
+    return np.where(cnt > 0, (lo + hi) / 2, np.nan)
+
+
+def _summary_from_accumulators(name, cpp_acc, f0_acc, hop_s, duration, cpps=None):
+    """Summary row from per-file CPPS/F0 accumulators (see cli.stats); cpps: exact percentiles."""
+    stats = cpp_acc.summary("cpps_db", hop_s=hop_s, values=cpps)
+    voiced_pct = 100.0 * cpp_acc.count / cpp_acc.n_frames if cpp_acc.n_frames else 0.0
+    mean_f0 = f0_acc.mean if f0_acc.count else np.nan
+    summary = {
+        "file": name,
+        "mean_cpps_db": stats.pop("mean_cpps_db"),
+        "median_cpps_db": stats.pop("median_cpps_db"),
+        "%voiced_frames": round(voiced_pct, 2),
+        "mean_f0_hz": round(float(mean_f0), 2) if np.isfinite(mean_f0) else None,
+        "frames": int(cpp_acc.n_frames),
+        "duration_s": round(duration, 3),
+    }
+    summary.update(stats)
+    return SummaryRow(summary, {"cpps_db": cpp_acc, "f0_hz": f0_acc})
+
+
+def _summary_from_frames(path, cpps, f0s, hop_s, duration):
+    cpp_acc = SummaryAccumulator(CPPS_RESOLUTION_DB).update(cpps)
+    f0_acc = SummaryAccumulator(F0_RESOLUTION_HZ).update(f0s)
+    return _summary_from_accumulators(Path(path).name, cpp_acc, f0_acc, hop_s, duration, cpps)
+
+
+def _analysis_signal(x, fs, analysis_rate=None):
+    """Mono float64 signal at the analysis rate -> (x, fs)."""
+    x = np.asarray(x)
+    if x.ndim > 1:
+        x = np.mean(x, axis=1)
+    x = x.astype(np.float64)
+    if analysis_rate and int(analysis_rate) != int(fs):
+        x = resample_signal(x, fs, analysis_rate)
+        fs = int(analysis_rate)
+    return x, fs
+
+
+def _default_gate(x, fs, frame_ms=40, hop_pct=50, preemph_alpha=0.97, energy_gate_db=25):
+    """Pre-emphasis and energy gate -> (x, N, H, starts, keep) for the default engine."""
+    x = _preemphasis(x, preemph_alpha)
+
+    N, H = _frame_params(fs, frame_ms, hop_pct)
+    w = get_window("hamming", N, fftbins=True)
+    starts = frame_starts(len(x), N, H)
+    file_db = _energy_db(x)
+
+    # Gate first from cumulative-sum frame energies; only frames that pass
+    # are windowed and transformed.
+    keep = frame_rms_db(x, starts, N, window=w, eps=1e-12) >= file_db - energy_gate_db
+    return x, N, H, starts, keep
+
+
+def _cepstrogram_writer(cepstrogram_dir, path, fs, N, H, n_samples, praat_match, params):
+    """CepstrogramWriter for one analyzed file (see cli.cepstrogram)."""
+    from .cepstrogram import CepstrogramStore
+
+    return CepstrogramStore(cepstrogram_dir).writer(
+        Path(path).stem,
+        source=path,
+        file=Path(path).name,
+        engine="praat" if praat_match else "default",
+        fs=int(fs),
+        frame_len=int(N),
+        hop=int(H),
+        duration_s=n_samples / fs,
+        params=params,
+    )
+
+
+def _per_frame_df(cpps, f0s, N, H, fs):
+    """Per-frame DataFrame; frame i is centred at (i*H + N/2) / fs."""
+    n = len(cpps)
+    return pd.DataFrame(
+        {
+            "frame_index": np.arange(n, dtype=int),
+            "time_s": (np.arange(n) * H + 0.5 * N) / fs,
+            "cpps_db": cpps,
+            "f0_hz": f0s,
+        }
+    )
+
+
+def read_audio(path):
+    """Decode an audio file or WFDB record -> (x, fs); x is (samples,) or (samples, channels)."""
+    if is_wfdb_record(path):
+        return read_wfdb(path)
+    return sf.read(path)
+
+
+def audio_info(path):
+    """Header facts (frames, channels, samplerate) of an audio file or WFDB record."""
+    return wfdb_info(path) if is_wfdb_record(path) else sf.info(str(path))
+
+
+def audio_blocks(path, blocksize, start=0, stop=None):
+    """
+    Yield float64 (samples, channels) blocks of an audio file or WFDB record
+    (samples [start, stop) only, if given).
+    """
+    if is_wfdb_record(path):
+        yield from wfdb_blocks(path, blocksize, start, stop)
+        return
+    with sf.SoundFile(path) as f:
+        f.seek(start)
+        frames = -1 if stop is None else max(0, stop - start)
+        yield from f.blocks(blocksize=blocksize, frames=frames, dtype="float64", always_2d=True)
+
+
+def compute_cpps_for_file(path, *args, **kwargs):
+    """
+    Compute CPPS summary (and optionally per-frame) for one file.
+
+    Decodes `path` and forwards all analysis options to compute_cpps_for_signal.
+    WFDB records also get their VOICED metadata columns (see cli.wfdb_io).
+    """
+    x, fs = read_audio(path)
+    res = compute_cpps_for_signal(x, fs, path, *args, **kwargs)
+    if isinstance(res, tuple):
+        return with_record_metadata(path, res[0]), res[1]
+    return with_record_metadata(path, res)
+
+
+def compute_cpps_for_signal(
+    x,
+    fs,
     path,
     frame_ms=40,
     hop_pct=50,
@@ -111,18 +338,70 @@ def compute_cpps_for_file(
     praat_bias_db: float | None = None,
     hop_ms: float | None = 20.0,  # used only in Praat-match mode
     preemph_from_hz: float = 50.0,  # used only in Praat-match mode
+    cepstrogram_dir: str | None = None,
+    workers: int = 1,
+    analysis_rate: int | None = None,
+    channels=None,
+    features=None,
+    band_cepstrum: str = "off",
+    adaptive: bool = False,
 ):
     """
-    Compute CPPS summary (and optionally per-frame) for one file.
+    Compute CPPS summary (and optionally per-frame) for already-decoded audio.
+
+    `path` only names the summary row (its basename goes into "file").
 
     Two modes:
       - Default (your original): real-cepstrum baseline via LS line, Hamming, hop_pct, _preemphasis(alpha).
       - Praat-match: power-cepstrum, Hann 40/20, pre-emph from 50 Hz, exp-decay robust trend (via cpps_praat_match).
+
+    cepstrogram_dir: if set, the band-limited cepstrogram of accepted frames is
+    archived there (see cli.cepstrogram) for later re-analysis.
+    workers: processes for one file's frames (intra-file parallelism, see
+    cli.parallel); results are identical to workers=1.
+    analysis_rate: resample to this rate (Hz) before analysis, with a cached
+    polyphase filter per rate pair (see cli.resample); None keeps the native rate.
+    channels: None averages all channels; "all" or a list of 0-based indices
+    analyzes each selected channel separately in one batched pass, with
+    _ch<i> summary and per-frame columns (see cli.batch).
+    features: extra per-frame measures ("hnr,tilt", "all", see cli.features)
+    computed from the same spectra as the cepstrum; they add per-frame
+    columns and mean_/median_ summary columns.
+    band_cepstrum: "matrix" evaluates only the quefrency bins of the F0
+    search window (plus the Praat smoothing margin) instead of the full
+    inverse FFT per frame (see cli.quefrency); "auto" does so where that is
+    cheaper and otherwise keeps the full one, as "off" does.
+    adaptive: coarse-to-fine mode, praat_match only (see cli.adaptive): full
+    analysis only in voiced regions found by a coarse periodicity pass; the
+    frames it leaves out are NaN, flagged in a per-frame "skipped" column and
+    counted in "skipped_frames".
     """
-    x, fs = sf.read(path)
-    if x.ndim > 1:
-        x = np.mean(x, axis=1)
-    x = x.astype(np.float64)
+    if channels is not None or features or adaptive:
+        from .batch import analyze_channels
+
+        return analyze_channels(
+            x, fs, path, frame_ms=frame_ms, hop_pct=hop_pct, preemph_alpha=preemph_alpha,
+            f0_min=f0_min, f0_max=f0_max, energy_gate_db=energy_gate_db,
+            med_smooth_frames=med_smooth_frames, return_per_frame=return_per_frame,
+            praat_match=praat_match, praat_bias_db=praat_bias_db, hop_ms=hop_ms,
+            preemph_from_hz=preemph_from_hz, cepstrogram_dir=cepstrogram_dir,
+            workers=workers, analysis_rate=analysis_rate, channels=channels, features=features,
+            band_cepstrum=band_cepstrum, adaptive=adaptive,
+        )
+    x, fs = _analysis_signal(x, fs, analysis_rate)
+
+    cep_sink = None
+    if cepstrogram_dir:
+        N, H = (_praat_frame_params(fs, float(frame_ms) if frame_ms else 40.0,
+                                    float(hop_ms) if hop_ms else 20.0)
+                if praat_match else _frame_params(fs, frame_ms, hop_pct))
+        cep_sink = _cepstrogram_writer(
+            cepstrogram_dir, path, fs, N, H, len(x), praat_match,
+            dict(frame_ms=frame_ms, hop_pct=hop_pct, hop_ms=hop_ms,
+                 preemph_alpha=preemph_alpha, preemph_from_hz=preemph_from_hz,
+                 f0_min=f0_min, f0_max=f0_max, energy_gate_db=energy_gate_db,
+                 med_smooth_frames=med_smooth_frames, praat_bias_db=praat_bias_db),
+        )
 
     # ---------- Praat-match path ----------
     if praat_match:
@@ -136,13 +415,13 @@ def compute_cpps_for_file(
             hop_ms=float(hop_ms) if hop_ms else 20.0,
             preemph_from_hz=float(preemph_from_hz),
             gate_db=float(energy_gate_db) if energy_gate_db is not None else 20.0,
+            cep_sink=cep_sink,
+            workers=workers,
+            band_cepstrum=band_cepstrum,
         )
-        if isinstance(res, tuple) and len(res) == 4:
-            per_frame, mean_cpp, f0_series, mean_f0 = res
-        else:
-            per_frame, mean_cpp = res  # old signature
-            f0_series = np.full_like(per_frame, np.nan, dtype=float)
-            mean_f0 = np.nan
+        if cep_sink is not None:
+            cep_sink.close(len(res[0]))
+        per_frame, mean_cpp, f0_series, _ = res
 
         # Optional constant bias to align to Praat numerically (CPP only)
         if praat_bias_db is not None and np.isfinite(mean_cpp):
@@ -150,122 +429,66 @@ def compute_cpps_for_file(
             if per_frame.size:
                 per_frame = per_frame + float(praat_bias_db)
 
-        # Per-frame DataFrame with time stamps
+        N, H = _praat_frame_params(fs, float(frame_ms) if frame_ms else 40.0,
+                                   float(hop_ms) if hop_ms else 20.0)
+
+        # Per-frame DataFrame with time stamps (gated frames are NaN rows)
         if return_per_frame:
-            n = int(len(per_frame))
-            hop_s = (float(hop_ms) if hop_ms else 20.0) * 1e-3
-            frame_s = (float(frame_ms) if frame_ms else 40.0) * 1e-3
-            times = np.arange(n) * hop_s + 0.5 * frame_s
-            pf = pd.DataFrame(
-                {
-                    "frame_index": np.arange(n, dtype=int),
-                    "time_s": times,
-                    "cpps_db": per_frame if per_frame.size else np.array([], dtype=float),
-                    "f0_hz": f0_series if f0_series.size else np.array([], dtype=float),
-                }
-            )
+            pf = _per_frame_df(per_frame, f0_series, N, H, fs)
 
         # Summary metrics
-        if per_frame.size:
-            median_cpp = float(np.nanmedian(per_frame))
-            voiced_pct = float(100.0 * np.isfinite(per_frame).mean())
-            n_frames = int(len(per_frame))
-        else:
-            median_cpp = np.nan
-            voiced_pct = 0.0
-            n_frames = 0
-
-        duration = len(x) / fs
-        summary = {
-            "file": Path(path).name,
-            "mean_cpps_db": round(float(mean_cpp), 3) if np.isfinite(mean_cpp) else None,
-            "median_cpps_db": round(float(median_cpp), 3) if np.isfinite(median_cpp) else None,
-            "%voiced_frames": round(voiced_pct, 2),
-            "mean_f0_hz": round(float(mean_f0), 2) if np.isfinite(mean_f0) else None,  # now set
-            "frames": n_frames,
-            "duration_s": round(duration, 3),
-        }
+        summary = _summary_from_frames(path, per_frame, f0_series, H / fs, len(x) / fs)
         return (summary, pf) if return_per_frame else summary
 
 
     # ---------- Original path (unchanged behavior) ----------
-    x = _preemphasis(x, preemph_alpha)
-
-    frames, N, H = _frame_signal(x, fs, frame_ms, hop_pct)
-    file_db = _energy_db(x)
-
-    out = []
-    for fr in frames:
-        if _energy_db(fr) < file_db - energy_gate_db:
-            out.append((np.nan, np.nan))
-            continue
-        cpp, f0 = _cpp_single_frame(fr, fs, f0_min, f0_max)
-        out.append((cpp, f0))
-
-    vals = np.array(out)
-    cpps = vals[:, 0]
-    f0s = vals[:, 1]
+    x, N, H, starts, keep = _default_gate(x, fs, frame_ms, hop_pct, preemph_alpha, energy_gate_db)
+    cpps = np.full(len(starts), np.nan)
+    f0s = np.full(len(starts), np.nan)
+    if keep.any():
+        cep_len = 2 * (N // 2)  # irfft length of an N-point rfft
+        i0, i1 = _q_band(cep_len, fs, f0_min, f0_max)
+        cpps[keep], f0s[keep], band, _ = map_frame_chunks(
+            _default_frames, x, starts[keep], N, workers=workers,
+            fs=fs, i0=i0, i1=i1, keep_band=cep_sink is not None,
+            band_method=_band_method(band_cepstrum, cep_len, i0, i1),
+        )
+        if cep_sink is not None:
+            cep_sink(np.flatnonzero(keep), band, band_start=i0, fft_len=cep_len)
+    if cep_sink is not None:
+        cep_sink.close(len(starts))
 
     # Median smoothing for CPPS across frames (odd window only)
     if med_smooth_frames and med_smooth_frames > 1:
-        k = int(med_smooth_frames)
-        if k % 2 == 0:
-            k += 1
-        pad = k // 2
-        c = np.copy(cpps)
-        c_valid = np.where(np.isfinite(c), c, np.nan)
-        smoothed = []
-        for i in range(len(c)):
-            a = max(0, i - pad)
-            b = min(len(c), i + pad + 1)
-            window = c_valid[a:b]
-            smoothed.append(np.nan if np.all(np.isnan(window)) else np.nanmedian(window))
-        cpps = np.array(smoothed)
-
-    valid = np.isfinite(cpps)
-    mean_cpps = float(np.nanmean(cpps)) if np.any(valid) else np.nan
-    median_cpps = float(np.nanmedian(cpps)) if np.any(valid) else np.nan
-    voiced_pct = float(np.sum(valid) / len(cpps) * 100.0) if len(cpps) else 0.0
-    mean_f0 = float(np.nanmean(f0s)) if np.any(np.isfinite(f0s)) else np.nan
-    duration = len(x) / fs
+        cpps = _median_smooth(cpps, med_smooth_frames)
 
-    summary = {
-        "file": Path(path).name,
-        "mean_cpps_db": round(mean_cpps, 3) if np.isfinite(mean_cpps) else None,
-        "median_cpps_db": round(median_cpps, 3) if np.isfinite(median_cpps) else None,
-        "%voiced_frames": round(voiced_pct, 2),
-        "mean_f0_hz": round(mean_f0, 2) if np.isfinite(mean_f0) else None,
-        "frames": int(len(frames)),
-        "duration_s": round(duration, 3),
-    }
+    summary = _summary_from_frames(path, cpps, f0s, H / fs, len(x) / fs)
 
     if return_per_frame:
-        # center-of-frame time = i*H/fs + N/(2*fs)
-        n = len(frames)
-        hop_s = H / fs
-        frame_s = N / fs
-        times = np.arange(n) * hop_s + 0.5 * frame_s
-        pf = pd.DataFrame(
-            {
-                "frame_index": np.arange(n),
-                "time_s": times,
-                "cpps_db": cpps,
-                "f0_hz": f0s,
-            }
-        )
-        return summary, pf
+        return summary, _per_frame_df(cpps, f0s, N, H, fs)
     return summary
 
 
+def iter_cpps(paths, **params):
+    """
+    Yield (summary, per_frame_df_or_None) for each path as soon as it is analyzed.
+
+    Nothing is retained between files, so peak memory follows the largest
+    single file rather than the corpus. params are those of compute_cpps_for_file.
+    """
+    for p in paths:
+        res = compute_cpps_for_file(p, **params)
+        yield res if params.get("return_per_frame", False) else (res, None)
+
+
 def compute_cpps_batch(paths, **kwargs):
+    """Collect iter_cpps into (summary DataFrame, {path: per-frame DataFrame})."""
+    paths = list(paths)
     summaries = []
     per_frame = {}
-    for p in paths:
-        if kwargs.get("return_per_frame", False):
-            s, pf = compute_cpps_for_file(p, **kwargs)
-            summaries.append(s)
+    for p, (s, pf) in zip(paths, iter_cpps(paths, **kwargs)):
+        summaries.append(s)
+        if pf is not None:
             per_frame[p] = pf
-        else:
-            summaries.append(compute_cpps_for_file(p, **kwargs))
     df = pd.DataFrame(summaries)
     return df, per_frame
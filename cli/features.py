@@ -0,0 +1,174 @@
+# cli/features.py
+# Extra per-frame measures computed from the spectra the CPP kernels already
+# have (--features hnr,tilt,lh,rms).
+#
+# The kernels frame, window and FFT every accepted frame for the cepstrum;
+# with features on they hand that spectrum (and the windowed frames) to
+# FeatureSpec.compute, so no measure decodes, frames or transforms the
+# audio again. Only HNR needs one more FFT of the same frames, zero-padded
+# to 2n so its autocorrelation is not circular.
+#
+# Frames are pre-emphasized for the cepstrum; measures that describe the
+# signal itself (level, tilt, L/H, HNR) undo that on the power spectrum by
+# dividing by the pre-emphasis response |1 - a e^{-jw}|^2.
+#
+# A measure is a function (FrameSpectra) -> (n_frames,) array registered in
+# FEATURES with its column name; per-frame tables get that column and
+# summary rows mean_<column> / median_<column> over non-gated frames.
+from functools import cached_property
+from typing import Callable, NamedTuple
+
+import numpy as np
+from numpy.fft import irfft, rfft
+
+TILT_BAND_HZ = (100.0, 8000.0)   # regression band for the spectral tilt
+LH_SPLIT_HZ = 4000.0             # low/high boundary of the L/H ratio
+MIN_FREQ_HZ = 50.0               # ignore bins below this (de-emphasis gain is largest at DC)
+
+
+class Feature(NamedTuple):
+    column: str
+    fn: Callable
+    description: str
+
+
+class FrameSpectra:
+    """Spectra of one batch of windowed frames, shared by all measures (derived arrays cached)."""
+
+    def __init__(self, frames, spectrum, fs, fft_len, window, preemph=0.0, f0_min=60.0,
+                 f0_max=500.0):
+        self.frames = frames        # (frames, n), windowed, pre-emphasized
+        self.spectrum = spectrum    # rfft(frames, fft_len)
+        self.fs = float(fs)
+        self.fft_len = int(fft_len)
+        self.window = window
+        self.preemph = float(preemph)
+        self.f0_min, self.f0_max = float(f0_min), float(f0_max)
+
+    def _deemphasis(self, n_fft):
+        w = 2.0 * np.pi * np.arange(n_fft // 2 + 1) / n_fft
+        return 1.0 / (1.0 + self.preemph ** 2 - 2.0 * self.preemph * np.cos(w))
+
+    @cached_property
+    def freqs(self):
+        return np.arange(self.fft_len // 2 + 1) * self.fs / self.fft_len
+
+    @cached_property
+    def power(self):
+        """One-sided power spectrum of the frames with pre-emphasis undone."""
+        p = self.spectrum.real ** 2 + self.spectrum.imag ** 2
+        return p * self._deemphasis(self.fft_len)
+
+    @cached_property
+    def autocorr(self):
+        """Normalized autocorrelation per frame over the window's (Boersma 1993), lags 0..n-1."""
+        n = self.frames.shape[1]
+        n_fft = int(2 ** np.ceil(np.log2(2 * n)))
+        xp = rfft(self.frames, n=n_fft, axis=-1)
+        r = irfft((xp.real ** 2 + xp.imag ** 2) * self._deemphasis(n_fft), n=n_fft, axis=-1)[:, :n]
+        wp = rfft(self.window, n=n_fft)
+        rw = irfft(wp.real ** 2 + wp.imag ** 2, n=n_fft)[:n]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (r / r[:, :1]) / (rw / rw[0])
+
+
+def _band_sum(power, mask):
+    # per-row sums that don't depend on how many rows are in the batch
+    return np.einsum("ij,j->i", power, mask.astype(power.dtype))
+
+
+def rms_db(s: FrameSpectra):
+    # Parseval on the one-sided spectrum (DC and Nyquist once, the rest twice)
+    wts = np.full(len(s.freqs), 2.0)
+    wts[0] = 1.0
+    if s.fft_len % 2 == 0:
+        wts[-1] = 1.0
+    energy = np.einsum("ij,j->i", s.power, wts) / s.fft_len
+    return 10.0 * np.log10(energy / np.sum(s.window ** 2) + 1e-20)
+
+
+def spectral_tilt(s: FrameSpectra):
+    # LS slope of the power spectrum (dB) against log2 frequency -> dB/octave
+    hi = min(TILT_BAND_HZ[1], 0.95 * s.fs / 2)
+    mask = (s.freqs >= TILT_BAND_HZ[0]) & (s.freqs <= hi)
+    if mask.sum() < 3:
+        return np.full(len(s.frames), np.nan)
+    xo = np.log2(s.freqs[mask])
+    xo = xo - xo.mean()
+    y = 10.0 * np.log10(s.power[:, mask] + 1e-20)
+    return np.einsum("ij,j->i", y, xo) / np.dot(xo, xo)
+
+
+def lh_ratio(s: FrameSpectra):
+    # energy below LH_SPLIT_HZ over energy above it (dB)
+    if s.fs / 2 <= LH_SPLIT_HZ:
+        return np.full(len(s.frames), np.nan)
+    low = _band_sum(s.power, (s.freqs >= MIN_FREQ_HZ) & (s.freqs < LH_SPLIT_HZ))
+    high = _band_sum(s.power, s.freqs >= LH_SPLIT_HZ)
+    return 10.0 * np.log10((low + 1e-20) / (high + 1e-20))
+
+
+def hnr(s: FrameSpectra):
+    # harmonics-to-noise ratio from the autocorrelation peak in the F0 lag range
+    n = s.frames.shape[1]
+    lo = max(1, int(np.ceil(s.fs / s.f0_max)))
+    hi = min(int(np.floor(s.fs / s.f0_min)), n // 2)
+    if hi <= lo:
+        return np.full(len(s.frames), np.nan)
+    r = np.clip(np.max(s.autocorr[:, lo:hi + 1], axis=1), 1e-10, 1.0 - 1e-10)
+    return 10.0 * np.log10(r / (1.0 - r))
+
+
+FEATURES = {
+    "hnr": Feature("hnr_db", hnr, "harmonics-to-noise ratio (autocorrelation, dB)"),
+    "tilt": Feature("tilt_db_oct", spectral_tilt, "spectral tilt, 100 Hz-8 kHz (dB/octave)"),
+    "lh": Feature("lh_ratio_db", lh_ratio, "low/high energy ratio at 4 kHz (dB)"),
+    "rms": Feature("rms_db", rms_db, "frame RMS level (dB re full scale)"),
+}
+
+
+def parse_features(value) -> tuple[str, ...]:
+    """'hnr,tilt' / 'all' / iterable / None -> tuple of FEATURES keys (ValueError if unknown)."""
+    if value is None:
+        return ()
+    names = value.split(",") if isinstance(value, str) else list(value)
+    names = [str(v).strip().lower() for v in names if str(v).strip()]
+    if names == ["all"]:
+        return tuple(FEATURES)
+    unknown = [v for v in names if v not in FEATURES]
+    if unknown:
+        raise ValueError(f"unknown feature(s) {', '.join(unknown)} "
+                         f"(have: {', '.join(FEATURES)}, all)")
+    return tuple(dict.fromkeys(names))
+
+
+def feature_columns(names) -> list[str]:
+    return [FEATURES[n].column for n in names]
+
+
+class FeatureSpec(NamedTuple):
+    """What a kernel needs to evaluate the selected measures (picklable for worker processes)."""
+    names: tuple
+    preemph: float = 0.0
+    f0_min: float = 60.0
+    f0_max: float = 500.0
+
+    def compute(self, frames, spectrum, fs, fft_len, window):
+        """(n_frames, len(names)) array of the selected measures."""
+        s = FrameSpectra(frames, spectrum, fs, fft_len, window, self.preemph, self.f0_min,
+                         self.f0_max)
+        out = np.empty((len(frames), len(self.names)))
+        for j, name in enumerate(self.names):
+            out[:, j] = FEATURES[name].fn(s)
+        return out
+
+
+def feature_summary(names, values) -> dict:
+    """mean_/median_<column> over the finite rows of a (frames, k) array."""
+    out = {}
+    for j, col in enumerate(feature_columns(names)):
+        v = values[:, j]
+        v = v[np.isfinite(v)]
+        out[f"mean_{col}"] = round(float(v.mean()), 3) if v.size else None
+        out[f"median_{col}"] = round(float(np.median(v)), 3) if v.size else None
+    return out
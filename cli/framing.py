@@ -0,0 +1,120 @@
+# cli/framing.py
+# Shared frame bookkeeping for both engines: frame start indices, O(n) frame
+# energies from cumulative sums, and gathering (windowing) of selected frames.
+#
+# Windowed frame energies are exact, not a stationary approximation: the
+# squared Hann / Hamming (any cosine-sum) window is itself a short cosine
+# series, sum_k a_k cos(2 pi k m / P), so the energy of every windowed frame
+# is a combination of cumulative sums of x**2, x**2 cos(2 pi k j / P) and
+# x**2 sin(2 pi k j / P). Other windows, and frame grids too fine to sum in
+# blocks (odd frame lengths with a half-frame hop), measure each frame.
+import numpy as np
+
+_MAX_TERMS = 5      # cosine terms of window**2 (Blackman needs all five)
+_MIN_BLOCK = 16     # samples per block below which frames are measured directly
+_CHUNK = 4096       # frames measured per gather in the direct path
+_series_cache = {}  # window bytes -> (period, coefficients) or None
+
+
+def frame_starts(n_samples: int, n: int, h: int) -> np.ndarray:
+    """Start sample of every complete frame of length n at hop h."""
+    if n_samples < n:
+        return np.zeros(0, dtype=np.int64)
+    return np.arange(0, n_samples - n + 1, h, dtype=np.int64)
+
+
+def _window_power_series(window):
+    """(P, a) with window**2 == sum_k a[k] cos(2 pi k m / P), m = 0..n-1, or None."""
+    w = np.asarray(window, dtype=np.float64)
+    key = w.tobytes()
+    if key not in _series_cache:
+        w2, n, found = np.square(w), len(w), None
+        for period in (n, n - 1):  # periodic (fftbins) or symmetric window
+            if period <= 2 * _MAX_TERMS:
+                continue
+            basis = np.cos(2 * np.pi * np.outer(np.arange(n), np.arange(_MAX_TERMS)) / period)
+            coef = np.linalg.lstsq(basis, w2, rcond=None)[0]
+            if np.max(np.abs(basis @ coef - w2)) <= 1e-12 * max(1.0, w2.max()):
+                found = (period, coef)
+                break
+        _series_cache[key] = found
+    return _series_cache[key]
+
+
+def _cumsum(v):
+    cs = np.empty(len(v) + 1)
+    cs[0] = 0.0
+    np.cumsum(v, out=cs[1:])
+    return cs
+
+
+def _diff(cs, starts, n):
+    return cs[starts + n] - cs[starts]
+
+
+def _windowed_energy(x2, starts, n, window):
+    """sum((x[s:s+n] * window)**2) for s in starts, from x2 = x**2."""
+    series = _window_power_series(window)
+    # Frame edges lie on a grid of g samples (g = gcd of n and the start
+    # spacing), so per-block sums of x**2, x**2 cos and x**2 sin come from one
+    # matrix product over x**2 cut into blocks; cumulative sums then run over
+    # blocks instead of samples.
+    g = int(np.gcd.reduce(np.diff(starts), initial=n))
+    if series is None or g < _MIN_BLOCK:
+        w2 = np.square(window)
+        view = np.lib.stride_tricks.sliding_window_view(x2, n)
+        return np.concatenate([view[starts[i:i + _CHUNK]] @ w2
+                               for i in range(0, len(starts), _CHUNK)])
+    period, coef = series
+    terms = [(k, a) for k, a in enumerate(coef) if abs(a) >= 1e-15]
+    o = int(starts[0]) % g
+    nb = (len(x2) - o) // g
+    phase = 2 * np.pi * np.outer(np.arange(g), [k for k, _ in terms]) / period
+    local = x2[o:o + nb * g].reshape(nb, g) @ np.hstack([np.cos(phase), np.sin(phase)])
+    first, m = (starts - o) // g, n // g  # frame edges in blocks
+    block = o + g * np.arange(nb, dtype=np.int64)  # first sample of each block
+    energy = np.zeros(len(starts))
+    for t, (k, a) in enumerate(terms):
+        lc, ls = local[:, t], local[:, len(terms) + t]
+        if k == 0:
+            energy += a * _diff(_cumsum(lc), first, m)
+            continue
+        # sum over a block of x2 cos(w j), w = 2 pi k / P, j = block start + i;
+        # then cos(w (j - s)) = cos(w j) cos(w s) + sin(w j) sin(w s)
+        at = 2 * np.pi * ((k * block) % period) / period
+        c = _cumsum(np.cos(at) * lc - np.sin(at) * ls)
+        s = _cumsum(np.sin(at) * lc + np.cos(at) * ls)
+        at = 2 * np.pi * ((k * starts) % period) / period
+        energy += a * (np.cos(at) * _diff(c, first, m) + np.sin(at) * _diff(s, first, m))
+    return energy
+
+
+def frame_rms_db(x, starts, n, window=None, eps=1e-18):
+    """
+    Per-frame RMS level (dB) of frames x[s:s+n] * window, s in starts, in O(len(x)).
+
+    Frame energies come from differences of cumulative sums, so no frame is
+    materialized; with a window they equal the energy of the windowed frame
+    (see the module header), which is what the gate thresholds refer to.
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    if starts.size == 0:
+        return np.zeros(0, dtype=float)
+    x2 = np.square(x, dtype=np.float64)
+    if window is None:
+        energy = _diff(_cumsum(x2), starts, n)
+    else:
+        energy = _windowed_energy(x2, starts, n, window)
+    ms = np.maximum(energy / float(n), 0.0)  # cumsum round-off can go slightly negative
+    return 20.0 * np.log10(np.sqrt(ms + eps) + eps)
+
+
+def gather_frames(x, starts, n, window=None) -> np.ndarray:
+    """Stack frames x[s:s+n] for s in starts (optionally windowed) -> (len(starts), n)."""
+    starts = np.asarray(starts, dtype=np.int64)
+    if starts.size == 0:
+        return np.zeros((0, n), dtype=np.float64)
+    frames = np.lib.stride_tricks.sliding_window_view(x, n)[starts]  # fancy indexing copies
+    if window is not None:
+        frames *= window
+    return frames
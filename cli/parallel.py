@@ -0,0 +1,88 @@
+# cli/parallel.py
+# Intra-file parallelism: split the accepted frames of one recording into
+# contiguous chunks and evaluate them on a shared process pool.
+#
+# Kernels are module-level functions kernel(x_seg, rel_starts, n, **kw) that
+# return a tuple of per-frame arrays (None entries allowed). Each chunk ships
+# only its own samples (x[first_start : last_start + n]), so neighbouring
+# chunks overlap by at most one frame. Results are concatenated in frame
+# order; anything that looks across frames (gate reference, median
+# smoothing) is done by the caller on the whole file, so output is identical
+# to the serial path.
+#
+# The pool uses the forkserver start method (spawn where that is missing):
+# cpps-run's reader/writer threads are running by the time the first file is
+# analyzed, and forking a process with live threads can copy a held lock.
+# The fork server (single-threaded) preloads the kernel modules, so workers
+# still start without re-importing numpy/scipy.
+import atexit
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+MIN_CHUNK_FRAMES = 64
+
+_pool: ProcessPoolExecutor | None = None
+_pool_workers = 0
+_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+_PRELOAD = [f"{__package__}.cpps", f"{__package__}.praat_match"]
+
+
+def _mp_context():
+    ctx = multiprocessing.get_context(_START_METHOD)
+    if _START_METHOD == "forkserver":
+        ctx.set_forkserver_preload(_PRELOAD)
+    return ctx
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """Process pool reused across files (re-created only if the size changes)."""
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        shutdown_pool()
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=_mp_context())
+        _pool_workers = workers
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool, _pool_workers
+    if _pool is not None:
+        _pool.shutdown(wait=True)
+    _pool, _pool_workers = None, 0
+
+
+atexit.register(shutdown_pool)
+
+
+def resolve_workers(workers) -> int:
+    """None/0/1 -> serial; negative -> all cores."""
+    if not workers:
+        return 1
+    workers = int(workers)
+    return max(1, os.cpu_count() or 1) if workers < 0 else workers
+
+
+def map_frame_chunks(kernel, x, starts, n, workers=1, min_chunk=MIN_CHUNK_FRAMES, **kw):
+    """
+    Evaluate kernel over the frames at `starts` (sorted), possibly in parallel.
+
+    Falls back to one in-process call when workers <= 1 or there are too few
+    frames to be worth shipping to other processes.
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    workers = resolve_workers(workers)
+    n_chunks = min(workers, len(starts) // max(1, min_chunk))
+    if n_chunks <= 1:
+        return kernel(x, starts, n, **kw)
+
+    pool = _get_pool(workers)
+    futures = []
+    for c in np.array_split(starts, n_chunks):
+        seg = np.ascontiguousarray(x[c[0]: c[-1] + n])
+        futures.append(pool.submit(kernel, seg, c - c[0], n, **kw))
+    parts = [f.result() for f in futures]
+    return tuple(None if any(p is None for p in col) else np.concatenate(col)
+                 for col in zip(*parts))
@@ -0,0 +1,274 @@
+# cli/pipeline.py
+# Pipelined batch executor: a reader thread pool prefetches and decodes the
+# next files, the calling thread runs the analysis, and a writer thread saves
+# summary rows, per-frame CSVs and plots. Queues are bounded so memory stays
+# at roughly (prefetch + write_queue) files.
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .cpps import compute_cpps_for_signal, read_audio, save_per_frame_plot
+from .wfdb_io import with_record_metadata
+
+
+class PipelineStats:
+    """Stage timings, stalls and queue-depth samples for sizing --readers/--prefetch."""
+
+    def __init__(self):
+        self.files = 0
+        self.read_s = 0.0          # decode time summed over reader threads
+        self.compute_s = 0.0
+        self.write_s = 0.0
+        self.compute_stall_s = 0.0  # compute waiting for a decoded file (readers too slow)
+        self.writer_stall_s = 0.0   # compute blocked on a full write queue (writer too slow)
+        self.wall_s = 0.0
+        self.read_depth: list[int] = []   # decoded-but-unconsumed files, sampled per file
+        self.write_depth: list[int] = []  # pending writes, sampled per file
+        self._lock = threading.Lock()
+
+    def add_read(self, seconds: float) -> None:
+        with self._lock:
+            self.read_s += seconds
+
+    def as_dict(self) -> dict:
+        def mean(v):
+            return round(float(np.mean(v)), 2) if v else 0.0
+        return {
+            "files": self.files,
+            "wall_s": round(self.wall_s, 3),
+            "read_s": round(self.read_s, 3),
+            "compute_s": round(self.compute_s, 3),
+            "write_s": round(self.write_s, 3),
+            "compute_stall_s": round(self.compute_stall_s, 3),
+            "writer_stall_s": round(self.writer_stall_s, 3),
+            "read_queue_mean": mean(self.read_depth),
+            "read_queue_max": max(self.read_depth, default=0),
+            "write_queue_mean": mean(self.write_depth),
+            "write_queue_max": max(self.write_depth, default=0),
+        }
+
+    def format(self) -> str:
+        d = self.as_dict()
+        return (f"pipeline: {d['files']} files in {d['wall_s']:.2f} s | "
+                f"read {d['read_s']:.2f} s, compute {d['compute_s']:.2f} s, "
+                f"write {d['write_s']:.2f} s | "
+                f"stalls: compute {d['compute_stall_s']:.2f} s, "
+                f"writer {d['writer_stall_s']:.2f} s | "
+                f"queues: read {d['read_queue_mean']}/{d['read_queue_max']}, "
+                f"write {d['write_queue_mean']}/{d['write_queue_max']} (mean/max)")
+
+
+class OutputWriter:
+    """
+    Writes results as they arrive: appends the summary row to `out_csv` and,
+    when per-frame output is on, saves <stem>_cpps_framewise.csv and the
+    time-course PNG. Rows of WFDB records gain their metadata columns
+    (record, diagnosis, ...; see cli.wfdb_io).
+
+    Columns are the union over all rows in order of first appearance: a
+    row with new columns (a stereo file after mono ones with channels="all",
+    a WFDB record after WAVs) rewrites out_csv under the wider header, and
+    missing values are left empty. With append=True an existing out_csv is
+    continued, and widened the same way.
+    """
+
+    def __init__(self, out_csv, plots_dir="frame_plots", frames_dir=".", append=False):
+        self.out_csv = Path(out_csv)
+        self.plots_dir = Path(plots_dir)
+        self.frames_dir = Path(frames_dir)
+        self._rows = 0
+        self._columns = None
+        if append and self.out_csv.exists() and self.out_csv.stat().st_size:
+            self._columns = list(pd.read_csv(self.out_csv, nrows=0).columns)
+            self._rows = len(pd.read_csv(self.out_csv, usecols=[0]))
+
+    def __call__(self, item, summary: dict, pf: pd.DataFrame | None = None) -> None:
+        summary = with_record_metadata(getattr(item, "file", item), summary)
+        row = pd.DataFrame([summary])
+        if self._columns is None:
+            self._columns = list(row.columns)
+        else:
+            extra = [c for c in row.columns if c not in self._columns]
+            if extra:
+                self._widen(extra)
+            row = row.reindex(columns=self._columns)
+        row.to_csv(self.out_csv, mode="a" if self._rows else "w", header=not self._rows,
+                   index=False)
+        self._rows += 1
+        if pf is None:
+            return
+        # work items may carry their own output stem (e.g. intervals)
+        stem = getattr(item, "stem", None) or Path(item).stem
+        pf.to_csv(self.frames_dir / f"{stem}_cpps_framewise.csv", index=False)
+        self.plots_dir.mkdir(parents=True, exist_ok=True)
+        save_per_frame_plot(pf, str(self.plots_dir / f"{stem}_cpps.png"), title=f"CPPS: {stem}")
+
+    def _widen(self, extra: list) -> None:
+        """Add columns to the header; rows already written get them empty."""
+        self._columns += extra
+        if not self._rows:
+            return
+        # read as text so written values are kept exactly; replace, so a
+        # reader never sees a half-written summary
+        old = pd.read_csv(self.out_csv, dtype=str, keep_default_na=False)
+        tmp = self.out_csv.with_name(self.out_csv.name + ".tmp")
+        old.reindex(columns=self._columns, fill_value="").to_csv(tmp, index=False)
+        os.replace(tmp, self.out_csv)
+
+
+def _timed_read(reader, item, stats: PipelineStats):
+    t0 = time.perf_counter()
+    out = reader(item)
+    stats.add_read(time.perf_counter() - t0)
+    return out
+
+
+def analyze_audio(item, payload, **params):
+    """Default compute stage: payload is (x, fs) from read_audio."""
+    x, fs = payload
+    return compute_cpps_for_signal(x, fs, item, **params)
+
+
+def iter_pipelined(items, readers: int = 2, prefetch: int = 4, reader=read_audio,
+                   analyze=analyze_audio, stats: PipelineStats | None = None, **params):
+    """
+    Yield (item, summary, per_frame_df_or_None) in input order as each item
+    finishes, while up to `prefetch` upcoming items are decoded on `readers`
+    threads. `items` may be any (lazy) iterable; nothing is kept after it is
+    yielded, so memory is bounded by the prefetch window, not the corpus.
+
+    readers : decode threads (0 = decode inline on the consuming thread)
+    reader  : item -> payload (default read_audio: path -> (x, fs))
+    analyze : (item, payload, **params) -> summary or (summary, per_frame)
+    params  : forwarded to `analyze` (compute_cpps_for_signal by default)
+    """
+    stats = stats if stats is not None else PipelineStats()
+    want_pf = bool(params.get("return_per_frame", False))
+    pool = (ThreadPoolExecutor(max_workers=readers, thread_name_prefix="cpps-reader")
+            if readers > 0 else None)
+    pending: deque = deque()
+    it = iter(items)
+
+    def _fill():
+        while len(pending) < max(1, prefetch):
+            try:
+                p = next(it)
+            except StopIteration:
+                return
+            pending.append((p, pool.submit(_timed_read, reader, p, stats)))
+
+    try:
+        while True:
+            # ---- next decoded input ----
+            if pool is not None:
+                _fill()
+                if not pending:
+                    return
+                stats.read_depth.append(sum(f.done() for _, f in pending))
+                p, fut = pending.popleft()
+                t0 = time.perf_counter()
+                payload = fut.result()
+                stats.compute_stall_s += time.perf_counter() - t0
+                _fill()
+            else:
+                try:
+                    p = next(it)
+                except StopIteration:
+                    return
+                payload = _timed_read(reader, p, stats)
+
+            # ---- compute ----
+            t0 = time.perf_counter()
+            res = analyze(p, payload, **params)
+            stats.compute_s += time.perf_counter() - t0
+            del payload
+            summary, pf = res if want_pf else (res, None)
+            stats.files += 1
+            yield p, summary, pf
+    finally:
+        if pool is not None:
+            for _, f in pending:
+                f.cancel()
+            pool.shutdown(wait=True)
+
+
+def run_pipelined(paths, writer=None, readers: int = 2, prefetch: int = 4, write_queue: int = 8,
+                  reader=read_audio, analyze=analyze_audio, collect: bool = True, **params):
+    """
+    Analyze `paths` with overlapped decode / compute / write.
+
+    Consumes iter_pipelined (same readers/prefetch/reader/analyze/params) and
+    hands each result to `writer` on a writer thread.
+
+    write_queue : max results waiting for `writer` (0 = write inline)
+    writer      : callable(item, summary, per_frame_df_or_None), e.g. OutputWriter
+    collect     : keep summary rows for the returned DataFrame (False -> None)
+
+    Returns (summary DataFrame in input order or None, PipelineStats).
+    """
+    stats = PipelineStats()
+    t_start = time.perf_counter()
+
+    # ---- writer stage ----
+    wq: queue.Queue | None = None
+    w_thread = None
+    w_error: list[BaseException] = []
+
+    def _write(item):
+        t0 = time.perf_counter()
+        writer(*item)
+        stats.write_s += time.perf_counter() - t0
+
+    def _writer_loop():
+        while True:
+            item = wq.get()
+            if item is None:
+                return
+            if not w_error:
+                try:
+                    _write(item)
+                except BaseException as e:  # surface on the calling thread
+                    w_error.append(e)
+
+    if writer is not None and write_queue > 0:
+        wq = queue.Queue(maxsize=write_queue)
+        w_thread = threading.Thread(target=_writer_loop, name="cpps-writer", daemon=True)
+        w_thread.start()
+
+    summaries = []
+    results = iter_pipelined(paths, readers=readers, prefetch=prefetch, reader=reader,
+                             analyze=analyze, stats=stats, **params)
+    try:
+        for p, summary, pf in results:
+            if collect:
+                summaries.append(summary)
+
+            # ---- hand off to writer ----
+            if writer is None:
+                continue
+            if wq is None:
+                _write((p, summary, pf))
+                continue
+            if w_error:
+                raise w_error[0]
+            stats.write_depth.append(wq.qsize())
+            t0 = time.perf_counter()
+            wq.put((p, summary, pf))
+            stats.writer_stall_s += time.perf_counter() - t0
+    finally:
+        results.close()
+        if w_thread is not None:
+            wq.put(None)
+            w_thread.join()
+        stats.wall_s = time.perf_counter() - t_start
+
+    if w_error:
+        raise w_error[0]
+    return (pd.DataFrame(summaries) if collect else None), stats
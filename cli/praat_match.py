@@ -1,6 +1,11 @@
 # cli/praat_match.py
 import numpy as np
 from numpy.fft import rfft, irfft
+from .adaptive import adaptive_mask
+from .framing import frame_starts, frame_rms_db, gather_frames
+from .parallel import map_frame_chunks
+from .quefrency import band_method as _band_method, partial_cepstrum
+
 
 def _preemphasis_from_hz(x, fs, f0=50.0):
     # y[n] = x[n] - a*x[n-1], a = exp(-2π f0 / fs) ≈ Praat's "pre-emphasis from"
@@ -10,46 +15,218 @@ def _preemphasis_from_hz(x, fs, f0=50.0):
     y[1:] = x[1:] - a * x[:-1]
     return y
 
-def _frame_signal(x, fs, frame_ms=40.0, hop_ms=20.0, window="hann"):
+
+def _frame_params(fs, frame_ms=40.0, hop_ms=20.0):
     n = int(round(fs * frame_ms / 1000.0))
     h = int(round(fs * hop_ms / 1000.0))
     if n <= 0 or h <= 0:
         raise ValueError("bad frame/hop")
+    return n, h
+
+
+def _frame_signal(x, fs, frame_ms=40.0, hop_ms=20.0, window="hann"):
+    n, h = _frame_params(fs, frame_ms, hop_ms)
     w = np.hanning(n) if window == "hann" else np.ones(n)
-    frames = []
-    for start in range(0, max(0, len(x) - n + 1), h):
-        frames.append(x[start:start+n] * w)
-    return np.stack(frames, axis=0), n, h
+    return gather_frames(x, frame_starts(len(x), n, h), n, w), n, h
+
+
+def _log_power(X, eps=1e-12):
+    return np.log(np.maximum((np.abs(X) ** 2), eps))
+
 
 def _power_cepstrum(frame, fft_len=None, eps=1e-12):
-    # Power spectrum -> log -> real cepstrum (natural units)
+    # Power spectrum -> log -> real cepstrum (natural units); frame may be a (frames, n) stack
     if fft_len is None:
-        fft_len = int(2 ** np.ceil(np.log2(len(frame))))
+        fft_len = int(2 ** np.ceil(np.log2(np.shape(frame)[-1])))
     X = rfft(frame, n=fft_len)
-    logP = np.log(np.maximum((np.abs(X) ** 2), eps))
+    logP = _log_power(X, eps)
     c = irfft(logP, n=fft_len)
     return c
 
+
 def _huber_weights(r, k=1.345):
-    a = np.abs(r)
-    w = np.ones_like(a)
-    mask = a > k
-    w[mask] = (k / a[mask])
-    return w
+    # 1 inside [-k, k], k/|r| outside
+    return k / np.maximum(np.abs(r), k)
+
+
+def _row_medians(a):
+    # np.median(a, axis=1), but one single-kth partition per row (the
+    # two-kth partition np.median uses for even lengths is much slower)
+    m = a.shape[1]
+    p = np.partition(a, m // 2, axis=1)
+    hi = p[:, m // 2]
+    return hi if m % 2 else (p[:, :m // 2].max(axis=1) + hi) / 2
+
+
+def _robust_lines(q, Y, iters=15, block=256):
+    """
+    Huber IRLS line a + b*q through every row of Y at once; returns (a, b) arrays.
+
+    Same iteration as a per-row lstsq on (w*X, w*y), i.e. weights w**2, solved
+    in closed form for the two coefficients. Rows are processed in blocks that
+    stay in cache; all sums are per row (einsum, not BLAS), so a row's result
+    does not depend on how many other rows are in the call.
+    """
+    Y = np.atleast_2d(Y)
+    q = np.asarray(q, dtype=np.float64)
+    q2 = q * q
+    a = np.zeros(len(Y))
+    b = np.zeros(len(Y))
+    for r0 in range(0, len(Y), block):
+        Yb = Y[r0:r0 + block]
+        u = np.ones(Yb.shape)
+        uy, r = np.empty(Yb.shape), np.empty(Yb.shape)
+        for _ in range(iters):
+            np.multiply(u, Yb, out=uy)
+            s0 = np.einsum("ij->i", u)
+            s1 = np.einsum("ij,j->i", u, q)
+            s2 = np.einsum("ij,j->i", u, q2)
+            t0 = np.einsum("ij->i", uy)
+            t1 = np.einsum("ij,j->i", uy, q)
+            bb = (s0 * t1 - s1 * t0) / (s0 * s2 - s1 * s1)
+            aa = (t0 - bb * s1) / s0
+            # residuals, then |r| / (1.4826 * MAD) in place
+            np.multiply(bb[:, None], q, out=r)
+            r += aa[:, None]
+            np.subtract(Yb, r, out=r)
+            np.abs(r, out=r)
+            s = _row_medians(r) + 1e-12
+            r /= (1.4826 * s)[:, None]
+            u = _huber_weights(r) ** 2
+        a[r0:r0 + block], b[r0:r0 + block] = aa, bb
+    return a, b
+
 
 def _robust_line_exp_decay(q, y, iters=15):
     # Fit trend ~ a + b*q with Huber IRLS in natural units; return a,b
-    X = np.c_[np.ones_like(q), q]
-    a, b = 0.0, 0.0
-    w = np.ones_like(q)
-    for _ in range(iters):
-        W = (w[:, None] * X)
-        beta, *_ = np.linalg.lstsq(W, w * y, rcond=None)
-        a, b = beta
-        r = (y - (a + b * q))
-        s = np.median(np.abs(r)) + 1e-12
-        w = _huber_weights(r / (1.4826 * s))
-    return a, b
+    a, b = _robust_lines(q, y, iters=iters)
+    return float(a[0]), float(b[0])
+
+
+def _smooth_quefrency(ceps, qwin):
+    # Same as np.convolve(c, ones(qwin)/qwin, "same") on each row: the window
+    # covers qwin//2 bins before and (qwin-1)//2 bins after each index.
+    L = ceps.shape[-1]
+    cs = np.zeros(ceps.shape[:-1] + (L + qwin,))
+    np.cumsum(ceps, axis=-1, out=cs[..., 1:L + 1])
+    cs[..., L + 1:] = cs[..., L:L + 1]
+    idx = np.arange(L)
+    hi = np.minimum(idx + (qwin - 1) // 2 + 1, L)
+    lo = np.maximum(idx - qwin // 2, 0)
+    return (cs[..., hi] - cs[..., lo]) / qwin
+
+
+def _parabolic_peaks(rows, i0, i1, band_start=0):
+    """
+    Discrete maximum of rows[:, i0-band_start : i1-band_start] refined by a
+    parabola through its neighbours -> (k, delta, peak value) per row, with k
+    on the row axis. Peak values are linearly interpolated at k + delta,
+    clamped to the row like np.interp.
+    """
+    lo = i0 - band_start
+    m = rows.shape[1]
+    k = lo + np.argmax(rows[:, lo:i1 - band_start], axis=1)
+    j = np.arange(len(rows))
+    inner = (k >= 1) & (k < m - 1)
+    kc = np.clip(k, 1, m - 2)
+    y0, y1, y2 = rows[j, kc - 1], rows[j, kc], rows[j, kc + 1]
+    delta = np.where(inner, 0.5 * (y0 - y2) / ((y0 - 2 * y1 + y2) + 1e-12), 0.0)
+    pos = np.clip(k + delta, 0, m - 1)
+    base = np.minimum(np.floor(pos).astype(np.int64), m - 2)
+    frac = pos - base
+    val = rows[j, base] + frac * (rows[j, base + 1] - rows[j, base])
+    return k, delta, np.where(delta == 0.0, rows[j, k], val)
+
+
+def _praat_band(fs, n, f0min, f0max):
+    """FFT length, search window [i0, i1) and quefrency smoothing width for frame length n."""
+    frame_len_s = n / float(fs)
+    qmin = 1.0 / f0max
+    qmax = min(1.0 / f0min, 0.99 * frame_len_s)
+
+    # quefrency axis for the cepstrum
+    fft_len = int(2 ** np.ceil(np.log2(n)))
+
+    # indices in the search window
+    i0 = int(np.floor(qmin * fs))
+    i1 = int(np.floor(qmax * fs))
+    i1 = max(i1, i0 + 2)
+
+    # smooth ~1.5 ms in quefrency
+    qwin = max(2, int(round(0.0015 * fs)))
+    return fft_len, i0, i1, qwin
+
+
+def _smoothing_band(fft_len, i0, i1, qwin):
+    """Raw cepstrum bins [c0, c1) that the smoothed search band max(0, i0-1) .. i1 depends on."""
+    b0, b1 = max(0, i0 - 1), min(fft_len, i1 + 1)
+    return max(0, b0 - qwin // 2), min(fft_len, b1 + (qwin - 1) // 2)
+
+
+def _praat_frames(x, starts, n, fs, fft_len, i0, i1, qwin, keep_band=False, features=None,
+                  band_method=None):
+    """
+    CPP (dB) and F0 for the frames x[s:s+n], s in starts (all already past the gate).
+
+    Returns (cpp, f0, band, feats); band holds the smoothed cepstrum rows
+    max(0, i0-1) .. i1 (float32) when keep_band, else None; feats the
+    measures of a FeatureSpec (cli.features), else None.
+
+    band_method "matrix" evaluates and smooths only the cepstrum bins
+    of that band plus the smoothing margin (cli.quefrency); None smooths the
+    full inverse FFT.
+    """
+    w = np.hanning(n)
+    q_axis = np.arange(fft_len) / float(fs)
+    q = q_axis[i0:i1]
+
+    # band kept for cep_sink: search window plus a guard bin for the parabola
+    b0, b1 = max(0, i0 - 1), min(fft_len, i1 + 1)
+
+    # all frames at once: cepstra, 1.5 ms smoothing, peaks and robust trends
+    frames = gather_frames(x, starts, n, w)
+    X = rfft(frames, n=fft_len)
+    feats = features.compute(frames, X, fs, fft_len, w) if features else None
+    logP = _log_power(X)
+    del frames, X  # only the cepstrum is needed from here; keeps the peak per block down
+    if band_method is None:
+        off = 0  # c_sm column 0 is quefrency bin off
+        c_sm = _smooth_quefrency(irfft(logP, n=fft_len), qwin)
+    else:
+        c0, c1 = _smoothing_band(fft_len, i0, i1, qwin)
+        raw = partial_cepstrum(logP, fft_len, c0, c1)
+        off, c_sm = b0, _smooth_quefrency(raw, qwin)[:, b0 - c0:b1 - c0]
+    bands = c_sm[:, b0 - off:b1 - off].astype(np.float32) if keep_band else None
+
+    k, delta, peak_val = _parabolic_peaks(c_sm, i0, i1, band_start=off)
+    q_peak = (off + k + delta) / fs  # seconds
+    a, b = _robust_lines(q, c_sm[:, i0 - off:i1 - off], iters=15)  # natural units
+    cpp = (peak_val - (a + b * q_peak)) * 8.685889638  # ln → dB
+
+    # F0 from quefrency
+    with np.errstate(divide="ignore"):
+        f0 = np.where(q_peak > 0, 1.0 / q_peak, np.nan)
+    return cpp, f0, bands, feats
+
+
+def _praat_gate(x, fs, frame_ms=40.0, hop_ms=20.0, preemph_from_hz=50.0, gate_db=20.0):
+    """Pre-emphasis and energy gate -> (x, n, h, starts, keep) for cpps_praat_match."""
+    # pre-emphasis
+    x = _preemphasis_from_hz(x.astype(np.float64), fs, preemph_from_hz)
+
+    # whole-file RMS for gating
+    file_rms = np.sqrt(np.mean(x**2) + 1e-18)
+    file_rms_db = 20.0 * np.log10(file_rms + 1e-18)
+
+    n, h = _frame_params(fs, frame_ms, hop_ms)
+    w = np.hanning(n)
+    starts = frame_starts(len(x), n, h)
+
+    # Gate on cumulative-sum frame energies first; only accepted frames are
+    # windowed and transformed, gated ones stay NaN rows.
+    keep = frame_rms_db(x, starts, n, window=w) >= file_rms_db - gate_db
+    return x, n, h, starts, keep
+
 
 def cpps_praat_match(
     x,
@@ -60,88 +237,58 @@ def cpps_praat_match(
     hop_ms=20.0,
     preemph_from_hz=50.0,
     gate_db=20.0,
+    cep_sink=None,
+    workers=1,
+    band_cepstrum="off",
+    adaptive=False,
 ):
     """
     Praat-aligned CPPS with exponential-decay trend (robust/slow).
 
     Returns:
-        per_frame_cpp_db : (N,) float array
+        per_frame_cpp_db : (N,) float array, NaN for energy-gated frames
         mean_cpp_db      : float
-        per_frame_f0_hz  : (N,) float array
+        per_frame_f0_hz  : (N,) float array, NaN for energy-gated frames
         mean_f0_hz       : float
-    """
-    # pre-emphasis
-    x = _preemphasis_from_hz(x.astype(np.float64), fs, preemph_from_hz)
 
-    # whole-file RMS for gating
-    file_rms = np.sqrt(np.mean(x**2) + 1e-18)
-    file_rms_db = 20.0 * np.log10(file_rms + 1e-18)
+    N counts every frame of the file, so frame i is centred at
+    (i*hop + frame/2) / fs whether or not it passed the gate.
 
-    frames, n, h = _frame_signal(x, fs, frame_ms, hop_ms, window="hann")
-    frame_len_s = n / float(fs)
-    qmin = 1.0 / f0max
-    qmax = min(1.0 / f0min, 0.99 * frame_len_s)
+    cep_sink, if given, is called once with (frame_indices, band, band_start,
+    fft_len): the smoothed cepstrum rows band_start.. of the accepted frames
+    (search window plus one guard bin each side), e.g. a CepstrogramWriter.
 
-    # quefrency axis for the cepstrum
-    fft_len = int(2 ** np.ceil(np.log2(n)))
-    q_axis = np.arange(fft_len) / float(fs)
+    workers > 1 splits the accepted frames across a process pool (see
+    cli.parallel); the gate reference is still the whole file, and results
+    are identical to the serial path.
 
-    # indices in the search window
-    i0 = int(np.floor(qmin * fs))
-    i1 = int(np.floor(qmax * fs))
-    i1 = max(i1, i0 + 2)
+    band_cepstrum "matrix" evaluates only the cepstrum bins the search needs
+    (cli.quefrency); "auto" does so where that is cheaper; "off" uses the
+    full inverse FFT.
+
+    adaptive=True analyzes only frames in the voiced regions of a coarse
+    periodicity pass (cli.adaptive); the others are NaN like gated frames
+    (compute_cpps_for_signal also reports which ones were skipped).
+    """
+    x, n, h, starts, keep = _praat_gate(x, fs, frame_ms, hop_ms, preemph_from_hz, gate_db)
+    if adaptive:
+        keep = keep & adaptive_mask(x, starts, keep, n, fs, f0min, f0max,
+                                    np.exp(-2.0 * np.pi * preemph_from_hz / fs))
+    per_cpp = np.full(len(starts), np.nan)
+    per_f0 = np.full(len(starts), np.nan)
+    if not keep.any():
+        return per_cpp, np.nan, per_f0, np.nan
 
-    per_cpp = []
-    per_f0 = []
-
-    for fr in frames:
-        fr_rms = np.sqrt(np.mean(fr**2) + 1e-18)
-        fr_rms_db = 20.0 * np.log10(fr_rms + 1e-18)
-        if fr_rms_db < file_rms_db - gate_db:
-            # Gate out low-energy frames (leave them out of sequences)
-            continue
-
-        c = _power_cepstrum(fr, fft_len=fft_len)
-
-        # smooth ~1.5 ms in quefrency
-        qwin = max(2, int(round(0.0015 * fs)))
-        if qwin > 1:
-            ker = np.ones(qwin) / qwin
-            c_sm = np.convolve(c, ker, mode="same")
-        else:
-            c_sm = c
-
-        q = q_axis[i0:i1]
-        y = c_sm[i0:i1]  # natural units
-
-        # peak location (parabolic interp around discrete max)
-        k = i0 + np.argmax(y)
-        if 1 <= k < len(c_sm) - 1:
-            y0, y1, y2 = c_sm[k - 1], c_sm[k], c_sm[k + 1]
-            denom = (y0 - 2 * y1 + y2) + 1e-12
-            delta = 0.5 * (y0 - y2) / denom
-        else:
-            delta = 0.0
-        q_peak = (k + delta) / fs  # seconds
-
-        # robust straight-line fit ("Exponential decay" trend) over [qmin,qmax]
-        a, b = _robust_line_exp_decay(q, y, iters=15)
-        trend_at_peak = a + b * q_peak
-
-        peak_val = np.interp(q_peak, q_axis, c_sm)
-        cpp_db = (peak_val - trend_at_peak) * 8.685889638  # ln → dB
-        per_cpp.append(cpp_db)
-
-        # NEW: F0 from quefrency
-        f0 = 1.0 / q_peak if q_peak > 0 else np.nan
-        per_f0.append(f0)
-
-    if not per_cpp:
-        # No voiced/accepted frames
-        return np.array([]), np.nan, np.array([]), np.nan
-
-    per_cpp = np.asarray(per_cpp, dtype=float)
-    per_f0 = np.asarray(per_f0, dtype=float)
+    fft_len, i0, i1, qwin = _praat_band(fs, n, f0min, f0max)
+    cpp, f0, bands, _ = map_frame_chunks(
+        _praat_frames, x, starts[keep], n, workers=workers,
+        fs=fs, fft_len=fft_len, i0=i0, i1=i1, qwin=qwin, keep_band=cep_sink is not None,
+        band_method=_band_method(band_cepstrum, fft_len, *_smoothing_band(fft_len, i0, i1, qwin)),
+    )
+    per_cpp[keep] = cpp
+    per_f0[keep] = f0
+    if cep_sink is not None:
+        cep_sink(np.flatnonzero(keep), bands, band_start=max(0, i0 - 1), fft_len=fft_len)
 
     mean_cpp = float(np.nanmean(per_cpp)) if np.isfinite(per_cpp).any() else np.nan
     mean_f0 = float(np.nanmean(per_f0)) if np.isfinite(per_f0).any() else np.nan
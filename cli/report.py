@@ -5,8 +5,11 @@
 #       --title "CPP Studio — VOICED Healthy (N=30)" ^
 #       --subtitle "Converted from VOICED (WFDB → WAV); 16 kHz mono" ^
 #       --paper a4 --margins "0.6" --logo "C:\path\to\logo.png" --logo_width 1.2
+#   or from a results catalog (cpps-run --catalog):
+#   cpps-report --catalog results.sqlite --where "diagnosis = 'healthy'" --out healthy.pdf
 
 import argparse
+import re
 from pathlib import Path
 import numpy as np
 import pandas as pd
@@ -74,6 +77,31 @@ def _format_numeric_cols(df: pd.DataFrame) -> pd.DataFrame:
             df[c] = pd.to_numeric(df[c], errors="coerce")
     return df
 
+
+def _channel_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Summaries of --channels runs (<stat>_ch<i> columns) -> one row per file and
+    channel, labelled "<file> [ch<i>]", so the report treats channels like files.
+    Rows with plain mean_cpps_db (mono rows) are kept as they are.
+    """
+    chans = sorted({int(m.group(1)) for c in df.columns
+                    if (m := re.fullmatch(r"mean_cpps_db_ch(\d+)", str(c)))})
+    if not chans:
+        return df
+    cols = ["mean_cpps_db", "%voiced_frames", "mean_f0_hz"]
+    parts = []
+    if "mean_cpps_db" in df.columns:
+        parts.append(df.loc[df["mean_cpps_db"].notna(), ["file"] + cols + ["duration_s"]])
+    for c in chans:
+        rows = df[df[f"mean_cpps_db_ch{c}"].notna()]
+        part = pd.DataFrame({"file": rows["file"].astype(str) + f" [ch{c}]"})
+        for col in cols:
+            part[col] = rows[f"{col}_ch{c}"] if f"{col}_ch{c}" in rows else np.nan
+        part["duration_s"] = rows["duration_s"]
+        parts.append(part)
+    return pd.concat(parts).sort_index(kind="stable").reset_index(drop=True)
+
+
 def _stats_from_df(df: pd.DataFrame) -> tuple[dict, pd.Series, pd.Series, pd.Series]:
     m = pd.to_numeric(df.get("mean_cpps_db"), errors="coerce")
     v = pd.to_numeric(df.get("%voiced_frames"), errors="coerce")
@@ -149,8 +177,11 @@ def _draw_header(ax, title: str, subtitle: str,
 
 def _draw_stats_text(ax, stats: dict):
     ax.axis("off")
+    files = f"Files: {stats['N files']}"
+    if "N channels" in stats:
+        files += f" ({stats['N channels']} channel rows)"
     lines = [
-        f"Files: {stats['N files']}",
+        files,
         (f"CPPS mean/median: {stats['CPPS mean']:.2f} / {stats['CPPS median']:.2f} dB"
          if not np.isnan(stats['CPPS mean']) else "CPPS mean/median: n/a"),
         (f"CPPS min/max: {stats['CPPS min']:.2f} / {stats['CPPS max']:.2f} dB"
@@ -215,7 +246,7 @@ def _table(ax, df: pd.DataFrame, max_rows=12):
 # --------- Main report function --------------------------------------------------
 
 def make_report(
-    summary_csv: Path,
+    summary_csv: Path | pd.DataFrame,
     out_pdf: Path,
     title: str = HEADER_DEFAULT,
     subtitle: str = "",
@@ -230,10 +261,14 @@ def make_report(
     else:
         figsize = (8.27, 11.69)  # A4 portrait
 
-    # Load data
-    df = pd.read_csv(summary_csv)
-    df = _format_numeric_cols(df)
+    # Load data (a path, or summary rows already read, e.g. from a catalog)
+    df = summary_csv if isinstance(summary_csv, pd.DataFrame) else pd.read_csv(summary_csv)
+    rows = _channel_rows(df)
+    n_files, per_channel = len(df), rows is not df
+    df = _format_numeric_cols(rows)
     stats, m, v, f0 = _stats_from_df(df)
+    if per_channel:
+        stats["N files"], stats["N channels"] = n_files, len(df)
 
     # Figure + margins
     fig = plt.figure(figsize=figsize)
@@ -278,7 +313,7 @@ def make_report(
 # --------- Public API (console entry hooks) -------------------------------------
 
 def generate_report(
-    summary_csv: str,
+    summary_csv: str | pd.DataFrame,
     out_pdf: str,
     paper: str = "a4",
     margins_in: float | str | None = None,
@@ -291,7 +326,7 @@ def generate_report(
     Thin wrapper to match a friendly signature for console entry points.
     """
     make_report(
-        summary_csv=Path(summary_csv),
+        summary_csv=summary_csv if isinstance(summary_csv, pd.DataFrame) else Path(summary_csv),
         out_pdf=Path(out_pdf),
         title=title,
         subtitle=subtitle,
@@ -303,7 +338,17 @@ def generate_report(
 
 def build_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(description="CPP Studio — generate one-page PDF report from summary CSV")
-    p.add_argument("--summary", required=True, help="Path to cpps_summary.csv")
+    src = p.add_mutually_exclusive_group(required=True)
+    src.add_argument("--summary", help="Path to cpps_summary.csv")
+    src.add_argument("--catalog", metavar="DB",
+                     help="Results catalog written by cpps-run --catalog")
+    p.add_argument("--where", help="With --catalog: SQL condition on the files table, "
+                                   "e.g. \"diagnosis = 'healthy' AND "
+                                   "mtime >= date('now', '-1 month')\"")
+    p.add_argument("--run", default="latest",
+                   help="With --catalog: run_id, 'latest' (newest complete run) or 'all'")
+    p.add_argument("--query", help="With --catalog: full SQL query returning summary columns "
+                                   "(overrides --where/--run)")
     p.add_argument("--out", default="cpps_batch_report.pdf", help="Output PDF path")
     p.add_argument("--title", default=HEADER_DEFAULT, help="Report title")
     p.add_argument("--subtitle", default="", help="Optional subtitle (e.g., dataset slice)")
@@ -315,13 +360,26 @@ def build_parser() -> argparse.ArgumentParser:
     return p
 
 def main() -> None:
-    args = build_parser().parse_args()
+    parser = build_parser()
+    args = parser.parse_args()
+    summary = str(Path(args.summary)) if args.summary else None
+    if args.catalog:
+        from .catalog import query, read_summary
+
+        if not Path(args.catalog).is_file():
+            parser.error(f"catalog not found: {args.catalog}")
+        summary = (query(args.catalog, args.query) if args.query
+                   else read_summary(args.catalog, where=args.where, run=args.run))
+        if summary.empty:
+            parser.error("the catalog query returned no rows")
+    elif args.where or args.query:
+        parser.error("--where/--query need --catalog")
     # Ensure output dir exists
     out_pdf = Path(args.out)
     out_pdf.parent.mkdir(parents=True, exist_ok=True)
     # Call through the wrapper for consistency
     generate_report(
-        summary_csv=str(Path(args.summary)),
+        summary_csv=summary,
         out_pdf=str(out_pdf),
         paper=args.paper,
         margins_in=args.margins,
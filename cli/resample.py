@@ -0,0 +1,108 @@
+# cli/resample.py
+# Resampling to a canonical analysis rate (e.g. --analysis-rate 16000).
+#
+# Polyphase filters are designed once per (source rate, target rate) pair and
+# cached, so a mixed-rate corpus pays the FIR design cost once per pair. The
+# filter is the one scipy.signal.resample_poly designs by default (Kaiser,
+# beta 5, 10 zero crossings per side), so results match resample_poly.
+import math
+from functools import lru_cache
+
+import numpy as np
+from scipy.signal import firwin, resample_poly
+
+
+@lru_cache(maxsize=32)
+def polyphase_plan(src_rate: int, dst_rate: int) -> tuple[int, int, np.ndarray]:
+    """(up, down, FIR taps) for src_rate -> dst_rate; taps are shared, do not modify."""
+    g = math.gcd(int(src_rate), int(dst_rate))
+    up, down = int(dst_rate) // g, int(src_rate) // g
+    max_rate = max(up, down)
+    half_len = 10 * max_rate
+    taps = firwin(2 * half_len + 1, 1.0 / max_rate, window=("kaiser", 5.0))
+    taps.setflags(write=False)
+    return up, down, taps
+
+
+def resample_signal(x, src_rate: int, dst_rate: int) -> np.ndarray:
+    """Resample a whole signal along axis 0 (no-op copy-free if rates match)."""
+    src_rate, dst_rate = int(src_rate), int(dst_rate)
+    if src_rate == dst_rate:
+        return np.asarray(x)
+    up, down, taps = polyphase_plan(src_rate, dst_rate)
+    return resample_poly(np.asarray(x, dtype=np.float64), up, down, axis=0, window=taps)
+
+
+class StreamingResampler:
+    """
+    Block-wise resampler whose concatenated output equals resample_signal on
+    the whole signal (up to float round-off).
+
+    Each emitted block starts on an input sample that is a multiple of
+    `down`, so output samples fall on the same grid, and carries enough
+    filter context on both sides that its interior outputs are exact. Call
+    process() with consecutive input blocks of any size, then
+    process(final=True) once to flush the tail. Blocks may be 1-D or
+    (samples, channels); channels are resampled independently.
+    """
+
+    def __init__(self, src_rate: int, dst_rate: int):
+        self.src_rate, self.dst_rate = int(src_rate), int(dst_rate)
+        self.up, self.down, self.taps = polyphase_plan(self.src_rate, self.dst_rate)
+        half_len = (len(self.taps) - 1) // 2
+        # input samples of filter context, rounded up to a multiple of `down`
+        ctx = int(math.ceil(half_len / self.up)) + 1
+        self.ctx = int(math.ceil(ctx / self.down)) * self.down
+        self._buf = None      # pending input (1-D or samples x channels), set by the first block
+        self._buf_start = 0   # absolute input index of _buf[0]
+        self._next = 0        # absolute input index of the next output block (multiple of down)
+        self._done = False
+
+    def process(self, block=None, final: bool = False) -> np.ndarray:
+        if self._done:
+            raise RuntimeError("StreamingResampler already flushed")
+        if self.src_rate == self.dst_rate:
+            self._done = final
+            return np.asarray(block if block is not None else np.zeros(0), dtype=np.float64)
+        if block is not None and len(block):
+            block = np.asarray(block, dtype=np.float64)
+            self._buf = block if self._buf is None else np.concatenate((self._buf, block))
+        if self._buf is None:
+            self._done = final
+            return np.zeros(0)
+        buf_end = self._buf_start + len(self._buf)
+
+        if final:
+            end = buf_end
+        else:
+            end = ((buf_end - self.ctx) // self.down) * self.down
+            if end <= self._next:
+                return self._buf[:0]
+        seg_start = max(0, self._next - self.ctx)
+        seg_stop = buf_end if final else end + self.ctx
+        seg = self._buf[seg_start - self._buf_start: seg_stop - self._buf_start]
+        y = resample_poly(seg, self.up, self.down, axis=0, window=self.taps)
+
+        off = (self._next - seg_start) * self.up // self.down
+        first = self._next * self.up // self.down
+        last = -(-end * self.up // self.down)  # ceil
+        out = y[off: off + (last - first)]
+
+        self._next = end
+        keep_from = max(0, self._next - self.ctx)
+        self._buf = self._buf[keep_from - self._buf_start:]
+        self._buf_start = keep_from
+        self._done = final
+        return out
+
+
+def resample_stream(blocks, src_rate: int, dst_rate: int):
+    """Generator form of StreamingResampler over an iterable of input blocks."""
+    rs = StreamingResampler(src_rate, dst_rate)
+    for b in blocks:
+        y = rs.process(b)
+        if y.size:
+            yield y
+    y = rs.process(final=True)
+    if y.size:
+        yield y
@@ -1,13 +1,26 @@
 # cli/run_cpps.py
 import argparse
+import json
 import os
+from contextlib import nullcontext
+from functools import partial
 from pathlib import Path
-from cli.cpps import compute_cpps_batch, save_timecourse_plot
+from cli.batch import parse_channels
+from cli.budget import (analyze_planned, parse_memory, pipeline_limits, plan_files,
+                        plan_intervals, read_planned)
+from cli.catalog import CatalogWriter
+from cli.features import FEATURES, parse_features
+from cli.intervals import (analyze_interval, interval_pad_s, read_interval, read_intervals_csv,
+                           textgrid_intervals)
+from cli.pipeline import OutputWriter, run_pipelined
+from cli.quefrency import BAND_MODES
+from cli.shard import (CohortWriter, default_meta_path, parse_shard, select_shard,
+                       write_run_meta)
+from cli.wfdb_io import find_records
 
-def build_parser() -> argparse.ArgumentParser:
-    p = argparse.ArgumentParser(description="CPP Studio — batch CPPS/CPP analyzer")
-    p.add_argument("inputs", nargs="+", help="WAV files or a folder containing WAVs")
 
+def add_analysis_args(p: argparse.ArgumentParser) -> None:
+    """Engine options shared by cpps-run and cpps-watch."""
     # Core analysis knobs (original path)
     p.add_argument("--frame_ms", type=int, default=40)
     p.add_argument("--hop_pct", type=int, default=50)
@@ -15,37 +28,42 @@ def build_parser() -> argparse.ArgumentParser:
     p.add_argument("--f0_min", type=int, default=60)
     p.add_argument("--f0_max", type=int, default=500)
     p.add_argument("--energy_gate_db", type=int, default=25)
+    p.add_argument("--analysis-rate", type=int, default=None, metavar="HZ",
+                   help="Resample every file to HZ before analysis (e.g. 16000); "
+                        "default: native rate.")
     p.add_argument("--med_smooth_frames", type=int, default=3)
-
-    # Outputs
-    p.add_argument("--per_frame", action="store_true", help="Save per-frame CSVs and PNG plots")
-    p.add_argument("--out", default="cpps_summary.csv")
-    p.add_argument("--plots-dir", default="frame_plots", help="Directory for per-file time-course PNGs")
+    p.add_argument("--channels", default=None, metavar="all|i,j",
+                   help="Analyze channels separately (0-based, e.g. 0,1 or all) in one batched "
+                        "pass, with _ch<i> summary and per-frame columns; default: average to "
+                        "mono.")
+    p.add_argument("--features", default=None, metavar="NAME,...",
+                   help="Extra per-frame measures from the same spectral pass, added as "
+                        "per-frame and mean_/median_ summary columns: "
+                        f"{', '.join(FEATURES)} or all.")
+    p.add_argument("--band-cepstrum", choices=BAND_MODES, default="off",
+                   help="Evaluate only the quefrency bins of the F0 search window with a partial "
+                        "inverse-DFT matrix; auto = only where that is cheaper than the full "
+                        "inverse FFT; off = full inverse FFT.")
+    p.add_argument("--adaptive", action="store_true",
+                   help="With --praat-match: full analysis only in voiced regions found by a "
+                        "coarse periodicity pass; skipped frames are flagged (see docs/adaptive.md "
+                        "for the accuracy trade-off).")
 
     # Praat-match options (pass-through to compute_cpps_for_file)
     p.add_argument("--praat-match", action="store_true",
-                   help="Use Praat-aligned CPPS (power-cepstrum, exp-decay robust trend, Hann 40/20, pre-emph 50 Hz)")
+                   help="Use Praat-aligned CPPS (power-cepstrum, exp-decay robust trend, "
+                        "Hann 40/20, pre-emph 50 Hz)")
     p.add_argument("--praat-bias-db", type=float, default=None,
                    help="Constant (dB) to add to align Python to Praat (e.g. 6.83).")
     p.add_argument("--hop-ms", type=float, default=20.0,
                    help="Hop size in milliseconds (Praat-match mode). Default: 20 ms.")
-    return p
 
-def main() -> None:
-    parser = build_parser()
-    args = parser.parse_args()
 
-    # expand inputs -> file list
-    files = []
-    for inp in args.inputs:
-        p = Path(inp)
-        if p.is_dir():
-            files += [str(f) for f in sorted(p.glob("*.wav"))]
-        else:
-            files.append(str(p))
-
-    # forward flags to compute_cpps_batch
-    kwargs = dict(
+def engine_kwargs(args) -> dict:
+    """Engine keywords from add_analysis_args options (ValueError on bad --channels/--features)."""
+    if args.adaptive and not args.praat_match:
+        raise ValueError("--adaptive needs --praat-match")
+    return dict(
         frame_ms=args.frame_ms,
         hop_pct=args.hop_pct,
         preemph_alpha=args.preemph_alpha,
@@ -58,23 +76,166 @@ def main() -> None:
         praat_bias_db=args.praat_bias_db,
         hop_ms=args.hop_ms,
         preemph_from_hz=50.0,
+        cepstrogram_dir=getattr(args, "save_cepstrogram", None),
+        workers=getattr(args, "intra_workers", 1),
+        analysis_rate=args.analysis_rate,
+        channels=parse_channels(args.channels),
+        features=parse_features(args.features),
+        band_cepstrum=args.band_cepstrum,
+        adaptive=args.adaptive,
     )
 
-    df, per_frame = compute_cpps_batch(files, **kwargs)
-    df.to_csv(args.out, index=False)
-
-    if args.per_frame:
-        os.makedirs(args.plots_dir, exist_ok=True)
-        for path, pf in per_frame.items():
-            stem = Path(path).stem
-            # per-frame CSV next to audio stem
-            pf.to_csv(f"{stem}_cpps_framewise.csv", index=False)
-            # time-course PNG
-            times = pf["time_s"].to_numpy() if "time_s" in pf.columns else pf.index.to_numpy().astype(float)
-            save_path = Path(args.plots_dir) / f"{stem}_cpps.png"
-            save_timecourse_plot(times, pf["cpps_db"].to_numpy(), str(save_path), title=f"CPPS: {stem}")
-
-    print(f"Wrote {args.out} with {len(df)} files.")
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="CPP Studio — batch CPPS/CPP analyzer")
+    p.add_argument("inputs", nargs="*",
+                   help="WAV files, WFDB records (.hea or record name) or folders "
+                        "containing either")
+
+    add_analysis_args(p)
+
+    # Outputs
+    p.add_argument("--per_frame", action="store_true", help="Save per-frame CSVs and PNG plots")
+    p.add_argument("--out", default="cpps_summary.csv")
+    p.add_argument("--plots-dir", default="frame_plots", help="Directory for per-file time-course PNGs")
+    p.add_argument("--save-cepstrogram", default=None, metavar="DIR",
+                   help="Archive each file's band-limited cepstrogram (float32) in DIR for "
+                        "re-analysis.")
+    p.add_argument("--catalog", default=None, metavar="DB",
+                   help="Also record the run, summary rows and per-frame values in this SQLite "
+                        "catalog (created if missing; query it with cpps-report --catalog).")
+    p.add_argument("--manifest", default=None, metavar="CSV",
+                   help="Metadata CSV with a 'file' column for --catalog rows "
+                        "(default: MANIFEST.csv next to each input).")
+
+    # Interval mode: analyze annotated segments only (one summary row per interval)
+    p.add_argument("--intervals", default=None, metavar="CSV",
+                   help="CSV with file,start_s,end_s[,label]; only these ranges are decoded and "
+                        "analyzed.")
+    p.add_argument("--textgrid-tier", default=None, metavar="TIER",
+                   help="Analyze the labelled intervals of TIER in each input's <stem>.TextGrid.")
+
+    # Pipelined I/O (decode / compute / write overlap)
+    p.add_argument("--readers", type=int, default=2,
+                   help="Threads that prefetch and decode upcoming files (0 = decode inline).")
+    p.add_argument("--prefetch", type=int, default=4,
+                   help="Max decoded files waiting for analysis.")
+    p.add_argument("--write-queue", type=int, default=8,
+                   help="Max results waiting for the writer thread (0 = write inline).")
+    p.add_argument("--intra-workers", type=int, default=1,
+                   help="Processes that share one file's frames (long recordings; -1 = all cores).")
+    p.add_argument("--max-memory", default=os.environ.get("CPPS_MAX_MEMORY"), metavar="SIZE",
+                   help="Memory budget for audio and analysis buffers (e.g. 512M, 2G; default: "
+                        "$CPPS_MAX_MEMORY or unlimited). Files (or intervals) that do not fit are "
+                        "streamed in blocks; prefetch, write queue and --intra-workers are reduced "
+                        "to fit.")
+    # Distributed runs: each node analyzes one shard, cpps-merge combines them
+    p.add_argument("--shard", default=None, metavar="i/N",
+                   help="Analyze only shard i of N (0-based; stable hash of file names) and write "
+                        "run metadata for cpps-merge.")
+    p.add_argument("--run-meta", default=None, metavar="JSON",
+                   help="Run metadata path (default with --shard: <out>.run.json).")
+    p.add_argument("--pipeline-stats", action="store_true",
+                   help="Print stage timings, stalls and queue depths after the run.")
+    p.add_argument("--pipeline-stats-json", default=None,
+                   help="Also write the pipeline metrics to this JSON file.")
+    return p
+
+def main() -> None:
+    parser = build_parser()
+    args = parser.parse_args()
+
+    # expand inputs -> file list
+    files = []
+    for inp in args.inputs:
+        p = Path(inp)
+        if p.is_dir():
+            files += [str(f) for f in sorted(p.glob("*.wav"))] + find_records(p)
+        else:
+            files.append(str(p))
+
+    # forward flags to the engine
+    try:
+        kwargs = engine_kwargs(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # work items: whole files, or intervals decoded by seeking
+    items, stage = files, {}
+    intervals = bool(args.intervals or args.textgrid_tier)
+    if intervals:
+        items = read_intervals_csv(args.intervals) if args.intervals else []
+        if args.textgrid_tier:
+            for f in files:
+                items += textgrid_intervals(f, args.textgrid_tier)
+        stage = dict(reader=partial(read_interval, pad_s=interval_pad_s(args.frame_ms)),
+                     analyze=analyze_interval)
+    elif not files:
+        parser.error("no inputs given")
+
+    try:
+        shard = parse_shard(args.shard)
+    except ValueError as e:
+        parser.error(str(e))
+    unit = "intervals" if intervals else "files"
+    all_items = items
+    indices, items = select_shard(all_items, shard)
+    if not intervals:
+        files = items
+    if shard:
+        print(f"shard {shard[0]}/{shard[1]}: {len(items)} of {len(all_items)} {unit}")
+
+    # the catalog stores frames even when no per-frame files are written
+    run_kwargs = {**kwargs, "return_per_frame": True} if args.catalog else kwargs
+
+    readers, prefetch, write_queue = args.readers, args.prefetch, args.write_queue
+    try:
+        budget = parse_memory(args.max_memory)
+    except ValueError as e:
+        parser.error(str(e))
+    if budget is not None:
+        # per-file (or per-interval) mode (memory / parallel / stream) and run
+        # limits under the budget
+        if intervals:
+            plans = plan_intervals(items, budget, interval_pad_s(args.frame_ms), **run_kwargs)
+        else:
+            plans = plan_files(files, budget, **run_kwargs)
+        readers, prefetch, write_queue = pipeline_limits(
+            plans, budget, readers, prefetch, write_queue, per_frame=run_kwargs["return_per_frame"])
+        modes = {m: sum(p.mode == m for p in plans) for m in ("memory", "parallel", "stream")}
+        print(f"memory budget {budget / 2**20:.0f} MiB ({unit}): {modes['memory']} in memory, "
+              f"{modes['parallel']} parallel, {modes['stream']} streamed | readers {readers}, "
+              f"prefetch {prefetch}, write queue {write_queue}")
+        items, stage = plans, dict(reader=read_planned, analyze=analyze_planned)
+
+    writer = cohort = CohortWriter(OutputWriter(args.out, plots_dir=args.plots_dir))
+    if args.catalog:
+        try:
+            writer = CatalogWriter(args.catalog, cohort, params=kwargs, inputs=len(items),
+                                   manifest=args.manifest, per_frame_files=args.per_frame)
+        except ValueError as e:
+            parser.error(str(e))
+    with writer if args.catalog else nullcontext():
+        # results stream straight to the writer; no per-file data is kept here
+        _, stats = run_pipelined(items, writer=writer, readers=readers, prefetch=prefetch,
+                                 write_queue=write_queue, collect=False, **stage, **run_kwargs)
+    if not stats.files:
+        Path(args.out).write_text("")
+
+    if args.pipeline_stats:
+        print(stats.format())
+    if args.pipeline_stats_json:
+        Path(args.pipeline_stats_json).write_text(json.dumps(stats.as_dict(), indent=2))
+
+    run_meta = args.run_meta or (default_meta_path(args.out) if shard else None)
+    if run_meta:
+        write_run_meta(run_meta, out_csv=args.out, items=items, indices=indices,
+                       all_items=all_items, shard=shard, params=kwargs, per_frame=args.per_frame,
+                       plots_dir=args.plots_dir, cohort=cohort.states(),
+                       extra=dict(intervals=Path(args.intervals).name if args.intervals else None,
+                                  textgrid_tier=args.textgrid_tier))
+
+    print(f"Wrote {args.out} with {stats.files} {unit}.")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,316 @@
+# cli/shard.py
+# Sharded runs (--shard i/N) and merging them back (cpps-merge).
+#
+# Input files are assigned to shards by a hash of their file name, so every
+# node computes the same partition from the same input list without any
+# coordination, and shard membership does not depend on list position or on
+# where the corpus is mounted. Each sharded run writes a small run-metadata
+# JSON next to its summary CSV: the analysis parameters, a digest of the full
+# input list and, for every row of its summary, the row's position in the
+# unsharded run. cpps-merge checks that the shards fit together (same
+# parameters and inputs, every item exactly once), then writes the rows back
+# in single-node order, collects the per-frame CSVs/PNGs, and writes the
+# merged run metadata.
+#
+# The run metadata also holds the run's cohort statistics: every summary
+# row's accumulators (cli.stats) merged over all rows, stored as their
+# serialized states. cpps-merge merges the shards' states, so the merged
+# cohort summary (mean/SD/percentiles of every frame of every file) is the
+# single-node one without re-reading any per-frame output.
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+from .stats import SummaryAccumulator
+
+RUN_META_VERSION = 1
+# kwargs that change speed or where outputs go, not results
+_RUNTIME_KEYS = ("workers", "cepstrogram_dir")
+
+
+def parse_shard(text) -> tuple[int, int] | None:
+    """'i/N' (0-based i) -> (i, N); None or '' -> None."""
+    if text is None or not str(text).strip():
+        return None
+    try:
+        i, n = (int(v) for v in str(text).split("/"))
+    except ValueError:
+        raise ValueError(f"bad shard {text!r} (use i/N, e.g. 0/4)") from None
+    if n < 1 or not 0 <= i < n:
+        raise ValueError(f"bad shard {text!r}: need 0 <= i < N")
+    return i, n
+
+
+def item_file(item) -> str:
+    # work items are paths, or carry one (intervals, budget plans)
+    return str(getattr(item, "file", item))
+
+
+def item_stem(item) -> str:
+    return getattr(item, "stem", None) or Path(item_file(item)).stem
+
+
+def shard_of(item, n_shards: int) -> int:
+    """Stable shard of a work item: hash of its file name (intervals of a file land together)."""
+    h = hashlib.sha1(Path(item_file(item)).name.encode("utf-8")).digest()
+    return int.from_bytes(h[:8], "big") % int(n_shards)
+
+
+def inputs_digest(items) -> str:
+    """Digest of the ordered input list; shards of one run must agree on it."""
+    h = hashlib.sha1()
+    for it in items:
+        h.update(f"{Path(item_file(it)).name}\t{item_stem(it)}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def select_shard(items, shard):
+    """(indices, items) of `shard` = (i, N) within items; everything if shard is None."""
+    idx = [k for k, it in enumerate(items) if shard is None or shard_of(it, shard[1]) == shard[0]]
+    return idx, [items[k] for k in idx]
+
+
+def default_meta_path(out_csv) -> Path:
+    return Path(out_csv).with_suffix(".run.json")
+
+
+def _rel(path, base: Path) -> str:
+    return os.path.relpath(Path(path).resolve(), base.resolve())
+
+
+class CohortWriter:
+    """
+    Writer (see cli.pipeline.OutputWriter) that passes every result on to
+    `inner` and merges the row's accumulators (cli.stats.SummaryRow) into one
+    cohort accumulator per column; voiced runs stay apart across files.
+    """
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.accumulators = {}
+
+    def __call__(self, item, summary: dict, pf: pd.DataFrame | None = None) -> None:
+        self.inner(item, summary, pf)
+        for col, acc in getattr(summary, "accumulators", {}).items():
+            cohort = self.accumulators.setdefault(col, SummaryAccumulator(acc.resolution))
+            cohort.merge(acc, contiguous=False)
+
+    def states(self) -> dict:
+        return {col: acc.to_state() for col, acc in self.accumulators.items()}
+
+
+def merge_cohorts(states) -> dict:
+    """Merge cohort states ({column: accumulator state}) of several runs."""
+    merged = {}
+    for st in states:
+        for col, s in st.items():
+            acc = SummaryAccumulator.from_state(s)
+            merged[col] = merged[col].merge(acc, contiguous=False) if col in merged else acc
+    return {col: acc.to_state() for col, acc in merged.items()}
+
+
+def cohort_summary(states) -> dict:
+    """Frame counts and mean/median/SD/percentiles of every column of a cohort state."""
+    accs = {col: SummaryAccumulator.from_state(s) for col, s in states.items()}
+    if "cpps_db" not in accs:
+        return {}
+    out = {"frames": accs["cpps_db"].n_frames, "voiced_frames": accs["cpps_db"].count}
+    for col, acc in accs.items():
+        out.update(acc.summary(col))
+    return out
+
+
+def write_run_meta(path, *, out_csv, items, indices, all_items, shard, params, per_frame,
+                   frames_dir=".", plots_dir="frame_plots", extra=None, cohort=None):
+    """
+    Write the run-metadata JSON for one (sharded) run; paths are stored relative to it.
+
+    cohort: CohortWriter.states() of the run (omitted if None).
+    """
+    path = Path(path)
+    base = path.parent
+    meta = {
+        "format": RUN_META_VERSION,
+        "shard": list(shard) if shard else None,
+        "summary": _rel(out_csv, base),
+        "per_frame": bool(per_frame),
+        "frames_dir": _rel(frames_dir, base),
+        "plots_dir": _rel(plots_dir, base),
+        "params": {k: v for k, v in params.items() if k not in _RUNTIME_KEYS},
+        "inputs": {"count": len(all_items), "digest": inputs_digest(all_items)},
+        "items": [[k, Path(item_file(it)).name, item_stem(it)] for k, it in zip(indices, items)],
+    }
+    if extra:
+        meta["params"].update(extra)
+    if cohort is not None:
+        meta["cohort"] = cohort
+        meta["cohort_summary"] = cohort_summary(cohort)
+    path.write_text(json.dumps(meta, indent=1))
+    return meta
+
+
+def read_run_meta(path) -> dict:
+    meta = json.loads(Path(path).read_text())
+    if meta.get("format") != RUN_META_VERSION:
+        raise ValueError(f"{path}: unsupported run metadata format {meta.get('format')!r}")
+    meta["_base"] = Path(path).resolve().parent
+    return meta
+
+
+def check_shards(metas, paths) -> list[str]:
+    """Problems that keep `metas` from forming one complete run ([] if none)."""
+    problems = []
+    ref, ref_path = metas[0], paths[0]
+    for m, p in zip(metas[1:], paths[1:]):
+        if m["params"] != ref["params"]:
+            diff = sorted(k for k in set(m["params"]) | set(ref["params"])
+                          if m["params"].get(k) != ref["params"].get(k))
+            problems.append(f"{p}: parameters differ from {ref_path}: {', '.join(diff)}")
+        if m["inputs"] != ref["inputs"]:
+            problems.append(f"{p}: input list differs from {ref_path}")
+        if (m["shard"] or [0, 1])[1] != (ref["shard"] or [0, 1])[1]:
+            problems.append(f"{p}: shard count {m['shard']} does not match "
+                            f"{ref_path} {ref['shard']}")
+        if m["per_frame"] != ref["per_frame"]:
+            problems.append(f"{p}: per-frame output on/off differs from {ref_path}")
+
+    n_shards = (ref["shard"] or [0, 1])[1]
+    seen_shards = {}
+    for m, p in zip(metas, paths):
+        i = (m["shard"] or [0, 1])[0]
+        if i in seen_shards:
+            problems.append(f"{p}: shard {i}/{n_shards} already given by {seen_shards[i]}")
+        seen_shards.setdefault(i, p)
+    missing_shards = sorted(set(range(n_shards)) - set(seen_shards))
+    if missing_shards:
+        problems.append(f"missing shard(s) {', '.join(f'{i}/{n_shards}' for i in missing_shards)}")
+
+    owner, dups = {}, []
+    for m, p in zip(metas, paths):
+        for k, name, _ in m["items"]:
+            if k in owner:
+                dups.append(f"{name} ({owner[k]}, {p})")
+            owner.setdefault(k, p)
+    if dups:
+        problems.append(f"{len(dups)} item(s) in more than one shard: {'; '.join(dups[:5])}"
+                        + (" ..." if len(dups) > 5 else ""))
+    missing = sorted(set(range(ref["inputs"]["count"])) - set(owner))
+    if missing and not missing_shards:
+        problems.append(f"{len(missing)} input item(s) not in any shard (first: #{missing[0]})")
+    return problems
+
+
+def _per_frame_files(meta, stem):
+    base = meta["_base"]
+    return [(base / meta["frames_dir"] / f"{stem}_cpps_framewise.csv", "frames"),
+            (base / meta["plots_dir"] / f"{stem}_cpps.png", "plots")]
+
+
+def merge_runs(meta_paths, out_csv, frames_dir=None, plots_dir=None) -> dict:
+    """
+    Merge sharded runs into `out_csv` (rows in single-node order) and copy
+    their per-frame CSVs/PNGs to frames_dir / plots_dir (default: next to
+    out_csv, plots in frame_plots/). Raises ValueError listing every problem.
+    Returns the merged run metadata, also written to <out>.run.json.
+    """
+    paths = [str(p) for p in meta_paths]
+    if not paths:
+        raise ValueError("no run metadata given")
+    metas = [read_run_meta(p) for p in paths]
+    problems = check_shards(metas, paths)
+
+    rows, headers = {}, []
+    for m, p in zip(metas, paths):
+        csv = m["_base"] / m["summary"]
+        if not csv.exists():
+            problems.append(f"{p}: summary {csv} not found")
+            continue
+        # read as text so values are written back exactly as the shard wrote them
+        df = (pd.read_csv(csv, dtype=str, keep_default_na=False)
+              if csv.stat().st_size else pd.DataFrame())
+        if len(df) != len(m["items"]):
+            problems.append(f"{p}: {csv.name} has {len(df)} rows for {len(m['items'])} items")
+            continue
+        for (k, _, _), row in zip(m["items"], df.to_dict("records")):
+            rows[k] = row
+        if m["items"]:
+            headers.append((min(k for k, _, _ in m["items"]), list(df.columns)))
+    if problems:
+        raise ValueError("cannot merge shards:\n  " + "\n  ".join(problems))
+
+    out_csv = Path(out_csv)
+    out_csv.parent.mkdir(parents=True, exist_ok=True)
+    # the single-node writer adds columns in order of first appearance
+    columns = []
+    for _, cols in sorted(headers):
+        columns += [c for c in cols if c not in columns]
+    order = sorted(rows)
+    if order:
+        pd.DataFrame([rows[k] for k in order]).reindex(columns=columns, fill_value="") \
+            .to_csv(out_csv, index=False)
+    else:
+        out_csv.write_text("")
+
+    frames_dir = Path(frames_dir) if frames_dir else out_csv.parent
+    plots_dir = Path(plots_dir) if plots_dir else out_csv.parent / "frame_plots"
+    if metas[0]["per_frame"]:
+        dest = {"frames": frames_dir, "plots": plots_dir}
+        for d in dest.values():
+            d.mkdir(parents=True, exist_ok=True)
+        lost = []
+        for m in metas:
+            for _, _, stem in m["items"]:
+                for src, kind in _per_frame_files(m, stem):
+                    if not src.exists():
+                        lost.append(str(src))
+                        continue
+                    dst = dest[kind] / src.name
+                    if not (dst.exists() and dst.samefile(src)):
+                        shutil.copyfile(src, dst)
+        if lost:
+            raise ValueError(f"per-frame output missing for {len(lost)} item(s), e.g. {lost[0]}")
+
+    items = sorted((it for m in metas for it in m["items"]), key=lambda it: it[0])
+    base = out_csv.parent
+    merged = {k: v for k, v in metas[0].items() if k != "_base"}
+    merged.update(shard=None, summary=_rel(out_csv, base), frames_dir=_rel(frames_dir, base),
+                  plots_dir=_rel(plots_dir, base), items=items)
+    merged.pop("cohort", None)
+    merged.pop("cohort_summary", None)
+    if all("cohort" in m for m in metas):  # metadata written before cohorts lack them
+        merged["cohort"] = merge_cohorts(m["cohort"] for m in metas)
+        merged["cohort_summary"] = cohort_summary(merged["cohort"])
+    default_meta_path(out_csv).write_text(json.dumps(merged, indent=1))
+    return merged
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="CPP Studio — merge sharded cpps-run results")
+    p.add_argument("runs", nargs="+", help="Run metadata JSON of each shard (<out>.run.json)")
+    p.add_argument("--out", default="cpps_summary.csv", help="Merged summary CSV")
+    p.add_argument("--frames-dir", default=None,
+                   help="Where to collect per-frame CSVs (default: folder of --out)")
+    p.add_argument("--plots-dir", default=None,
+                   help="Where to collect per-frame PNGs (default: frame_plots/ next to --out)")
+    return p
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    try:
+        merged = merge_runs(args.runs, args.out, frames_dir=args.frames_dir,
+                            plots_dir=args.plots_dir)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    print(f"Merged {len(args.runs)} shard(s) into {args.out} with {len(merged['items'])} items.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+# cli/stats.py
+# Incremental, mergeable per-file summary statistics.
+#
+# SummaryAccumulator is fed per-frame values in time order (NaN = gated /
+# unvoiced) one batch at a time, so a summary never needs the whole per-frame
+# array. Moments use Welford/Chan updates; percentiles come from a fixed-
+# resolution histogram sketch whose bin counts simply add on merge, so
+# merging shards gives the same percentiles as one pass over all frames.
+# When the caller still holds the whole series (in-memory analysis, or
+# streaming with per-frame output), summary() takes it and computes the
+# percentiles exactly instead: the sketch is only exact to resolution / 2,
+# which is the precision summaries are rounded to.
+#
+# Summary rows are SummaryRow dicts that also carry the accumulators they
+# came from, so cpps-run can merge them into a cohort state for its run
+# metadata and cpps-merge can merge the shards' states (cli.shard).
+import math
+import numpy as np
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+class SummaryAccumulator:
+    """
+    Streaming mean/SD, percentiles and voiced-run statistics for one per-frame series.
+
+    resolution : histogram bin width in the units of the values (e.g. 0.001 dB);
+                 percentiles are exact to within resolution / 2.
+    """
+
+    def __init__(self, resolution: float = 1e-3):
+        self.resolution = float(resolution)
+        self.n_frames = 0      # all frames seen, including NaN
+        self.count = 0         # finite frames
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.bins: dict[int, int] = {}
+        # Voiced runs (finite stretches). Runs touching either end of the
+        # sequence are kept apart so contiguous shards can be joined.
+        self.lead = 0          # voiced frames before the first unvoiced one
+        self.trail = 0         # voiced frames after the last unvoiced one
+        self.inner_runs = 0
+        self.inner_total = 0
+        self.inner_max = 0
+
+    # ---------- updates ----------
+    def update(self, values) -> "SummaryAccumulator":
+        """Append a batch of per-frame values (time order; NaN = unvoiced)."""
+        v = np.asarray(values, dtype=float).ravel()
+        if v.size == 0:
+            return self
+        finite = np.isfinite(v)
+        other = SummaryAccumulator(self.resolution)
+        other.n_frames = int(v.size)
+
+        good = v[finite]
+        if good.size:
+            other.count = int(good.size)
+            other.mean = float(np.mean(good))
+            other.m2 = float(np.sum((good - other.mean) ** 2))
+            keys, counts = np.unique(np.rint(good / self.resolution).astype(np.int64),
+                                     return_counts=True)
+            other.bins = dict(zip(keys.tolist(), counts.tolist()))
+
+        # Run lengths of the voiced mask
+        edges = np.diff(np.concatenate(([0], finite.astype(np.int8), [0])))
+        run_starts = np.flatnonzero(edges == 1)
+        run_lens = np.flatnonzero(edges == -1) - run_starts
+        if run_lens.size:
+            if run_starts[0] == 0:
+                other.lead = int(run_lens[0])
+            if run_starts[-1] + run_lens[-1] == v.size:
+                other.trail = int(run_lens[-1])
+            lo = 1 if run_starts[0] == 0 else 0
+            hi = run_lens.size - 1 if run_starts[-1] + run_lens[-1] == v.size else run_lens.size
+            inner = run_lens[lo:hi] if hi > lo else run_lens[:0]
+            other.inner_runs = int(inner.size)
+            other.inner_total = int(inner.sum())
+            other.inner_max = int(inner.max()) if inner.size else 0
+        return self.merge(other)
+
+    def merge(self, other: "SummaryAccumulator", contiguous: bool = True) -> "SummaryAccumulator":
+        """
+        Fold `other` into self (in place) and return self.
+
+        contiguous=True treats `other` as the frames directly following self
+        (shards of one file), so a voiced run crossing the boundary is one run.
+        contiguous=False keeps runs separate (files of a cohort).
+        """
+        if other.resolution != self.resolution:
+            raise ValueError("cannot merge accumulators with different resolutions")
+        if not contiguous:
+            self._close_runs()
+            other = other.copy()._close_runs()
+
+        # Chan et al. parallel update of count/mean/M2
+        n = self.count + other.count
+        if other.count:
+            d = other.mean - self.mean
+            self.mean = self.mean + d * other.count / n
+            self.m2 = self.m2 + other.m2 + d * d * self.count * other.count / n
+        self.count = n
+        for k, c in other.bins.items():
+            self.bins[k] = self.bins.get(k, 0) + c
+
+        a_all = self._all_voiced()
+        b_all = other._all_voiced()
+        if self.n_frames == 0:
+            self.lead, self.trail = other.lead, other.trail
+        elif other.n_frames:
+            mid = self.trail + other.lead
+            lead = self.n_frames + other.lead if a_all else self.lead
+            trail = other.n_frames + self.trail if b_all else other.trail
+            if not a_all and not b_all and mid > 0:
+                self.inner_runs += 1
+                self.inner_total += mid
+                self.inner_max = max(self.inner_max, mid)
+            self.lead, self.trail = lead, trail
+        self.inner_runs += other.inner_runs
+        self.inner_total += other.inner_total
+        self.inner_max = max(self.inner_max, other.inner_max)
+        self.n_frames += other.n_frames
+        return self
+
+    @classmethod
+    def merged(cls, accs, contiguous: bool = True,
+               resolution: float = 1e-3) -> "SummaryAccumulator":
+        """Merge an iterable of accumulators (in order) into a new one."""
+        out = None
+        for a in accs:
+            out = a.copy() if out is None else out.merge(a, contiguous=contiguous)
+        return out if out is not None else cls(resolution)
+
+    # ---------- results ----------
+    @property
+    def sd(self) -> float:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan
+
+    def quantile(self, q: float) -> float:
+        """q in [0, 1]; linear interpolation between order statistics (numpy default)."""
+        if not self.count:
+            return np.nan
+        keys = np.array(sorted(self.bins), dtype=np.int64)
+        cum = np.cumsum([self.bins[k] for k in keys])
+        h = (self.count - 1) * float(q)
+        lo = int(math.floor(h))
+        v_lo = keys[np.searchsorted(cum, lo + 1)]
+        v_hi = keys[np.searchsorted(cum, min(lo + 2, self.count))]
+        return float((v_lo + (h - lo) * (v_hi - v_lo)) * self.resolution)
+
+    def run_stats(self) -> tuple[int, int, int]:
+        """(number of voiced runs, total voiced frames in runs, longest run)."""
+        if self._all_voiced():
+            return 1, self.n_frames, self.n_frames
+        edge = [r for r in (self.lead, self.trail) if r > 0]
+        return (self.inner_runs + len(edge),
+                self.inner_total + sum(edge),
+                max([self.inner_max] + edge))
+
+    def summary(self, prefix: str = "cpps_db", hop_s: float | None = None, values=None) -> dict:
+        """
+        Summary columns: mean/median/SD/percentiles, plus voiced-run stats if hop_s is given.
+
+        values: the whole series this accumulator has seen, if it is still in
+        memory; percentiles then come from it exactly (np.quantile) rather
+        than from the histogram sketch.
+        """
+        def r(v, nd=3):
+            return round(float(v), nd) if np.isfinite(v) else None
+
+        quantile = self.quantile
+        if values is not None:
+            good = np.asarray(values, dtype=float).ravel()
+            good = good[np.isfinite(good)]
+            quantile = (lambda q: float(np.quantile(good, q))) if good.size else (lambda q: np.nan)
+
+        out = {f"mean_{prefix}": r(self.mean if self.count else np.nan),
+               f"median_{prefix}": r(quantile(0.5)),
+               f"sd_{prefix}": r(self.sd)}
+        for p in PERCENTILES:
+            if p != 50:
+                out[f"p{p}_{prefix}"] = r(quantile(p / 100.0))
+        if hop_s is not None:
+            runs, total, longest = self.run_stats()
+            out["voiced_runs"] = runs
+            out["mean_voiced_run_s"] = r(total / runs * hop_s) if runs else None
+            out["max_voiced_run_s"] = r(longest * hop_s) if runs else None
+        return out
+
+    # ---------- persistence ----------
+    def to_state(self) -> dict:
+        """JSON-serializable state (for shards computed elsewhere)."""
+        st = {k: getattr(self, k) for k in ("resolution", "n_frames", "count", "mean", "m2", "lead",
+                                            "trail", "inner_runs", "inner_total", "inner_max")}
+        st["bins"] = {str(k): int(c) for k, c in self.bins.items()}
+        return st
+
+    @classmethod
+    def from_state(cls, state: dict) -> "SummaryAccumulator":
+        acc = cls(state["resolution"])
+        for k in ("n_frames", "count", "mean", "m2", "lead", "trail",
+                  "inner_runs", "inner_total", "inner_max"):
+            setattr(acc, k, state[k])
+        acc.bins = {int(k): int(c) for k, c in state["bins"].items()}
+        return acc
+
+    def copy(self) -> "SummaryAccumulator":
+        return SummaryAccumulator.from_state(self.to_state())
+
+    # ---------- internals ----------
+    def _all_voiced(self) -> bool:
+        return self.n_frames > 0 and self.lead == self.n_frames
+
+    def _close_runs(self) -> "SummaryAccumulator":
+        # Fold edge runs into inner runs so nothing joins across this boundary.
+        runs, total, longest = self.run_stats()
+        self.inner_runs, self.inner_total, self.inner_max = runs, total, longest
+        self.lead = self.trail = 0
+        return self
+
+
+class SummaryRow(dict):
+    """A summary row (a plain dict) with the accumulators it was computed from."""
+
+    def __init__(self, row=(), accumulators=None):
+        super().__init__(row)
+        self.accumulators = dict(accumulators or {})
@@ -0,0 +1,226 @@
+# cli/streaming.py
+# Chunked-streaming analysis of one file for recordings too large to decode
+# at once (see cli/budget.py for when it is chosen).
+#
+# Two passes over decoded blocks (audio_blocks: soundfile or WFDB):
+#   1. mono mix -> (streaming resample) -> pre-emphasis with carried state,
+#      summing x**2 for the whole-file gate reference;
+#   2. the same chain again, framing each block (with the N - H samples of
+#      overlap carried over), gating against the pass-1 reference and running
+#      the usual frame kernel on accepted frames.
+# Each block's per-frame results go straight into a FrameSummary
+# (cli.batch), which carries median smoothing across block edges and updates
+# the summary accumulators (cli.stats). Per-frame arrays are kept only with
+# return_per_frame, which then gives exactly the in-memory result; without it
+# memory is bounded by the block size, and summary percentiles come from the
+# accumulators' histogram sketch (within 0.0005 dB).
+#
+# With channels set, blocks keep the selected channels as columns; each has
+# its own pre-emphasis state and gate reference, and one kernel call per
+# block covers all of them.
+#
+# With adaptive on, pass 1 also frames the blocks and keeps each frame's
+# level, so the gate is known before any coarse frame is scored. A middle
+# pass then scores the coarse frames that pass the gate (cli.adaptive; none
+# when the gate keeps too few frames) and pass 2 analyzes only the voiced
+# regions.
+import numpy as np
+from scipy.signal import get_window
+
+from .adaptive import COARSE_R, coarse_frames, coarse_scores, voiced_regions
+from .batch import (FrameSummary, _channel_name, _kernel_for, _options, channel_indices,
+                    merge_channels)
+from .cpps import _cepstrogram_writer, _frame_params, audio_blocks, audio_info
+from .framing import frame_rms_db
+from .parallel import map_frame_chunks
+from .praat_match import _frame_params as _praat_frame_params
+from .resample import StreamingResampler
+
+DEFAULT_BLOCK_FRAMES = 4096
+
+
+def _signal_blocks(path, blocksize, analysis_rate=None, chans=None, start=0, stop=None):
+    """
+    Yield float64 (samples, k) blocks of `path` (source samples [start, stop)),
+    resampled to analysis_rate if set: the mono mix (k = 1), or the channels
+    listed in `chans`.
+    """
+    rate = audio_info(path).samplerate
+    rs = None
+    if analysis_rate and int(analysis_rate) != rate:
+        rs = StreamingResampler(rate, int(analysis_rate))
+    for b in audio_blocks(path, blocksize, start, stop):
+        if chans is not None:
+            b = b[:, chans]
+        elif b.shape[1] > 1:
+            b = np.mean(b, axis=1, keepdims=True)
+        if rs is not None:
+            b = rs.process(b)
+        if b.size:
+            yield b
+    if rs is not None:
+        tail = rs.process(final=True)
+        if tail.size:
+            yield tail
+
+
+def _preemphasized(blocks, coef):
+    """y[0] = x[0], y[n] = x[n] - coef * x[n-1] along axis 0, carried across blocks."""
+    prev = None
+    for x in blocks:
+        y = np.empty_like(x)
+        y[0] = x[0] if prev is None else x[0] - coef * prev
+        y[1:] = x[1:] - coef * x[:-1]
+        prev = x[-1]
+        yield y
+
+
+def _framed(blocks, n, h):
+    """
+    Yield (buf, buf_start, idx) as blocks arrive: buf holds the samples from
+    absolute index buf_start on and idx the frames newly complete in it; the
+    N - H samples of overlap are carried into the next buffer.
+    """
+    buf, buf_start, nxt = None, 0, 0
+    for y in blocks:
+        buf = y if buf is None else np.concatenate((buf, y))
+        last = (buf_start + len(buf) - n) // h + 1  # frames complete in buf
+        if last <= nxt:
+            continue
+        yield buf, buf_start, np.arange(nxt, last)
+        nxt = last
+        drop = nxt * h - buf_start
+        buf, buf_start = buf[drop:], buf_start + drop
+
+
+def _coarse_pass(blocks, levels, floor_db, n_frames, n, h, fs, p, coef):
+    """Per channel, the frames pass 2 analyzes: voiced regions around gated coarse frames or all."""
+    keeps = [np.concatenate([np.zeros(0)] + lv) >= f for lv, f in zip(levels, floor_db)]
+    todo = []  # per channel: mask of the coarse frames to score, or None (no coarse pass)
+    for keep in keeps:
+        idx = coarse_frames(keep)
+        if idx is not None:
+            m = np.zeros(n_frames, dtype=bool)
+            m[idx] = True
+            idx = m
+        todo.append(idx)
+    voiced = [[np.zeros(0, np.int64)] for _ in keeps]
+    if any(m is not None and m.any() for m in todo):
+        for buf, buf_start, idx in _framed(blocks(), n, h):
+            for j, m in enumerate(todo):
+                sel = idx[m[idx]] if m is not None else idx[:0]
+                if sel.size:
+                    r = coarse_scores(np.ascontiguousarray(buf[:, j]), sel * h - buf_start, n, fs,
+                                      p["f0_min"], p["f0_max"], coef)
+                    voiced[j].append(sel[r >= COARSE_R])
+    return [np.ones(n_frames, dtype=bool) if m is None else voiced_regions(k, np.concatenate(v))
+            for k, m, v in zip(keeps, todo, voiced)]
+
+
+def compute_cpps_streaming(path, block_frames: int = DEFAULT_BLOCK_FRAMES, start=0, stop=None,
+                           name=None, **params):
+    """
+    Like compute_cpps_for_file, but decodes and analyzes `path` in blocks of
+    about `block_frames` analysis frames. params are those of
+    compute_cpps_for_signal (workers applies within each block).
+
+    start/stop limit the analysis to source samples [start, stop) (the result
+    is that of compute_cpps_for_signal on that slice); name replaces `path`
+    as the analysis name (summary `file`, cepstrogram stems).
+    """
+    p = _options(**params)
+    info = audio_info(path)
+    fs = int(p["analysis_rate"] or info.samplerate)
+    chans = None if p["channels"] is None else channel_indices(p["channels"], info.channels, path)
+    name = name or path
+    names = [name] if chans is None else [_channel_name(name, c) for c in chans]
+    if p["praat_match"]:
+        n, h = _praat_frame_params(fs, p["frame_ms"], p["hop_ms"])
+        w = np.hanning(n)
+        coef = float(np.exp(-2.0 * np.pi * p["preemph_from_hz"] / fs))
+        gate_db, eps = p["gate_db"], 1e-18
+    else:
+        n, h = _frame_params(fs, p["frame_ms"], p["hop_pct"])
+        w = get_window("hamming", n, fftbins=True)
+        coef = float(p["preemph_alpha"])
+        gate_db, eps = p["energy_gate_db"], 1e-12
+    block_frames = max(1, int(block_frames))
+    # source samples per block so that one block yields about block_frames frames
+    src_block = max(n, int(np.ceil(block_frames * h * info.samplerate / fs)))
+
+    def blocks():
+        return _preemphasized(_signal_blocks(path, src_block, p["analysis_rate"], chans,
+                                             start, stop), coef)
+
+    # ---- pass 1: length and whole-file level of each pre-emphasized channel ----
+    total, sumsq = 0, np.zeros(len(names))
+    levels = [[] for _ in names]  # per-frame level (adaptive)
+
+    def measured():
+        nonlocal total
+        for y in blocks():
+            total += len(y)
+            sumsq[:] += [float(np.dot(col, col)) for col in y.T]
+            yield y
+
+    if p["adaptive"]:
+        for buf, buf_start, idx in _framed(measured(), n, h):
+            for j in range(len(names)):
+                levels[j].append(frame_rms_db(np.ascontiguousarray(buf[:, j]), idx * h - buf_start,
+                                              n, window=w, eps=eps))
+    else:
+        for _ in measured():
+            pass
+    ms = sumsq / total if total else sumsq
+    ref_db = 20.0 * np.log10(np.sqrt(ms + eps) + eps)
+
+    n_frames = (total - n) // h + 1 if total >= n else 0
+    if p["adaptive"]:
+        regions = _coarse_pass(blocks, levels, ref_db - gate_db, n_frames, n, h, fs, p, coef)
+    summaries = [FrameSummary(name, n, h, fs, p, keep_frames=p["return_per_frame"])
+                 for name in names]
+    sinks = [None] * len(names)
+    if p["cepstrogram_dir"]:
+        sinks = [_cepstrogram_writer(p["cepstrogram_dir"], name, fs, n, h, total,
+                                     p["praat_match"], p["archive_params"]) for name in names]
+    kernel, kw, band_start, cep_len = _kernel_for(fs, n, p)
+    keep_band = sinks[0] is not None
+
+    # ---- pass 2: frame, gate and analyze block by block ----
+    for buf, buf_start, idx in _framed(blocks(), n, h):
+        starts = idx * h - buf_start
+        # channels end to end in one buffer, accepted frames of all in one call
+        flat = np.ascontiguousarray(buf.T).ravel()
+        keeps = [frame_rms_db(flat[j * len(buf):(j + 1) * len(buf)], starts, n, window=w, eps=eps)
+                 >= ref_db[j] - gate_db for j in range(len(names))]
+        skipped = [None] * len(names)
+        if p["adaptive"]:
+            for j, k in enumerate(keeps):
+                skipped[j] = k & ~regions[j][idx]
+                k &= regions[j][idx]
+        # this block's frames per channel, NaN where gated
+        cpps = np.full((len(names), len(idx)), np.nan)
+        f0s = np.full((len(names), len(idx)), np.nan)
+        feats = np.full((len(names), len(idx), len(p["features"])), np.nan)
+        sel = np.concatenate([starts[k] + j * len(buf) for j, k in enumerate(keeps)])
+        if sel.size:
+            cpp, f0, band, feat = map_frame_chunks(kernel, flat, sel, n, workers=p["workers"],
+                                                   keep_band=keep_band, **kw)
+            a = 0
+            for j, k in enumerate(keeps):
+                b = a + int(k.sum())
+                cpps[j, k], f0s[j, k] = cpp[a:b], f0[a:b]
+                if feat is not None:
+                    feats[j, k] = feat[a:b]
+                if keep_band and b > a:
+                    sinks[j](idx[k], band[a:b], band_start=band_start, fft_len=cep_len)
+                a = b
+        for j, s in enumerate(summaries):
+            s.add(cpps[j], f0s[j], feats[j], skipped[j])
+    for sink in sinks:
+        if sink is not None:
+            sink.close(n_frames)
+
+    results = [s.finish(total / fs) for s in summaries]
+    summary, pf = results[0] if chans is None else merge_channels(name, chans, results)
+    return (summary, pf) if p["return_per_frame"] else summary
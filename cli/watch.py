@@ -0,0 +1,359 @@
+# cli/watch.py
+# Watch-folder daemon (cpps-watch DIR): analyze recordings as they land.
+#
+# New or rewritten WAVs are noticed through inotify (inotify_simple, Linux)
+# or, without it, by polling the folder. A file is queued once its size and
+# mtime have not changed for --settle seconds (copies from workstations or
+# network shares arrive in many writes, and a close-write is not always the
+# last one), then analyzed by compute_cpps_for_file on a process pool.
+# Results are appended to the summary CSV and per-frame outputs as each file
+# finishes. Each analyzed or failed file is remembered with the size and
+# mtime it was analyzed at; it is queued again only when those change, so a
+# fixed upload is retried and a rewritten file gets a new summary row (the
+# latest one last). Files already in the summary count as analyzed at their
+# current size/mtime, so a restart picks up where the last run stopped.
+# A worker that dies (OOM killer, crashing decoder) breaks the whole pool:
+# the pool is rebuilt and the files it was analyzing are resubmitted, each up
+# to POOL_RETRIES times before it counts as failed.
+# With --report the cpps-report PDF is rebuilt
+# every --report-every minutes when new rows arrived.
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import pandas as pd
+
+from .cpps import compute_cpps_for_file
+from .pipeline import OutputWriter
+from .run_cpps import add_analysis_args, engine_kwargs
+
+AUDIO_SUFFIXES = (".wav",)
+DEFAULT_SETTLE_S = 2.0
+DEFAULT_POLL_S = 1.0
+POOL_RETRIES = 2  # resubmissions of a file whose worker died
+
+
+def _signature(path):
+    """(size, mtime_ns), or None if the file is gone."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def _is_audio(path) -> bool:
+    p = Path(path)
+    return p.suffix.lower() in AUDIO_SUFFIXES and not p.name.startswith(".")
+
+
+class _Settle:
+    """Files waiting for their size and mtime to stop changing."""
+
+    def __init__(self, settle_s: float):
+        self.settle_s = float(settle_s)
+        self._pending = {}  # path -> (first seen, (size, mtime_ns) or None, unchanged since)
+
+    def touch(self, path, now: float) -> None:
+        if path not in self._pending:
+            self._pending[path] = (now, None, now)
+
+    def ready(self, now: float) -> list[tuple[str, float, tuple]]:
+        """
+        (path, first seen, (size, mtime_ns)) of files unchanged for settle_s;
+        they leave the pending set.
+        """
+        out = []
+        for path, (seen, sig, since) in list(self._pending.items()):
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:  # moved away / temp file renamed
+                del self._pending[path]
+                continue
+            cur = (st.st_size, st.st_mtime_ns)
+            if cur != sig:
+                self._pending[path] = (seen, cur, now)
+            elif st.st_size and now - since >= self.settle_s:
+                out.append((path, seen, cur))
+                del self._pending[path]
+        return out
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+
+class _PollSource:
+    """Lists the folder every poll_s seconds."""
+    name = "polling"
+
+    def __init__(self, folder, poll_s: float):
+        self.folder, self.poll_s = Path(folder), float(poll_s)
+        self._last = time.monotonic()
+
+    def events(self, timeout_s: float) -> list[str]:
+        time.sleep(timeout_s)
+        if time.monotonic() - self._last < self.poll_s:
+            return []
+        self._last = time.monotonic()
+        with os.scandir(self.folder) as it:
+            return [e.path for e in it if e.is_file()]
+
+
+class _InotifySource:
+    """Close-write / moved-in / modified events from inotify."""
+    name = "inotify"
+
+    def __init__(self, folder):
+        from inotify_simple import INotify, flags
+
+        self.folder = Path(folder)
+        self._ino = INotify()
+        self._ino.add_watch(str(self.folder), flags.CLOSE_WRITE | flags.MOVED_TO | flags.MODIFY)
+
+    def events(self, timeout_s: float) -> list[str]:
+        events = self._ino.read(timeout=int(timeout_s * 1000))
+        return [str(self.folder / e.name) for e in events if e.name]
+
+    def close(self) -> None:
+        self._ino.close()
+
+
+def _source(folder, mode="auto", poll_s=DEFAULT_POLL_S):
+    if mode in ("auto", "inotify"):
+        try:
+            return _InotifySource(folder)
+        except (ImportError, OSError):
+            if mode == "inotify":
+                raise
+    return _PollSource(folder, poll_s)
+
+
+class _InlineExecutor:
+    # workers=0: analyze in the watcher process (debugging, tests)
+    def submit(self, fn, *args, **kwargs):
+        f = Future()
+        try:
+            f.set_result(fn(*args, **kwargs))
+        except Exception as e:  # reported like a worker failure
+            f.set_exception(e)
+        return f
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+def _analyze(path, params):
+    res = compute_cpps_for_file(path, **params)
+    return res if isinstance(res, tuple) else (res, None)
+
+
+def processed_files(out_csv) -> set[str]:
+    """File names already in the summary CSV."""
+    out_csv = Path(out_csv)
+    if not out_csv.exists() or not out_csv.stat().st_size:
+        return set()
+    return set(pd.read_csv(out_csv, usecols=["file"], dtype=str)["file"])
+
+
+class Watcher:
+    """
+    Analyze audio files as they appear in `folder`.
+
+    params are those of compute_cpps_for_file. workers processes analyze
+    files in parallel (0 = in this process). Call run(); it returns when
+    `stop` is set or, with once=True, when every file present at start-up
+    has been written.
+    """
+
+    def __init__(self, folder, out_csv="cpps_summary.csv", plots_dir="frame_plots", frames_dir=".",
+                 workers=1, settle_s=DEFAULT_SETTLE_S, poll_s=DEFAULT_POLL_S, mode="auto",
+                 report_pdf=None, report_every_s=600.0, log=print, **params):
+        self.folder = Path(folder)
+        self.params = params
+        self.writer = OutputWriter(out_csv, plots_dir=plots_dir, frames_dir=frames_dir, append=True)
+        # name -> (size, mtime_ns) it was analyzed / failed at
+        self.done = {name: _signature(self.folder / name) for name in processed_files(out_csv)}
+        self.failed = {}
+        self.crashes = {}  # name -> times its worker died
+        self.active = set()  # names queued or being analyzed
+        self.workers = int(workers)
+        self.settle = _Settle(settle_s)
+        self.poll_s = float(poll_s)
+        self.mode = mode
+        self.report_pdf = report_pdf
+        self.report_every_s = float(report_every_s)
+        self.log = log
+        self.written = 0
+        self._since_report = 0
+
+    def _tick(self) -> float:
+        return max(0.05, min(self.poll_s, self.settle.settle_s / 4 or self.poll_s))
+
+    def _report(self) -> None:
+        from .report import generate_report  # reportlab/matplotlib only when reports are on
+
+        Path(self.report_pdf).parent.mkdir(parents=True, exist_ok=True)
+        generate_report(summary_csv=str(self.writer.out_csv), out_pdf=str(self.report_pdf))
+        self._since_report = 0
+        self.log(f"report: {self.report_pdf}")
+
+    def run(self, stop: threading.Event | None = None, once: bool = False) -> int:
+        """Process files until stopped; returns the number of summary rows written."""
+        stop = stop or threading.Event()
+        source = None if once else _source(self.folder, self.mode, self.poll_s)
+        self._pool = self._new_pool()
+        running = {}  # future -> (path, first seen, signature)
+        pools = {}  # future -> the pool it was submitted to
+        last_report = time.monotonic()
+        # files that arrived while nobody was watching
+        with os.scandir(self.folder) as it:
+            for e in it:
+                self._consider(e.path, time.monotonic())
+        self.log(f"watching {self.folder} ({source.name if source else 'once'}, "
+                 f"settle {self.settle.settle_s:g} s, {len(self.settle)} waiting, "
+                 f"{len(self.done)} already in {self.writer.out_csv.name})")
+        try:
+            while not stop.is_set():
+                if source is not None:
+                    for path in source.events(self._tick()):
+                        self._consider(path, time.monotonic())
+                elif not self.settle and not running:
+                    break
+                else:
+                    time.sleep(self._tick())
+                for path, seen, sig in self.settle.ready(time.monotonic()):
+                    self.active.add(Path(path).name)
+                    fut = self._submit(path)
+                    running[fut], pools[fut] = (path, seen, sig), self._pool
+                for fut in [f for f in running if f.done()]:
+                    pool = pools.pop(fut)
+                    path, seen, sig = running.pop(fut)
+                    name = Path(path).name
+                    if (isinstance(fut.exception(), BrokenProcessPool)
+                            and self.crashes.get(name, 0) < POOL_RETRIES):
+                        if pool is self._pool:
+                            self._restart_pool()
+                        self.crashes[name] = self.crashes.get(name, 0) + 1
+                        self.log(f"{name}: worker died, retrying")
+                        fut = self._submit(path)
+                        running[fut], pools[fut] = (path, seen, sig), self._pool
+                    else:
+                        self._write(fut, path, seen, sig)
+                if (self.report_pdf and self._since_report
+                        and time.monotonic() - last_report >= self.report_every_s):
+                    self._report()
+                    last_report = time.monotonic()
+        finally:
+            for fut in list(running):
+                self._write(fut, *running.pop(fut))  # wait for files already being analyzed
+            self._pool.shutdown(wait=True)
+            if hasattr(source, "close"):
+                source.close()
+            if self.report_pdf and self._since_report:
+                self._report()
+        return self.written
+
+    def _new_pool(self):
+        return _InlineExecutor() if self.workers <= 0 else ProcessPoolExecutor(self.workers)
+
+    def _restart_pool(self) -> None:
+        self._pool.shutdown(wait=False)
+        self._pool = self._new_pool()
+
+    def _submit(self, path) -> Future:
+        try:
+            return self._pool.submit(_analyze, path, self.params)
+        except BrokenProcessPool:  # broke since the last check
+            self._restart_pool()
+            return self._pool.submit(_analyze, path, self.params)
+
+    def _consider(self, path, now) -> None:
+        name = Path(path).name
+        if not _is_audio(path) or name in self.active:
+            return
+        last = self.done.get(name, self.failed.get(name))
+        if last is None or last != _signature(path):  # new, or changed since it was analyzed
+            self.settle.touch(str(path), now)
+
+    def _write(self, fut, path, seen, sig) -> None:
+        name = Path(path).name
+        self.active.discard(name)
+        self.crashes.pop(name, None)
+        try:
+            summary, pf = fut.result()
+        except Exception as e:
+            self.failed[name] = sig
+            self.log(f"{name}: failed: {e}")
+        else:
+            self.writer(path, summary, pf)
+            self.failed.pop(name, None)
+            self.done[name] = sig
+            self.written += 1
+            self._since_report += 1
+            self.log(f"{name}: mean CPPS {summary.get('mean_cpps_db')} dB "
+                     f"({time.monotonic() - seen:.1f} s after arrival)")
+        # rewritten while it was being analyzed: queue it again
+        self._consider(path, time.monotonic())
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="CPP Studio — analyze WAVs as they arrive in a folder")
+    p.add_argument("folder", help="Drop folder to watch")
+    add_analysis_args(p)
+
+    # Outputs (appended to)
+    p.add_argument("--per_frame", action="store_true", help="Save per-frame CSVs and PNG plots")
+    p.add_argument("--out", default="cpps_summary.csv")
+    p.add_argument("--plots-dir", default="frame_plots",
+                   help="Directory for per-file time-course PNGs")
+    p.add_argument("--frames-dir", default=".", help="Directory for per-file framewise CSVs")
+    p.add_argument("--report", default=None, metavar="PDF",
+                   help="Rebuild this cpps-report PDF when new results arrived "
+                        "(see --report-every).")
+    p.add_argument("--report-every", type=float, default=10.0, metavar="MIN",
+                   help="Minutes between report rebuilds (default 10).")
+
+    # Detection and workers
+    p.add_argument("--workers", type=int, default=1,
+                   help="Processes analyzing files in parallel (0 = in the watcher process).")
+    p.add_argument("--settle", type=float, default=DEFAULT_SETTLE_S, metavar="S",
+                   help="Seconds a file's size/mtime must stay unchanged before it is analyzed.")
+    p.add_argument("--poll", type=float, default=DEFAULT_POLL_S, metavar="S",
+                   help="Folder scan interval when polling.")
+    p.add_argument("--watch-mode", choices=["auto", "inotify", "poll"], default="auto",
+                   help="auto uses inotify (pip install inotify_simple, Linux) and falls back "
+                        "to polling.")
+    p.add_argument("--once", action="store_true",
+                   help="Process the files present now and exit.")
+    return p
+
+
+def main() -> None:
+    parser = build_parser()
+    args = parser.parse_args()
+    if not Path(args.folder).is_dir():
+        parser.error(f"{args.folder} is not a folder")
+    try:
+        params = engine_kwargs(args)
+    except ValueError as e:
+        parser.error(str(e))
+    params.pop("workers")  # --workers here is files in parallel, not frames of one file
+    watcher = Watcher(args.folder, out_csv=args.out, plots_dir=args.plots_dir,
+                      frames_dir=args.frames_dir, workers=args.workers, settle_s=args.settle,
+                      poll_s=args.poll, mode=args.watch_mode, report_pdf=args.report,
+                      report_every_s=60.0 * args.report_every,
+                      log=lambda msg: print(msg, flush=True), **params)
+    try:
+        n = watcher.run(once=args.once)
+    except KeyboardInterrupt:
+        n = watcher.written
+    print(f"Wrote {n} new rows to {args.out}.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# cli/wfdb_io.py
+# Direct WFDB input (e.g. the VOICED database on PhysioNet), no WAV conversion.
+#
+# A record is given by its header (voice001.hea) or its name without
+# extension (voice001, with voice001.hea next to it); a folder contributes
+# all its *.hea records. Signals are read with wfdb.rdrecord one record at a
+# time (physical units, float64, samples x channels) and go to the engines
+# in memory like decoded audio. wfdb is imported on first use.
+#
+# VOICED ships subject metadata as <record>-info.txt ("Diagnosis:\thealthy");
+# record_metadata() turns it into summary columns.
+import re
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+from .stats import SummaryRow
+
+# -info.txt fields copied into summary rows (info label -> column)
+INFO_COLUMNS = {"diagnosis": "diagnosis", "age": "age", "gender": "gender"}
+
+
+class RecordInfo(NamedTuple):
+    """Header facts under the names soundfile.info() uses."""
+    frames: int
+    channels: int
+    samplerate: int
+
+
+def _wfdb():
+    try:
+        import wfdb
+    except ImportError as e:  # pragma: no cover - wfdb is a declared dependency
+        raise ImportError("reading WFDB records needs the 'wfdb' package (pip install wfdb)") from e
+    return wfdb
+
+
+def _record_name(path) -> str:
+    # wfdb wants the record path without extension
+    p = Path(path)
+    return str(p.with_suffix("")) if p.suffix.lower() == ".hea" else str(p)
+
+
+def is_wfdb_record(path) -> bool:
+    """True for a .hea header or an extensionless record name whose .hea exists."""
+    p = Path(path)
+    if p.suffix.lower() == ".hea":
+        return True
+    return not p.suffix and p.with_name(p.name + ".hea").is_file()
+
+
+def find_records(folder) -> list[str]:
+    """Header paths of the WFDB records in `folder`, sorted."""
+    return [str(f) for f in sorted(Path(folder).glob("*.hea"))]
+
+
+def read_wfdb(path, sampfrom: int = 0, sampto: int | None = None):
+    """
+    Read a record (or samples [sampfrom, sampto)) -> (x, fs); x is (samples,)
+    or (samples, channels).
+    """
+    rec = _wfdb().rdrecord(_record_name(path), sampfrom=int(sampfrom), sampto=sampto)
+    x = np.asarray(rec.p_signal, dtype=np.float64)
+    return (x[:, 0] if x.shape[1] == 1 else x), int(round(rec.fs))
+
+
+def wfdb_info(path) -> RecordInfo:
+    """Length, channel count and rate from the header only."""
+    h = _wfdb().rdheader(_record_name(path))
+    return RecordInfo(int(h.sig_len), int(h.n_sig), int(round(h.fs)))
+
+
+def wfdb_blocks(path, blocksize: int, start: int = 0, stop: int | None = None):
+    """Yield float64 (samples, channels) blocks of a record (samples [start, stop) if given)."""
+    total = wfdb_info(path).frames
+    total = total if stop is None else min(total, int(stop))
+    for a in range(int(start), total, int(blocksize)):
+        x, _ = read_wfdb(path, a, min(total, a + int(blocksize)))
+        yield x if x.ndim > 1 else x[:, None]
+
+
+def read_voiced_info(path) -> dict:
+    """Fields of <record>-info.txt as {lowercase label: value}; {} if there is none."""
+    info = Path(_record_name(path) + "-info.txt")
+    if not info.is_file():
+        return {}
+    out = {}
+    for line in info.read_text(errors="replace").splitlines():
+        key, sep, value = line.partition(":")
+        if sep and key.strip():
+            out[re.sub(r"\s+", " ", key.strip().lower())] = value.strip()
+    return out
+
+
+def record_metadata(path) -> dict:
+    """Summary columns for a WFDB record: record name plus INFO_COLUMNS found in -info.txt."""
+    if not is_wfdb_record(path):
+        return {}
+    info = read_voiced_info(path)
+    meta = {"record": Path(_record_name(path)).name}
+    meta.update({col: info[key] for key, col in INFO_COLUMNS.items() if key in info})
+    return meta
+
+
+def with_record_metadata(path, summary: dict) -> dict:
+    """summary with record_metadata(path) columns right after "file" (unchanged for audio files)."""
+    meta = record_metadata(path)
+    if not meta:
+        return summary
+    out = {}
+    for k, v in summary.items():
+        if k not in meta:
+            out[k] = v
+        if k == "file":
+            out.update(meta)
+    out = out if "file" in summary else {**meta, **out}
+    return SummaryRow(out, summary.accumulators) if isinstance(summary, SummaryRow) else out
@@ -0,0 +1,41 @@
+import re
+
+import numpy as np
+import pytest
+
+
+def _harmonic_vowel(f0, dur=1.0, fs=16000, harmonics=7, amp=0.1, noise=0.0, seed=0):
+    """
+    Synthetic vowel: `harmonics` sines at multiples of f0 with amplitude amp / h,
+    plus white noise of standard deviation `noise`. f0 may be a function of the
+    time axis (glides, steps).
+    """
+    t = np.arange(int(dur * fs)) / fs
+    if callable(f0):
+        f0 = f0(t)
+    x = sum(amp / h * np.sin(2 * np.pi * h * f0 * t) for h in range(1, harmonics + 1))
+    if noise:
+        x = x + noise * np.random.default_rng(seed).standard_normal(len(t))
+    return x
+
+
+@pytest.fixture
+def harmonic_vowel():
+    """Factory for synthetic vowels (see _harmonic_vowel)."""
+    return _harmonic_vowel
+
+
+def _assert_streamed_summary(streamed, ref):
+    # without per-frame output, streamed percentiles come from the histogram
+    # sketch (cli.stats), exact to 0.0005 dB before rounding to 3 decimals
+    sketch = {k for k in ref if re.match(r"(median|p\d+)_", k)}
+    assert {k: v for k, v in streamed.items() if k not in sketch} == \
+        {k: v for k, v in ref.items() if k not in sketch}
+    for k in sketch:
+        assert streamed[k] == pytest.approx(ref[k], abs=1.5e-3)
+
+
+@pytest.fixture
+def assert_streamed_summary():
+    """Checker for a streamed summary (no per-frame output) against the in-memory one."""
+    return _assert_streamed_summary
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+import soundfile as sf
+from cli.adaptive import coarse_frames, region_mask
+from cli.cpps import compute_cpps_for_signal
+from cli.streaming import compute_cpps_streaming
+
+
+def _speech(vowel, fs=16000, gap=0.05):
+    # 0.4 s vowels separated by 0.6 s of noise (loud enough to pass the gate at gap=0.05)
+    rng = np.random.default_rng(3)
+    v = vowel(150, dur=0.4, fs=fs, harmonics=19)
+    parts = []
+    for _ in range(4):
+        parts += [v + 0.005 * rng.standard_normal(len(v)),
+                  gap * rng.standard_normal(int(0.6 * fs))]
+    return np.concatenate(parts), fs
+
+
+def test_adaptive_skips_unvoiced_regions_only(tmp_path, harmonic_vowel):
+    x, fs = _speech(harmonic_vowel)
+    kw = dict(praat_match=True, return_per_frame=True)
+    s0, pf0 = compute_cpps_for_signal(x, fs, "s.wav", **kw)
+    s1, pf1 = compute_cpps_for_signal(x, fs, "s.wav", adaptive=True, **kw)
+    assert s1["skipped_frames"] == pf1["skipped"].sum() > 0.3 * s1["frames"]
+    # every vowel frame is analyzed (region margins only cost time)
+    in_vowel = (pf1["time_s"] % 1.0 > 0.05) & (pf1["time_s"] % 1.0 < 0.35)
+    assert not pf1["skipped"][in_vowel].any()
+    # skipped frames stay NaN, the rest are unchanged
+    assert not pf1["cpps_db"][pf1["skipped"]].notna().any()
+    both = pf1["cpps_db"].notna()
+    np.testing.assert_array_equal(pf1["cpps_db"][both], pf0["cpps_db"][both])
+
+    path = tmp_path / "s.wav"
+    sf.write(path, x, fs, subtype="FLOAT")
+    s2, pf2 = compute_cpps_streaming(str(path), block_frames=16, adaptive=True, **kw)
+    assert s2 == s1
+    pd.testing.assert_frame_equal(pf2, pf1)
+
+
+def test_no_coarse_pass_when_the_gate_removes_most_frames(tmp_path, harmonic_vowel,
+                                                          assert_streamed_summary):
+    x, fs = _speech(harmonic_vowel, gap=1e-4)  # quiet pauses: the gate keeps only the vowels
+    s0 = compute_cpps_for_signal(x, fs, "s.wav", praat_match=True)
+    s1 = compute_cpps_for_signal(x, fs, "s.wav", praat_match=True, adaptive=True)
+    assert s1.pop("skipped_frames") == 0
+    assert s1 == s0
+    path = tmp_path / "s.wav"
+    sf.write(path, x, fs, subtype="FLOAT")
+    s2 = compute_cpps_streaming(str(path), block_frames=16, praat_match=True, adaptive=True)
+    assert s2.pop("skipped_frames") == 0
+    assert_streamed_summary(s2, s0)
+    # gate-passing coarse frames only, plus the first frame of each gated-in run
+    keep = np.array([0, 1, 1, 1, 1, 1, 0, 0, 1, 1], dtype=bool)
+    assert coarse_frames(keep).tolist() == [1, 4, 8]
+    assert coarse_frames(np.zeros(10, dtype=bool)) is None
+
+
+def test_adaptive_needs_praat_match(harmonic_vowel):
+    x, fs = _speech(harmonic_vowel)
+    with pytest.raises(ValueError, match="praat_match"):
+        compute_cpps_for_signal(x, fs, "s.wav", adaptive=True)
+
+
+def test_clean_vowel_unchanged_and_region_mask(harmonic_vowel):
+    fs = 16000
+    x = harmonic_vowel(120, dur=2.0, fs=fs, harmonics=24)
+    s0 = compute_cpps_for_signal(x, fs, "v.wav", praat_match=True)
+    s1 = compute_cpps_for_signal(x, fs, "v.wav", praat_match=True, adaptive=True)
+    assert s1.pop("skipped_frames") == 0
+    assert s1 == s0
+    assert region_mask(12, [4], step=4, margin=1).nonzero()[0].tolist() == list(range(0, 9))
+    assert not region_mask(5, []).any()
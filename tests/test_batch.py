@@ -0,0 +1,23 @@
+import pandas as pd
+import pytest
+import soundfile as sf
+from cli.batch import analyze_batch
+from cli.cpps import compute_cpps_batch
+
+
+@pytest.mark.parametrize("praat_match", [True, False])
+def test_batched_matches_per_file(tmp_path, praat_match, harmonic_vowel):
+    paths, items = [], []
+    for i, (fs, f0, dur) in enumerate([(16000, 120, 1.0), (22050, 180, 1.4), (16000, 210, 0.03),
+                                       (16000, 150, 1.7), (22050, 95, 0.9)]):
+        x = harmonic_vowel(f0, dur=dur, fs=fs)
+        p = tmp_path / f"v{i}.wav"
+        sf.write(p, x, fs)
+        paths.append(str(p))
+        items.append((str(p), *sf.read(p)))
+    kw = dict(praat_match=praat_match, return_per_frame=True)
+    df1, pf1 = compute_cpps_batch(paths, **kw)
+    results = analyze_batch(items, **kw)
+    pd.testing.assert_frame_equal(df1, pd.DataFrame([s for s, _ in results]))
+    for p, (_, pf) in zip(paths, results):
+        pd.testing.assert_frame_equal(pf1[p], pf)
@@ -0,0 +1,57 @@
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+import soundfile as sf
+from cli.budget import analyze_planned, parse_memory, plan_file, plan_interval, read_planned
+from cli.cpps import compute_cpps_for_file
+from cli.intervals import Interval, analyze_interval, interval_pad_s, read_interval
+
+
+def test_parse_memory():
+    assert parse_memory("512M") == 512 << 20
+    assert parse_memory("1.5GiB") == 3 << 29
+    assert parse_memory("0") is None and parse_memory(None) is None
+    with pytest.raises(ValueError):
+        parse_memory("12Q")
+
+
+@pytest.mark.parametrize("praat_match", [True, False])
+def test_tight_budget_streams_with_same_result(tmp_path, praat_match, harmonic_vowel):
+    fs = 16000
+    x = harmonic_vowel(130, dur=20.0, fs=fs)
+    x[3 * fs: 4 * fs] = 0.0
+    path = str(tmp_path / "long.wav")
+    sf.write(path, np.c_[x, 0.5 * x], fs)
+
+    kw = dict(praat_match=praat_match, return_per_frame=True)
+    budget = 4 << 20
+    plan = plan_file(path, budget, **kw)
+    assert plan.mode == "stream" and plan.est_bytes <= budget
+    tracemalloc.start()
+    s2, pf2 = analyze_planned(plan, read_planned(plan), **kw)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert peak <= budget
+
+    s1, pf1 = compute_cpps_for_file(path, **kw)
+    assert s1 == s2
+    pd.testing.assert_frame_equal(pf1, pf2)
+
+
+@pytest.mark.parametrize("praat_match", [True, False])
+def test_tight_budget_streams_interval_range(tmp_path, praat_match, harmonic_vowel):
+    fs = 16000
+    path = str(tmp_path / "long.wav")
+    sf.write(path, harmonic_vowel(lambda t: np.where(t < 8.0, 120.0, 190.0), dur=20.0, fs=fs), fs)
+    iv, pad = Interval(path, 3.25, 15.5, "task"), interval_pad_s(40)
+
+    kw = dict(praat_match=praat_match, return_per_frame=True)
+    plan = plan_interval(iv, 1 << 20, pad, **kw)
+    assert plan.mode == "stream" and plan.stem == iv.stem
+    s2, pf2 = analyze_planned(plan, read_planned(plan), **kw)
+    s1, pf1 = analyze_interval(iv, read_interval(iv, pad), **kw)
+    assert s1 == s2 and s2["label"] == "task" and s2["duration_s"] == 12.25
+    pd.testing.assert_frame_equal(pf1, pf2)
+    assert plan_interval(iv, 1 << 30, pad, **kw).mode == "memory"
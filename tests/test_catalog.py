@@ -0,0 +1,91 @@
+import os
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+import soundfile as sf
+from cli.catalog import Catalog, query, read_summary
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _run(args, cwd):
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    subprocess.run([sys.executable, "-m", *args], cwd=cwd, env=env, check=True,
+                   capture_output=True)
+
+
+def _corpus(vowel, folder):
+    folder.mkdir()
+    fs = 16000
+    for i, f0 in enumerate((120, 180, 280)):
+        sf.write(folder / f"v{i}.wav", vowel(f0, dur=0.6, fs=fs), fs)
+    pd.DataFrame({"voiced_id": ["v0", "v1", "v2"], "file": ["v0.wav", "v1.wav", "v2.wav"],
+                  "diagnosis": ["healthy", "healthy", "hyperkinetic dysphonia"]}
+                 ).to_csv(folder / "MANIFEST.csv", index=False)
+    return folder
+
+
+def test_cpps_run_catalog_matches_csv_and_answers_queries(tmp_path, harmonic_vowel):
+    corpus = _corpus(harmonic_vowel, tmp_path / "wav")
+    db = tmp_path / "results.sqlite"
+    _run(["cli.run_cpps", str(corpus), "--out", "s.csv", "--catalog", str(db)], tmp_path)
+    _run(["cli.run_cpps", str(corpus), "--out", "p.csv", "--catalog", str(db), "--praat-match"],
+         tmp_path)
+    assert not list(tmp_path.glob("*_cpps_framewise.csv"))  # frames went to the catalog only
+
+    runs = query(db, "SELECT run_id, status, params FROM runs")
+    assert runs["status"].tolist() == ["complete", "complete"]
+    assert '"praat_match": true' in runs["params"][1]
+
+    latest = read_summary(db)
+    csv = pd.read_csv(tmp_path / "p.csv")
+    pd.testing.assert_frame_equal(latest[csv.columns], csv, check_dtype=False)
+    assert latest["voiced_id"].tolist() == ["v0", "v1", "v2"]
+    assert latest["sha256"].str.len().eq(64).all() and latest["sha256"].is_unique
+    assert len(read_summary(db, run="all")) == 6
+    healthy = read_summary(db, where="diagnosis = ? AND mtime >= date('now', '-1 month')",
+                           params=("healthy",))
+    assert healthy["file"].tolist() == ["v0.wav", "v1.wav"]
+
+    frames = query(db, "SELECT f.file, fr.f0_hz FROM frames fr JOIN files f USING (file_id) "
+                       "WHERE f.run_id = 2 AND fr.f0_hz > 210")
+    assert set(frames["file"]) == {"v2.wav"}
+    n = query(db, "SELECT count(*) AS n FROM frames JOIN files USING (file_id) "
+                  "WHERE run_id = 2")["n"][0]
+    assert n == csv["frames"].sum()
+
+    # a time range within one file is served by the frames_time index
+    sql = ("SELECT fr.time_s, fr.cpps_db FROM frames fr JOIN files f USING (file_id) "
+           "WHERE f.file = 'v1.wav' AND f.run_id = 2 AND fr.time_s BETWEEN 0.2 AND 0.4")
+    plan = " ".join(query(db, "EXPLAIN QUERY PLAN " + sql)["detail"])
+    assert "frames_time" in plan
+    got = query(db, sql)
+    pf = query(db, "SELECT fr.time_s FROM frames fr JOIN files f USING (file_id) "
+                   "WHERE f.file = 'v1.wav' AND f.run_id = 2")
+    assert got["time_s"].tolist() == pf["time_s"][pf["time_s"].between(0.2, 0.4)].tolist()
+
+    _run(["cli.report", "--catalog", str(db), "--where", "diagnosis = 'healthy'",
+          "--out", "r.pdf"], tmp_path)
+    assert (tmp_path / "r.pdf").stat().st_size > 0
+
+
+def test_failed_insert_leaves_no_partial_file(tmp_path):
+    cat = Catalog(tmp_path / "c.sqlite")
+    run = cat.begin_run({"praat_match": False})
+    pf = pd.DataFrame({"frame_index": [0, 0], "time_s": [0.02, 0.04], "cpps_db": [1.0, np.nan],
+                       "f0_hz": [np.nan, 150.0], "hnr_db": [3.0, 4.0]})
+    content = {"sha256": None, "size_bytes": None, "mtime": None}
+    with pytest.raises(sqlite3.IntegrityError):  # duplicate frame_index
+        cat.add(run, "a.wav", {"file": "a.wav", "mean_cpps_db": 1.0}, pf, content=content)
+    pf["frame_index"] = [0, 1]
+    file_id = cat.add(run, "a.wav", {"file": "a.wav", "mean_cpps_db": 1.0}, pf, content=content)
+    cat.finish_run(run)
+    cat.close()
+    got = query(tmp_path / "c.sqlite", "SELECT * FROM frames")
+    assert file_id == 1 and len(query(tmp_path / "c.sqlite", "SELECT * FROM files")) == 1
+    assert got["hnr_db"].tolist() == [3.0, 4.0] and got["cpps_db"].isna().tolist() == [False, True]
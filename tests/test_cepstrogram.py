@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from cli.cpps import compute_cpps_for_signal
+from cli.cepstrogram import CepstrogramStore, reanalyze_store
+
+
+def _tone(fs=16000, f0=150.0):
+    t = np.arange(int(0.8 * fs)) / fs
+    x = 0.1 * np.sin(2 * np.pi * f0 * t)
+    x[: int(0.2 * fs)] = 0.0
+    return x, fs
+
+
+@pytest.mark.parametrize("praat_match", [True, False])
+def test_reanalysis_reproduces_engine(tmp_path, praat_match):
+    x, fs = _tone()
+    _, pf = compute_cpps_for_signal(x, fs, "tone.wav", return_per_frame=True,
+                                    praat_match=praat_match, cepstrogram_dir=str(tmp_path))
+    cg = CepstrogramStore(tmp_path).open("tone")
+    re = cg.reanalyze()
+    np.testing.assert_allclose(re["cpps_db"], pf["cpps_db"], atol=1e-4, equal_nan=True)
+    np.testing.assert_allclose(re["time_s"], pf["time_s"])
+    summary, _ = reanalyze_store(tmp_path, f0_min=100, f0_max=300)
+    assert 120 <= summary.loc[0, "mean_f0_hz"] <= 180
+    with pytest.raises(ValueError):
+        cg.reanalyze(f0_max=2000)
+
+
+def test_same_stem_inputs_do_not_overwrite(tmp_path):
+    store = str(tmp_path / "store")
+    a, b = str(tmp_path / "a" / "voice001.wav"), str(tmp_path / "b" / "voice001.wav")
+    compute_cpps_for_signal(*_tone(f0=120.0), a, cepstrogram_dir=store)
+    with pytest.warns(UserWarning, match="already holds"):
+        compute_cpps_for_signal(*_tone(f0=220.0), b, cepstrogram_dir=store)
+    compute_cpps_for_signal(*_tone(f0=120.0), a, cepstrogram_dir=store)  # replaces its own
+    keys = CepstrogramStore(store).files()
+    assert len(keys) == 2 and keys[0] == "voice001" and keys[1].startswith("voice001-")
+    summary, _ = reanalyze_store(store)
+    np.testing.assert_allclose(sorted(summary["mean_f0_hz"]), [120.0, 220.0], atol=15)
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+import soundfile as sf
+from cli.batch import parse_channels
+from cli.cpps import compute_cpps_for_file, compute_cpps_for_signal
+from cli.report import _channel_rows, generate_report
+from cli.streaming import compute_cpps_streaming
+
+
+def _stereo(vowel, fs=16000, dur=1.2):
+    left = vowel(120, dur=dur, fs=fs)
+    right = vowel(210, dur=dur, fs=fs, harmonics=5, amp=0.05)
+    return np.column_stack([left, right]), fs
+
+
+@pytest.mark.parametrize("praat_match", [True, False])
+def test_channels_match_single_channel_analysis(tmp_path, praat_match, harmonic_vowel):
+    x, fs = _stereo(harmonic_vowel)
+    path = tmp_path / "st.wav"
+    sf.write(path, x, fs)
+    x, _ = sf.read(path)
+    kw = dict(praat_match=praat_match, return_per_frame=True)
+    summary, pf = compute_cpps_for_file(str(path), channels="all", **kw)
+    assert summary["channels"] == "0,1"
+    assert list(pf.columns) == ["frame_index", "time_s", "cpps_db_ch0", "f0_hz_ch0",
+                                "cpps_db_ch1", "f0_hz_ch1"]
+    for c in (0, 1):
+        s1, pf1 = compute_cpps_for_signal(x[:, c], fs, str(path), **kw)
+        assert summary[f"mean_cpps_db_ch{c}"] == s1["mean_cpps_db"]
+        np.testing.assert_array_equal(pf[f"cpps_db_ch{c}"], pf1["cpps_db"])
+    # streamed blocks give the same table
+    s2, pf2 = compute_cpps_streaming(str(path), block_frames=8, channels="all", **kw)
+    assert s2 == summary
+    pd.testing.assert_frame_equal(pf, pf2)
+
+
+def test_parse_channels_and_range(harmonic_vowel):
+    assert parse_channels("all") == "all"
+    assert parse_channels("1, 0") == [1, 0]
+    assert parse_channels(None) is None
+    x, fs = _stereo(harmonic_vowel, dur=0.3)
+    with pytest.raises(ValueError, match="not in 0..1"):
+        compute_cpps_for_signal(x, fs, "st.wav", channels=[2])
+
+
+def test_report_on_channel_summary(tmp_path, harmonic_vowel):
+    x, fs = _stereo(harmonic_vowel)
+    s = compute_cpps_for_signal(x, fs, "st.wav", channels="all")
+    csv = tmp_path / "summary.csv"
+    pd.DataFrame([s, dict(s, file="b.wav")]).to_csv(csv, index=False)
+    rows = _channel_rows(pd.read_csv(csv))
+    assert list(rows["file"]) == ["st.wav [ch0]", "st.wav [ch1]", "b.wav [ch0]", "b.wav [ch1]"]
+    assert rows["mean_cpps_db"].iloc[1] == pytest.approx(s["mean_cpps_db_ch1"])
+    out = tmp_path / "report.pdf"
+    generate_report(summary_csv=str(csv), out_pdf=str(out))
+    assert out.stat().st_size > 0
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+import soundfile as sf
+from cli.cpps import compute_cpps_for_signal
+from cli.features import parse_features
+from cli.streaming import compute_cpps_streaming
+
+
+def _voice(vowel, fs=16000, dur=1.5, noise=0.01):
+    return vowel(140, dur=dur, fs=fs, harmonics=19, noise=noise, seed=1), fs
+
+
+@pytest.mark.parametrize("praat_match", [True, False])
+def test_features_add_columns_without_changing_cpps(tmp_path, praat_match, harmonic_vowel):
+    x, fs = _voice(harmonic_vowel)
+    kw = dict(praat_match=praat_match, return_per_frame=True)
+    s0, pf0 = compute_cpps_for_signal(x, fs, "v.wav", **kw)
+    s1, pf1 = compute_cpps_for_signal(x, fs, "v.wav", features="all", **kw)
+    pd.testing.assert_frame_equal(pf1[pf0.columns], pf0)
+    assert {k: s1[k] for k in s0} == s0
+    assert list(pf1.columns[4:]) == ["hnr_db", "tilt_db_oct", "lh_ratio_db", "rms_db"]
+    assert s1["median_rms_db"] == pytest.approx(20 * np.log10(np.std(x)), abs=1.0)
+    # noisier voice -> lower HNR
+    s2 = compute_cpps_for_signal(*_voice(harmonic_vowel, noise=0.05), "v.wav",
+                                 praat_match=praat_match, features="hnr")
+    assert s2["mean_hnr_db"] < s1["mean_hnr_db"] - 3
+
+    path = tmp_path / "v.wav"
+    sf.write(path, x, fs, subtype="FLOAT")
+    s3, pf3 = compute_cpps_streaming(str(path), block_frames=8, features="all", **kw)
+    assert s3 == s1
+    pd.testing.assert_frame_equal(pf3, pf1)
+
+
+def test_parse_features():
+    assert parse_features("tilt, hnr") == ("tilt", "hnr")
+    assert parse_features("all") == ("hnr", "tilt", "lh", "rms")
+    assert parse_features(None) == ()
+    with pytest.raises(ValueError, match="unknown feature"):
+        parse_features("jitter")
@@ -0,0 +1,53 @@
+import numpy as np
+from cli.framing import frame_starts, frame_rms_db, gather_frames
+from cli.praat_match import cpps_praat_match
+
+
+def test_cumsum_rms_matches_direct():
+    rng = np.random.default_rng(1)
+    x = rng.standard_normal(4000)
+    starts = frame_starts(len(x), 320, 160)
+    direct = [20 * np.log10(np.sqrt(np.mean(x[s:s + 320] ** 2) + 1e-18) + 1e-18) for s in starts]
+    assert np.allclose(frame_rms_db(x, starts, 320), direct)
+    assert gather_frames(x, starts, 320).shape == (len(starts), 320)
+
+
+def test_gated_frames_keep_their_slot():
+    fs = 16000
+    t = np.arange(int(0.8 * fs)) / fs
+    x = 0.1 * np.sin(2 * np.pi * 150 * t)
+    x[: int(0.4 * fs)] = 0.0  # silent first half
+    per_cpp, mean_cpp, per_f0, mean_f0 = cpps_praat_match(x, fs)
+    assert len(per_cpp) == len(frame_starts(len(x), 640, 320))
+    assert np.isnan(per_cpp[:5]).all()
+    assert np.isfinite(per_cpp[-5:]).all()
+
+
+def test_gate_matches_windowed_frame_energy_on_nonstationary_signal():
+    from scipy.signal import get_window
+    from cli.cpps import _default_gate, _energy_db, _frame_params
+    from cli.praat_match import _praat_gate
+
+    fs = 16000
+    rng = np.random.default_rng(4)
+    envelope = np.repeat(rng.uniform(0, 1, 500) ** 3, 320)  # level changes within frames
+    x0 = envelope * rng.standard_normal(len(envelope))
+
+    x, n, h, starts, keep = _default_gate(x0, fs)
+    w = get_window("hamming", n, fftbins=True)
+    ref = [not _energy_db(x[s:s + n] * w) < _energy_db(x) - 25 for s in starts]
+    assert keep.tolist() == ref and 0 < keep.sum() < len(keep)
+
+    x, n, h, starts, keep = _praat_gate(x0, fs)
+    file_db = 20 * np.log10(np.sqrt(np.mean(x ** 2) + 1e-18) + 1e-18)
+    frame_db = [20 * np.log10(np.sqrt(np.mean((x[s:s + n] * np.hanning(n)) ** 2) + 1e-18) + 1e-18)
+                for s in starts]
+    assert keep.tolist() == [d >= file_db - 20 for d in frame_db]
+
+    # odd frame length with a half-frame hop (11025 Hz) is measured frame by frame
+    n, h = _frame_params(11025, 40, 50)
+    starts = frame_starts(len(x0), n, h)
+    w = np.hanning(n)
+    direct = [20 * np.log10(np.sqrt(np.mean((x0[s:s + n] * w) ** 2) + 1e-18) + 1e-18)
+              for s in starts]
+    np.testing.assert_allclose(frame_rms_db(x0, starts, n, window=w), direct, atol=1e-9)
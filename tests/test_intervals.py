@@ -0,0 +1,47 @@
+import numpy as np
+import soundfile as sf
+from cli.intervals import Interval, compute_cpps_for_intervals, read_textgrid
+
+SHORT_TG = '''File type = "ooTextFile"
+Object class = "TextGrid"
+
+0
+3
+<exists>
+1
+"IntervalTier"
+"task"
+0
+3
+3
+0
+1
+"a"
+1
+2
+""
+2
+3
+"say ""hi"" [2]"
+'''
+
+
+def test_textgrid_short_format(tmp_path):
+    p = tmp_path / "x.TextGrid"
+    p.write_text(SHORT_TG)
+    tiers = read_textgrid(p)
+    assert tiers["task"] == [(0.0, 1.0, "a"), (1.0, 2.0, ""), (2.0, 3.0, 'say "hi" [2]')]
+
+
+def test_interval_reads_only_its_range(tmp_path, harmonic_vowel):
+    fs = 16000
+    x = harmonic_vowel(lambda t: np.where(t < 1.0, 120.0, 200.0), dur=3.0, fs=fs, harmonics=10)
+    wav = tmp_path / "long.wav"
+    sf.write(wav, x, fs)
+    df, pf = compute_cpps_for_intervals([Interval(str(wav), 1.5, 2.5, "b")],
+                                        praat_match=True, return_per_frame=True)
+    row = df.iloc[0]
+    assert row["label"] == "b" and row["duration_s"] == 1.0
+    assert 180 <= row["mean_f0_hz"] <= 220
+    times = pf[Interval(str(wav), 1.5, 2.5, "b").stem]["time_s"]
+    assert 1.5 - 1e-9 <= times.min() and times.max() <= 2.5 + 1e-9
@@ -0,0 +1,21 @@
+import types
+
+import numpy as np
+import soundfile as sf
+from cli.cpps import compute_cpps_batch, iter_cpps
+
+
+def test_iter_cpps_streams_results(tmp_path):
+    fs = 16000
+    t = np.arange(int(0.8 * fs)) / fs
+    paths = []
+    for i, f in enumerate((120, 200)):
+        p = tmp_path / f"t{i}.wav"
+        sf.write(p, 0.1 * np.sin(2 * np.pi * f * t), fs)
+        paths.append(str(p))
+    gen = iter_cpps(paths, praat_match=True, return_per_frame=True)
+    assert isinstance(gen, types.GeneratorType)
+    summary, pf = next(gen)
+    assert summary["file"] == "t0.wav" and len(pf) == summary["frames"]
+    df, per_frame = compute_cpps_batch(paths, praat_match=True)
+    assert list(df["file"]) == ["t0.wav", "t1.wav"] and per_frame == {}
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+from cli.cpps import compute_cpps_for_signal
+from cli.parallel import _get_pool, shutdown_pool
+
+
+@pytest.mark.parametrize("praat_match", [True, False])
+def test_intra_file_workers_match_serial(praat_match, harmonic_vowel):
+    fs = 16000
+    x = harmonic_vowel(140, dur=5.0, fs=fs)
+    x[fs: 2 * fs] = 0.0  # a pause, so gated frames sit between chunks
+    kw = dict(praat_match=praat_match, return_per_frame=True)
+    s1, pf1 = compute_cpps_for_signal(x, fs, "a.wav", workers=1, **kw)
+    s2, pf2 = compute_cpps_for_signal(x, fs, "a.wav", workers=2, **kw)
+    shutdown_pool()
+    assert s1 == s2
+    np.testing.assert_array_equal(pf1["cpps_db"].to_numpy(), pf2["cpps_db"].to_numpy())
+    np.testing.assert_array_equal(pf1["f0_hz"].to_numpy(), pf2["f0_hz"].to_numpy())
+
+
+def test_pool_does_not_fork():
+    # pipeline threads are live when the pool starts; fork could copy a held lock
+    pool = _get_pool(2)
+    try:
+        assert pool._mp_context.get_start_method() in ("forkserver", "spawn")
+    finally:
+        shutdown_pool()
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import soundfile as sf
+from cli.cpps import compute_cpps_batch
+from cli.pipeline import OutputWriter, run_pipelined
+
+
+def _write_tones(tmp_path, freqs=(120, 150, 200), fs=16000):
+    t = np.arange(int(0.8 * fs)) / fs
+    paths = []
+    for i, f in enumerate(freqs):
+        p = tmp_path / f"tone_{i}.wav"
+        sf.write(p, (0.1 * np.sin(2 * np.pi * f * t)).astype("float32"), fs)
+        paths.append(str(p))
+    return paths
+
+
+def test_pipelined_matches_serial(tmp_path):
+    paths = _write_tones(tmp_path)
+    ref, _ = compute_cpps_batch(paths, praat_match=True)
+    out = tmp_path / "summary.csv"
+    writer = OutputWriter(out, plots_dir=tmp_path / "plots", frames_dir=tmp_path)
+    df, stats = run_pipelined(paths, writer=writer, readers=2, prefetch=1, write_queue=1,
+                              praat_match=True, return_per_frame=True)
+    pd.testing.assert_frame_equal(df, ref)
+    assert list(pd.read_csv(out)["file"]) == list(ref["file"])
+    assert (tmp_path / "tone_0_cpps_framewise.csv").exists()
+    assert stats.as_dict()["files"] == 3
+
+
+def test_summary_widens_for_mixed_mono_and_stereo(tmp_path):
+    fs = 16000
+    t = np.arange(int(0.8 * fs)) / fs
+    tone = 0.1 * np.sin(2 * np.pi * 150 * t)
+    sf.write(tmp_path / "a_mono.wav", tone, fs)
+    sf.write(tmp_path / "b_stereo.wav", np.column_stack([tone, 0.5 * tone]), fs)
+    sf.write(tmp_path / "c_mono.wav", tone, fs)
+    paths = sorted(str(p) for p in tmp_path.glob("*.wav"))
+    out = tmp_path / "summary.csv"
+    df, _ = run_pipelined(paths, writer=OutputWriter(out), channels="all", collect=True)
+    got = pd.read_csv(out)
+    assert list(got.columns) == list(df.columns)  # union, in order of first appearance
+    assert got["channels"].astype(str).tolist() == ["0", "0,1", "0"]
+    assert got["mean_cpps_db_ch1"].notna().tolist() == [False, True, False]
+    pd.testing.assert_frame_equal(got, df, check_dtype=False)
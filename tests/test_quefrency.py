@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+from cli.cpps import compute_cpps_for_signal
+from cli.quefrency import band_method, partial_cepstrum
+
+
+def test_partial_cepstrum_matches_irfft_band():
+    rng = np.random.default_rng(0)
+    for n_fft, q0, q1 in [(640, 32, 267), (1024, 19, 278), (8, 0, 5)]:
+        Y = rng.standard_normal((7, n_fft // 2 + 1))
+        np.testing.assert_allclose(partial_cepstrum(Y, n_fft, q0, q1),
+                                   np.fft.irfft(Y, n_fft)[:, q0:q1], atol=1e-15)
+    assert band_method("auto", 640, 32, 267) == "matrix"
+    assert band_method("auto", 1 << 16, 0, 1 << 14) is None  # full inverse FFT
+    assert band_method("off", 640, 32, 267) is None
+    with pytest.raises(ValueError):
+        band_method("fft", 640, 32, 267)
+
+
+@pytest.mark.parametrize("praat_match", [True, False])
+@pytest.mark.parametrize("mode", ["matrix", "auto"])
+def test_band_cepstrum_matches_full(praat_match, mode, harmonic_vowel):
+    fs = 16000
+    x = harmonic_vowel(lambda t: 130 + 15 * t, dur=2.0, fs=fs, harmonics=11, noise=0.005, seed=2)
+    kw = dict(praat_match=praat_match, return_per_frame=True)
+    _, ref = compute_cpps_for_signal(x, fs, "b.wav", **kw)
+    _, pf = compute_cpps_for_signal(x, fs, "b.wav", band_cepstrum=mode, **kw)
+    np.testing.assert_allclose(pf["cpps_db"], ref["cpps_db"], atol=1e-9)
+    np.testing.assert_allclose(pf["f0_hz"], ref["f0_hz"], rtol=1e-12)
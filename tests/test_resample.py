@@ -0,0 +1,21 @@
+import numpy as np
+from scipy.signal import resample_poly
+from cli.resample import StreamingResampler, polyphase_plan, resample_signal
+
+
+def test_resample_matches_resample_poly_and_caches_plan():
+    rng = np.random.default_rng(0)
+    x = rng.standard_normal(44100)
+    y = resample_signal(x, 44100, 16000)
+    np.testing.assert_allclose(y, resample_poly(x, 160, 441), atol=1e-12)
+    assert polyphase_plan(44100, 16000) is polyphase_plan(44100, 16000)
+    assert resample_signal(x, 16000, 16000) is x
+
+
+def test_streaming_resampler_matches_one_shot():
+    rng = np.random.default_rng(1)
+    x = rng.standard_normal(3 * 22050 + 17)
+    rs = StreamingResampler(22050, 16000)
+    parts = [rs.process(x[a: a + 4001]) for a in range(0, len(x), 4001)]
+    parts.append(rs.process(final=True))
+    np.testing.assert_allclose(np.concatenate(parts), resample_signal(x, 22050, 16000), atol=1e-12)
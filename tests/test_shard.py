@@ -0,0 +1,76 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+import soundfile as sf
+from cli.shard import merge_runs, parse_shard, shard_of
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _run(args, cwd):
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    return subprocess.Popen([sys.executable, "-m", *args], cwd=cwd, env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+def _corpus(vowel, folder, n=7):
+    folder.mkdir()
+    for i in range(n):
+        fs = 16000
+        x = vowel(100 + 15 * i, dur=0.4 + 0.1 * i, fs=fs, harmonics=5)
+        sf.write(folder / f"v{i}.wav", x, fs)
+    return folder
+
+
+def test_shards_merge_to_single_node_run(tmp_path, harmonic_vowel):
+    corpus = _corpus(harmonic_vowel, tmp_path / "wav")
+    single = tmp_path / "single"
+    single.mkdir()
+    single_run = _run(["cli.run_cpps", str(corpus), "--per_frame", "--out", "all.csv",
+                       "--run-meta", "all.run.json"], single)
+    assert single_run.wait() == 0
+
+    n = 3
+    nodes = [tmp_path / f"node{i}" for i in range(n)]
+    for d in nodes:
+        d.mkdir()
+    procs = [_run(["cli.run_cpps", str(corpus), "--per_frame", "--shard", f"{i}/{n}",
+                   "--out", "s.csv"], d)
+             for i, d in enumerate(nodes)]
+    assert [p.wait() for p in procs] == [0] * n
+
+    merged = tmp_path / "merged"
+    merge_runs([d / "s.run.json" for d in nodes], merged / "all.csv")
+    assert (merged / "all.csv").read_bytes() == (single / "all.csv").read_bytes()
+    for f in single.glob("*_cpps_framewise.csv"):
+        assert (merged / f.name).read_bytes() == f.read_bytes()
+    assert len(list((merged / "frame_plots").glob("*.png"))) == 7
+    # shards' cohort states merge into the single-node cohort statistics
+    one, many = (json.loads((d / "all.run.json").read_text()) for d in (single, merged))
+    assert many["cohort_summary"] == one["cohort_summary"]
+    assert many["cohort"]["cpps_db"]["bins"] == one["cohort"]["cpps_db"]["bins"]
+    assert one["cohort_summary"]["frames"] == pd.read_csv(single / "all.csv")["frames"].sum()
+
+    # a shard missing, or run with other parameters, is refused
+    with pytest.raises(ValueError, match="missing shard"):
+        merge_runs([d / "s.run.json" for d in nodes[:2]], tmp_path / "bad.csv")
+    assert _run(["cli.run_cpps", str(corpus), "--shard", f"2/{n}", "--f0_min", "75",
+                 "--per_frame", "--out", "t.csv"], nodes[2]).wait() == 0
+    with pytest.raises(ValueError, match="parameters differ.*f0_min"):
+        merge_runs([nodes[0] / "s.run.json", nodes[1] / "s.run.json", nodes[2] / "t.run.json"],
+                   tmp_path / "bad.csv")
+
+
+def test_shard_assignment_is_stable():
+    assert parse_shard("1/4") == (1, 4)
+    with pytest.raises(ValueError):
+        parse_shard("4/4")
+    names = [f"voice{i:03d}.wav" for i in range(200)]
+    shards = [shard_of(f"/data/a/{n}", 4) for n in names]
+    assert shards == [shard_of(f"other/mount/{n}", 4) for n in names]
+    assert set(shards) == {0, 1, 2, 3}
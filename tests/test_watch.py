@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+import soundfile as sf
+from cli import watch
+from cli.cpps import compute_cpps_for_file
+from cli.watch import Watcher
+
+
+def _voice(vowel, path, f0, fs=16000, dur=0.8):
+    x = vowel(f0, dur=dur, fs=fs, harmonics=5)
+    sf.write(path, x, fs, format="WAV")
+
+
+def _wait_rows(csv, n, timeout=30.0):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if csv.exists() and csv.stat().st_size and len(pd.read_csv(csv)) >= n:
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_watch_appends_new_files_and_skips_done(tmp_path, harmonic_vowel):
+    drop, out = tmp_path / "drop", tmp_path / "summary.csv"
+    drop.mkdir()
+    _voice(harmonic_vowel, drop / "a.wav", 120)
+    kw = dict(out_csv=out, plots_dir=tmp_path / "plots", frames_dir=tmp_path, workers=0,
+              settle_s=0.2, poll_s=0.1, mode="poll", log=lambda msg: None, return_per_frame=True)
+    stop = threading.Event()
+    watcher = Watcher(drop, **kw)
+    t = threading.Thread(target=watcher.run, kwargs=dict(stop=stop))
+    t.start()
+    try:
+        assert _wait_rows(out, 1)
+        # written next to the drop folder, then moved in (how copies usually land)
+        _voice(harmonic_vowel, tmp_path / "b.part", 200)
+        (tmp_path / "b.part").rename(drop / "b.wav")
+        assert _wait_rows(out, 2)
+    finally:
+        stop.set()
+        t.join()
+
+    df = pd.read_csv(out)
+    assert list(df["file"]) == ["a.wav", "b.wav"]
+    ref = compute_cpps_for_file(str(drop / "b.wav"))
+    assert df.iloc[1]["mean_cpps_db"] == ref["mean_cpps_db"]
+    assert (tmp_path / "b_cpps_framewise.csv").exists()
+
+    # a restart only picks up what is new
+    _voice(harmonic_vowel, drop / "c.wav", 150)
+    assert Watcher(drop, **kw).run(once=True) == 1
+    assert list(pd.read_csv(out)["file"]) == ["a.wav", "b.wav", "c.wav"]
+
+
+def test_failed_file_is_retried_when_rewritten(tmp_path, harmonic_vowel):
+    drop, out = tmp_path / "drop", tmp_path / "summary.csv"
+    drop.mkdir()
+    (drop / "a.wav").write_bytes(b"not audio yet")
+    logs = []
+    watcher = Watcher(drop, out_csv=out, plots_dir=tmp_path / "plots", frames_dir=tmp_path,
+                      workers=0, settle_s=0.2, poll_s=0.1, mode="poll", log=logs.append)
+    stop = threading.Event()
+    t = threading.Thread(target=watcher.run, kwargs=dict(stop=stop))
+    t.start()
+    try:
+        end = time.monotonic() + 30
+        while "a.wav" not in watcher.failed and time.monotonic() < end:
+            time.sleep(0.05)
+        assert any("a.wav: failed" in m for m in logs)
+        _voice(harmonic_vowel, drop / "a.wav", 140)  # the upload is redone
+        assert _wait_rows(out, 1)
+    finally:
+        stop.set()
+        t.join()
+    assert list(pd.read_csv(out)["file"]) == ["a.wav"] and not watcher.failed
+
+
+_analyze = watch._analyze
+
+
+def _die_once(path, params):
+    # the first worker to see crash.flag next to the drop folder dies like an OOM kill
+    flag = Path(path).parent.parent / "crash.flag"
+    try:
+        flag.unlink()
+    except FileNotFoundError:
+        return _analyze(path, params)
+    os._exit(1)
+
+
+def test_pool_is_rebuilt_after_a_worker_dies(tmp_path, harmonic_vowel, monkeypatch):
+    drop, out = tmp_path / "drop", tmp_path / "summary.csv"
+    drop.mkdir()
+    for name, f0 in (("a.wav", 120), ("b.wav", 170)):
+        _voice(harmonic_vowel, drop / name, f0)
+    (tmp_path / "crash.flag").touch()
+    monkeypatch.setattr(watch, "_analyze", _die_once)
+    logs = []
+    watcher = Watcher(drop, out_csv=out, plots_dir=tmp_path / "plots", frames_dir=tmp_path,
+                      workers=1, settle_s=0.1, poll_s=0.05, mode="poll", log=logs.append)
+    assert watcher.run(once=True) == 2
+    assert any("worker died, retrying" in m for m in logs) and not watcher.failed
+    assert sorted(pd.read_csv(out)["file"]) == ["a.wav", "b.wav"]
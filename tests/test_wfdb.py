@@ -0,0 +1,32 @@
+import pytest
+from cli.cpps import compute_cpps_for_file, compute_cpps_for_signal
+from cli.streaming import compute_cpps_streaming
+from cli.wfdb_io import find_records, is_wfdb_record, read_wfdb
+
+wfdb = pytest.importorskip("wfdb")
+
+
+@pytest.fixture
+def record(tmp_path, harmonic_vowel):
+    fs = 8000
+    x = harmonic_vowel(140, dur=1.2, fs=fs, amp=0.2)
+    wfdb.wrsamp("voice901", fs=fs, units=["mV"], sig_name=["voice"], p_signal=x[:, None],
+                fmt=["16"], write_dir=str(tmp_path))
+    (tmp_path / "voice901-info.txt").write_text(
+        "ID:\tvoice901\nAge:\t45\nGender:\tf\nDiagnosis:\thyperkinetic dysphonia\n")
+    return tmp_path / "voice901.hea"
+
+
+def test_wfdb_record_matches_in_memory_signal(record, assert_streamed_summary):
+    assert find_records(record.parent) == [str(record)]
+    assert is_wfdb_record(record.with_suffix(""))
+    x, fs = read_wfdb(record)
+    assert fs == 8000 and x.ndim == 1
+    summary, pf = compute_cpps_for_file(str(record), return_per_frame=True)
+    ref, ref_pf = compute_cpps_for_signal(x, fs, str(record), return_per_frame=True)
+    assert {k: summary[k] for k in ref} == ref
+    assert summary["record"] == "voice901"
+    assert summary["diagnosis"] == "hyperkinetic dysphonia"
+    assert list(summary)[:5] == ["file", "record", "diagnosis", "age", "gender"]
+    streamed = compute_cpps_streaming(str(record), block_frames=8)
+    assert_streamed_summary(streamed, ref)